@@ -15,7 +15,7 @@ a = Analysis(
     pathex=[str(SRC_DIR)],
     binaries=[],
     datas=[('Template', 'Template')],
-    hiddenimports=['toir_manager', 'toir_manager.ui.desktop', 'toir_raspredelenije'],
+    hiddenimports=['toir_manager', 'toir_manager.ui.desktop', 'toir_raspredelenije', 'openpyxl'],
     hookspath=[],
     hooksconfig={},
     runtime_hooks=[],
@@ -0,0 +1,157 @@
+"""
+Замер пакетной проверки имён `NameTable` против посимвольной транслитерации.
+
+Запуск: `python benchmarks/bench_naming.py --count 100000`.
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+SRC_DIR = Path(__file__).resolve().parents[1] / "src"
+if str(SRC_DIR) not in sys.path:
+    sys.path.insert(0, str(SRC_DIR))
+
+from toir_manager.services.naming import (  # noqa: E402
+    ALLOWED_ASCII_CHARS,
+    RE_FILENAME,
+    TRANSLIT_MAP,
+    NameTable,
+    transliterate_many,
+)
+
+
+def _legacy_transliterate(value: str) -> str:
+    """Прежняя посимвольная транслитерация."""
+
+    result: list[str] = []
+    for char in value:
+        if char in TRANSLIT_MAP:
+            result.append(TRANSLIT_MAP[char])
+        elif char in ALLOWED_ASCII_CHARS:
+            result.append(char)
+        else:
+            result.append("_")
+    return "".join(result)
+
+
+def _legacy(projects: list[tuple[Path, list[Path]]]) -> int:
+    """Прежний путь планирования.
+
+    Посимвольная транслитерация папки и файлов, проверка цели каждого
+    переименования на диске и два `RE_FILENAME.match` на выбранный файл.
+    """
+
+    matched = 0
+    for folder, files in projects:
+        target_dir = folder.parent / (_legacy_transliterate(folder.name) or "_")
+        if target_dir != folder and target_dir.exists():
+            continue
+        final_files: list[Path] = []
+        reserved: set[str] = set()
+        for file_path in files:
+            suffix = file_path.suffix
+            base_name = file_path.name[: -len(suffix)]
+            target_name = (_legacy_transliterate(base_name) or "_") + suffix.lower()
+            if target_name == file_path.name:
+                final_files.append(target_dir / file_path.name)
+                continue
+            if target_name in reserved or (folder / target_name).exists():
+                final_files.append(target_dir / file_path.name)
+                continue
+            reserved.add(target_name)
+            final_files.append(target_dir / target_name)
+        matching = [item for item in final_files if RE_FILENAME.match(item.name)]
+        if matching:
+            match = RE_FILENAME.match(matching[0].name)
+            assert match is not None
+            match.groupdict()
+            matched += 1
+    return matched
+
+
+def _batch(projects: list[tuple[Path, list[Path]]]) -> int:
+    """Новый путь: одна таблица имён на весь INBOX, затем выбор отчёта."""
+
+    table = NameTable.build(projects)
+    matched = 0
+    for folder, _files in projects:
+        entry = table.folder(folder)
+        assert entry is not None
+        target_dir = entry.target
+        for item in entry.files:
+            if item.parsed is not None:
+                target_dir / item.target_name
+                item.parsed.as_dict()
+                matched += 1
+                break
+    return matched
+
+
+def _names(count: int, cyrillic_share: float) -> list[tuple[Path, list[Path]]]:
+    """Синтетический INBOX: `count` проектов по одному файлу `_All`."""
+
+    rng = random.Random(42)
+    root = Path("/nonexistent/inbox")
+    projects: list[tuple[Path, list[Path]]] = []
+    for index in range(count):
+        part = rng.choice(("CS", "LP"))
+        period = rng.choice(("1M", "C", "С"))
+        name = (
+            f"CT-DR-B-{part}-GCU{index % 97}-II.{index % 40}.1-00-{period}"
+            f"-2025{rng.randint(1, 12):02d}01-00_All.pdf"
+        )
+        folder = f"P{index:06d}"
+        if rng.random() < cyrillic_share:
+            folder = f"Проект {index:06d}"
+        projects.append((root / folder, [root / folder / name]))
+    return projects
+
+
+def _best(func, argument, repeat: int) -> float:
+    """Лучшее время из `repeat` прогонов."""
+
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func(argument)
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main() -> int:
+    """Точка входа замера."""
+
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--count", type=int, default=100_000)
+    parser.add_argument("--cyrillic-share", type=float, default=0.0)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    projects = _names(args.count, args.cyrillic_share)
+    names = [item.name for _folder, files in projects for item in files]
+    stages = (
+        (
+            "транслитерация",
+            lambda values: [_legacy_transliterate(value) for value in values],
+            transliterate_many,
+            names,
+        ),
+        ("планирование имён", _legacy, _batch, projects),
+    )
+    for label, legacy, batch, argument in stages:
+        before = _best(legacy, argument, args.repeat)
+        after = _best(batch, argument, args.repeat)
+        print(
+            f"{label:<18} {args.count} имён: было {before:.3f} с, "
+            f"стало {after:.3f} с, ускорение x{before / after:.2f}"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -3,6 +3,7 @@
 from __future__ import annotations
 
 import argparse
+import multiprocessing
 import sys
 from pathlib import Path
 
@@ -47,4 +48,6 @@ def main(argv: list[str] | None = None) -> int:
 
 
 if __name__ == "__main__":
+    # Пул процессов архивации в собранном exe перезапускает сам бинарь.
+    multiprocessing.freeze_support()
     raise SystemExit(main())
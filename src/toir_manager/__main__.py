@@ -11,6 +11,7 @@ from pathlib import Path
 from typing import Sequence
 
 from toir_manager.cli import report as report_cli
+from toir_manager.cli import watch as watch_cli
 
 
 def build_parser() -> argparse.ArgumentParser:
@@ -19,6 +20,9 @@ def build_parser() -> argparse.ArgumentParser:
     parser = argparse.ArgumentParser(description="Инструменты ТОиР")
     subparsers = parser.add_subparsers(dest="command", required=True)
     subparsers.add_parser("report", help="Показать журналы в консоли")
+    subparsers.add_parser(
+        "watch", help="Следить за INBOX и раскладывать новые проекты"
+    )
     ui_parser = subparsers.add_parser("ui", help="Запустить десктопный просмотрщик")
     ui_parser.add_argument(
         "--base-dir",
@@ -41,6 +45,9 @@ def main(argv: Sequence[str] | None = None) -> int:
     if command == "report":
         return report_cli.main(argv=argv[1:])
 
+    if command == "watch":
+        return watch_cli.main(argv=argv[1:])
+
     if command == "ui":
         parser = argparse.ArgumentParser(add_help=False)
         parser.add_argument(
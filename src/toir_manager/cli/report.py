@@ -10,7 +10,11 @@ import sys
 from pathlib import Path
 from typing import Sequence
 
-from toir_manager.services.log_reader import list_runs, summarize_entries
+from toir_manager.services.log_reader import (
+    inbox_summaries,
+    list_runs,
+    summarize_entries,
+)
 from toir_manager.services.log_writer import iter_run_logs
 
 
@@ -88,17 +92,44 @@ def render_run_summary(
         return 1
 
     summary = summarize_entries(entries)
+    inboxes = inbox_summaries(entries)
     if as_json:
-        print(json.dumps({"run_id": run_id, **summary}, ensure_ascii=False))
+        payload = {"run_id": run_id, **summary}
+        if inboxes:
+            payload["inboxes"] = inboxes
+        print(json.dumps(payload, ensure_ascii=False))
     else:
         print(f"Запуск: {run_id}")
         print(
-            "Всего операций: {total}, успехов: {success}, ошибок: {errors}".format(
+            "Всего операций: {total}, успехов: {success}, ошибок: {errors}, "
+            "пропущено: {skipped}".format(
                 total=summary["total"],
                 success=summary["success"],
                 errors=summary["errors"],
+                skipped=summary["skipped"],
             )
         )
+        for item in inboxes:
+            print(
+                "  {inbox} (part {part_filter}): проектов {projects}, успехов "
+                "{success}, ошибок {errors}, пропущено {skipped}".format(
+                    inbox=item.get("inbox", "-"),
+                    part_filter=item.get("part_filter", "-"),
+                    projects=item.get("projects", 0),
+                    success=item.get("success", 0),
+                    errors=item.get("errors", 0),
+                    skipped=item.get("skipped", 0),
+                )
+            )
+            throughput = item.get("throughput") or {}
+            if throughput:
+                print(
+                    "    запись: "
+                    + ", ".join(
+                        f"{root} {values.get('mb_per_s', 0):.2f} МБ/с"
+                        for root, values in throughput.items()
+                    )
+                )
 
     if show_details:
         print("\nПодробности:")
@@ -0,0 +1,182 @@
+﻿"""
+CLI-команда `watch`: постоянное наблюдение за INBOX и раскладка готовых проектов.
+"""
+
+from __future__ import annotations
+
+import argparse
+import importlib
+import os
+import sys
+import time
+from datetime import date
+from pathlib import Path
+from types import ModuleType
+from typing import Callable, Sequence
+
+from toir_manager.services.log_writer import DispatchLogger
+from toir_manager.services.watcher import InboxWatcher
+
+REPO_ROOT = Path(__file__).resolve().parents[3]
+DEFAULT_INTERVAL = 5.0
+DEFAULT_SETTLE = 30.0
+
+
+def _env_seconds(name: str, default: float) -> float:
+    """Прочитать неотрицательное число секунд из переменной окружения."""
+
+    raw = os.environ.get(name, "").strip()
+    if not raw:
+        return default
+    try:
+        value = float(raw)
+    except ValueError:
+        print(f"[Предупреждение] {name}={raw!r} не число, используем {default}.")
+        return default
+    return max(0.0, value)
+
+
+def _load_pipeline() -> ModuleType:
+    """Импортировать конвейер `toir_raspredelenije` из корня репозитория."""
+
+    if str(REPO_ROOT) not in sys.path:
+        sys.path.insert(0, str(REPO_ROOT))
+    return importlib.import_module("toir_raspredelenije")
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Построить парсер аргументов."""
+
+    parser = argparse.ArgumentParser(
+        prog="python -m toir_manager watch",
+        description="Наблюдение за входным каталогом и раскладка новых проектов",
+    )
+    parser.add_argument(
+        "--inbox",
+        type=Path,
+        default=None,
+        help="Входной каталог (по умолчанию TOIR_INBOX_DIR или INBOX_DIR)",
+    )
+    parser.add_argument(
+        "--interval",
+        type=float,
+        default=None,
+        help=f"Пауза между опросами, с (TOIR_WATCH_INTERVAL, по умолчанию {DEFAULT_INTERVAL:g})",
+    )
+    parser.add_argument(
+        "--settle",
+        type=float,
+        default=None,
+        help=(
+            "Сколько секунд папка не должна меняться перед обработкой "
+            f"(TOIR_WATCH_SETTLE, по умолчанию {DEFAULT_SETTLE:g})"
+        ),
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Число параллельно обрабатываемых проектов (TOIR_WORKERS, по умолчанию 1)",
+    )
+    parser.add_argument(
+        "--once",
+        action="store_true",
+        help="Выполнить один опрос и выйти",
+    )
+    return parser
+
+
+def watch(
+    inbox: Path,
+    interval: float,
+    settle: float,
+    once: bool = False,
+    workers: int | None = None,
+    pipeline: ModuleType | None = None,
+    sleep: Callable[[float], None] = time.sleep,
+    today: Callable[[], date] = date.today,
+) -> int:
+    """Опрашивать `inbox` и раскладывать папки, переставшие меняться.
+
+    Журнал переключается на новый файл `<ГГГГММДД>_watch.jsonl` при смене
+    суток. Обработанная папка повторно попадает в работу, только если её
+    содержимое изменится. Настройки конвейера собираются один раз на всё
+    наблюдение.
+    """
+
+    pipeline = pipeline or _load_pipeline()
+    inbox = Path(inbox)
+    config = pipeline.resolve_run_config(inbox, workers)
+    discovery_context = pipeline.RunContext(config=config)
+    watcher = InboxWatcher(
+        inbox,
+        settle_seconds=settle,
+        discover=lambda root: pipeline.find_project_folders(root, discovery_context),
+    )
+    logger: DispatchLogger | None = None
+    logger_day: date | None = None
+    print(
+        f"Наблюдаем за {inbox}: опрос каждые {interval:g} с, "
+        f"ожидание тишины {settle:g} с."
+    )
+    try:
+        while True:
+            current_day = today()
+            if logger is None or logger_day != current_day:
+                logger = DispatchLogger(run_id=f"{current_day:%Y%m%d}_watch")
+                logger_day = current_day
+                print(f"Текущий лог доступен в: {logger.file_path}")
+
+            if inbox.exists():
+                ready = watcher.poll()
+            else:
+                print(f"[Ошибка] Входной каталог отсутствует: {inbox}")
+                ready = []
+            if ready:
+                print(f"\nГотово к обработке папок: {len(ready)}.")
+                try:
+                    plan = pipeline.dispatch_folders(
+                        inbox, ready, logger=logger, config=config
+                    )
+                except Exception as exc:  # noqa: BLE001
+                    print(f"[Ошибка] Сбой обработки: {exc}")
+                else:
+                    for project in plan.projects:
+                        watcher.mark_done(project.project_path)
+
+            if once:
+                return 0
+            sleep(interval)
+    except KeyboardInterrupt:
+        print("\nНаблюдение остановлено.")
+        return 0
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    """Точка входа команды."""
+
+    args = build_parser().parse_args(argv)
+    pipeline = _load_pipeline()
+    inbox = pipeline.resolve_run_config(args.inbox).inbox_dir
+    interval = (
+        args.interval
+        if args.interval is not None
+        else _env_seconds("TOIR_WATCH_INTERVAL", DEFAULT_INTERVAL)
+    )
+    settle = (
+        args.settle
+        if args.settle is not None
+        else _env_seconds("TOIR_WATCH_SETTLE", DEFAULT_SETTLE)
+    )
+    return watch(
+        inbox,
+        interval=interval,
+        settle=settle,
+        once=args.once,
+        workers=args.workers,
+        pipeline=pipeline,
+    )
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,235 @@
+"""
+План распределения: все переименования, цели копирования и архивы до начала ввода-вывода.
+"""
+
+from __future__ import annotations
+
+import json
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Any
+
+from toir_manager.core.logging_models import TransferAction
+
+PLAN_VERSION = 1
+
+
+def _path(value: Path | None) -> str | None:
+    """Сериализовать путь для JSON."""
+
+    return str(value) if value is not None else None
+
+
+@dataclass(slots=True)
+class PlannedRename:
+    """Переименование папки проекта или файла `_All` в латиницу."""
+
+    source: Path
+    target: Path
+    kind: str
+    metadata: dict[str, str] = field(default_factory=dict)
+
+    def to_dict(self) -> dict[str, Any]:
+        """Подготовить сериализуемое представление."""
+
+        return {
+            "kind": self.kind,
+            "source": _path(self.source),
+            "target": _path(self.target),
+        }
+
+
+@dataclass(slots=True)
+class PlannedCopy:
+    """Целевой файл отчёта вместе с параметрами журналирования."""
+
+    action: TransferAction
+    target: Path
+    metadata: dict[str, str]
+    success_message: str = ""
+    error_message: str = ""
+
+    def to_dict(self) -> dict[str, Any]:
+        """Подготовить сериализуемое представление."""
+
+        return {
+            "action": self.action.value,
+            "target": _path(self.target),
+            "metadata": dict(self.metadata),
+        }
+
+
+@dataclass(slots=True)
+class PlannedArchive:
+    """Архив папки проекта в каталоге Native."""
+
+    source_dir: Path
+    target: Path
+
+    def to_dict(self) -> dict[str, Any]:
+        """Подготовить сериализуемое представление."""
+
+        return {"source": _path(self.source_dir), "target": _path(self.target)}
+
+
+@dataclass(slots=True)
+class PlanIssue:
+    """Ошибка, найденная при планировании; пишется в журнал при исполнении."""
+
+    action: TransferAction
+    source: Path
+    target: Path | None
+    message: str
+    metadata: dict[str, str] | None = None
+
+    def to_dict(self) -> dict[str, Any]:
+        """Подготовить сериализуемое представление."""
+
+        return {
+            "action": self.action.value,
+            "source": _path(self.source),
+            "target": _path(self.target),
+            "message": self.message,
+        }
+
+
+@dataclass(slots=True)
+class ProjectPlan:
+    """Всё, что нужно сделать с одной папкой проекта."""
+
+    source_path: Path
+    project_path: Path
+    report_file: Path | None = None
+    attributes: dict[str, str] = field(default_factory=dict)
+    metadata: dict[str, str] = field(default_factory=dict)
+    renames: list[PlannedRename] = field(default_factory=list)
+    copies: list[PlannedCopy] = field(default_factory=list)
+    archive: PlannedArchive | None = None
+    directories: list[Path] = field(default_factory=list)
+    destination_event: tuple[str, Path] | None = None
+    issues: list[PlanIssue] = field(default_factory=list)
+    resumed: list[TransferAction] = field(default_factory=list)
+    skip_reason: str | None = None
+    # Заполняется исполнителем: при исполнении в журнал записана ошибка.
+    failed: bool = False
+
+    @property
+    def executable(self) -> bool:
+        """Есть ли у проекта копирования для исполнения."""
+
+        return self.skip_reason is None and self.report_file is not None
+
+    @property
+    def completed(self) -> bool:
+        """Проект разложен этим запуском (или раньше, по журналу) без ошибок."""
+
+        if self.failed or self.issues:
+            return False
+        return self.skip_reason is None or self.skip_reason == "resumed_complete"
+
+    @property
+    def gst_folder(self) -> str | None:
+        """Выбранная папка рабочей недели 04_TRA_GST."""
+
+        for item in self.copies:
+            if item.action == TransferAction.COPY_GST:
+                return item.metadata.get("gst_folder")
+        return None
+
+    def copy_for(self, action: TransferAction) -> PlannedCopy | None:
+        """Вернуть цель копирования для действия."""
+
+        for item in self.copies:
+            if item.action == action:
+                return item
+        return None
+
+    def to_dict(self) -> dict[str, Any]:
+        """Подготовить сериализуемое представление."""
+
+        event = self.destination_event
+        return {
+            "source_path": _path(self.source_path),
+            "project_path": _path(self.project_path),
+            "report_file": _path(self.report_file),
+            "skip_reason": self.skip_reason,
+            "attributes": dict(self.attributes),
+            "gst_folder": self.gst_folder,
+            "destination_event": (
+                {"event": event[0], "path": _path(event[1])} if event else None
+            ),
+            "renames": [item.to_dict() for item in self.renames],
+            "copies": [item.to_dict() for item in self.copies],
+            "archive": self.archive.to_dict() if self.archive else None,
+            "directories": [_path(item) for item in self.directories],
+            "issues": [item.to_dict() for item in self.issues],
+            "resumed": [item.value for item in self.resumed],
+        }
+
+
+@dataclass(slots=True)
+class DistributionPlan:
+    """План запуска по всем проектам входного каталога."""
+
+    inbox: Path
+    projects: list[ProjectPlan] = field(default_factory=list)
+    created_at: datetime = field(default_factory=datetime.now)
+    planning_seconds: float = 0.0
+    resumed_run_id: str | None = None
+    part_filter: str | None = None
+
+    def directories(self) -> list[Path]:
+        """Уникальные каталоги исполняемых проектов в порядке создания."""
+
+        unique: set[Path] = set()
+        for project in self.projects:
+            if project.executable:
+                unique.update(project.directories)
+        return sorted(unique, key=lambda item: (len(item.parts), item.as_posix()))
+
+    def summary(self) -> dict[str, int]:
+        """Сводные счётчики плана."""
+
+        executable = [item for item in self.projects if item.executable]
+        return {
+            "projects": len(self.projects),
+            "executable": len(executable),
+            "skipped": len(self.projects) - len(executable),
+            "renames": sum(len(item.renames) for item in self.projects),
+            "copies": sum(len(item.copies) for item in executable),
+            "archives": sum(1 for item in executable if item.archive),
+            "directories": len(self.directories()),
+            "issues": sum(len(item.issues) for item in self.projects),
+        }
+
+    def to_dict(self) -> dict[str, Any]:
+        """Подготовить сериализуемое представление."""
+
+        return {
+            "version": PLAN_VERSION,
+            "inbox": _path(self.inbox),
+            "created_at": self.created_at.isoformat(timespec="seconds"),
+            "planning_seconds": round(self.planning_seconds, 3),
+            "resumed_run_id": self.resumed_run_id,
+            "part_filter": self.part_filter,
+            "summary": self.summary(),
+            "directories": [_path(item) for item in self.directories()],
+            "projects": [item.to_dict() for item in self.projects],
+        }
+
+    def to_json(self, indent: int | None = 2) -> str:
+        """Сериализовать план в JSON."""
+
+        return json.dumps(self.to_dict(), ensure_ascii=False, indent=indent)
+
+
+__all__ = [
+    "DistributionPlan",
+    "PLAN_VERSION",
+    "PlanIssue",
+    "PlannedArchive",
+    "PlannedCopy",
+    "PlannedRename",
+    "ProjectPlan",
+]
@@ -16,6 +16,7 @@ class TransferStatus(str, Enum):
 
     SUCCESS = "success"
     ERROR = "error"
+    SKIPPED = "skipped"
 
 
 class TransferAction(str, Enum):
@@ -28,6 +29,11 @@ class TransferAction(str, Enum):
     CREATE_ARCHIVE = "create_archive"
     COPY_ARCHIVE = "copy_archive"
     RENAME = "rename"
+    INBOX_SUMMARY = "inbox_summary"
+
+
+# Служебные записи-сводки: не операции с файлами и не входят в итоги запуска
+SUMMARY_ACTIONS = frozenset({TransferAction.INBOX_SUMMARY})
 
 
 @dataclass(slots=True)
@@ -76,6 +82,7 @@ class TransferLogEntry:
 
 
 __all__ = [
+    "SUMMARY_ACTIONS",
     "TransferAction",
     "TransferLogEntry",
     "TransferStatus",
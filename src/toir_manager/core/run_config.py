@@ -0,0 +1,116 @@
+"""
+Настройки одного запуска и контекст, который передаётся через конвейер.
+"""
+
+from __future__ import annotations
+
+import os
+from dataclasses import dataclass, replace
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from toir_manager.services.archiver import ArchiveStage, CompressionPolicy
+    from toir_manager.services.bandwidth import BandwidthLimiter
+    from toir_manager.services.console import BufferedConsole
+    from toir_manager.services.directory_registry import DirectoryRegistry
+    from toir_manager.services.folder_index import FolderIndex
+    from toir_manager.services.gst_index import GstWeekAllocator, GstWeekIndex
+    from toir_manager.services.io_queues import DestinationQueues
+    from toir_manager.services.log_writer import DispatchLogger
+    from toir_manager.services.retry import CircuitBreakers, RetryPolicy
+
+
+# Небольшой пул процессов архивации по умолчанию: сжатие идёт параллельно
+# копированию PDF, не отнимая все ядра у потоков копирования.
+DEFAULT_ARCHIVE_WORKERS = min(2, os.cpu_count() or 1)
+
+
+@dataclass(frozen=True, slots=True)
+class InboxSource:
+    """Входной каталог запуска и его собственный фильтр части (None — общий)."""
+
+    path: Path
+    part_filter: str | None = None
+
+
+@dataclass(frozen=True, slots=True)
+class RunConfig:
+    """Неизменяемые настройки запуска: пути, флаги целей и режимы.
+
+    Собираются один раз (переменные окружения, затем `ui_paths.json`, затем
+    значения по умолчанию) и дальше только читаются, поэтому один объект
+    безопасно разделяется потоками запуска.
+    """
+
+    inbox_dir: Path
+    notes_dir: Path
+    tra_gst_dir: Path
+    tra_sub_app_dir: Path
+    dest_root_dir: Path
+    cache_dir: Path
+    compression_policy: CompressionPolicy
+    enable_notes: bool = True
+    enable_tra_gst: bool = True
+    enable_tra_sub_app: bool = True
+    enable_dest_root: bool = True
+    part_filter: str = "CS/LP"
+    link_mode: str = "copy"
+    skip_mode: str | None = None
+    workers: int = 1
+    archive_workers: int = DEFAULT_ARCHIVE_WORKERS
+    discovery_max_depth: int | None = None
+    discovery_exclude: tuple[str, ...] = ()
+    inboxes: tuple[InboxSource, ...] = ()
+    leases: bool = False
+    lease_ttl: float = 300.0
+    lease_done_ttl: float = 86400.0
+    lease_batch: int = 0
+    schedule_order: str = "destination"
+    schedule_priority: tuple[tuple[str, str], ...] = ()
+    schedule_queue: int = 0
+    bandwidth: tuple[tuple[str, float], ...] = ()
+    bandwidth_file: Path | None = None
+    retry_policy: RetryPolicy | None = None
+    breaker_threshold: int = 5
+    breaker_cooldown: float = 60.0
+    io_queues: tuple[tuple[str, int], ...] | None = None
+
+    def for_inbox(self, source: InboxSource) -> "RunConfig":
+        """Настройки для обработки одного входного каталога запуска."""
+
+        return replace(
+            self,
+            inbox_dir=source.path,
+            part_filter=source.part_filter or self.part_filter,
+        )
+
+
+@dataclass(slots=True)
+class RunContext:
+    """Состояние одного запуска: настройки, журнал, консоль и кэши каталогов.
+
+    Передаётся через конвейер явно; у разных запусков в одном процессе
+    свои контексты и ничего общего, кроме кэша справочника TZ. Вывод идёт
+    через `console` (None — прямо в `sys.stdout`).
+    """
+
+    config: RunConfig
+    logger: DispatchLogger | None = None
+    directories: DirectoryRegistry | None = None
+    gst_index: GstWeekIndex | None = None
+    gst_allocator: GstWeekAllocator | None = None
+    folders: FolderIndex | None = None
+    archive_stage: ArchiveStage | None = None
+    bandwidth: BandwidthLimiter | None = None
+    breakers: CircuitBreakers | None = None
+    io_queues: DestinationQueues | None = None
+    console: BufferedConsole | None = None
+
+
+__all__ = [
+    "DEFAULT_ARCHIVE_WORKERS",
+    "InboxSource",
+    "RunConfig",
+    "RunContext",
+]
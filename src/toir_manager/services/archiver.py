@@ -0,0 +1,373 @@
+"""
+Отдельная стадия архивации проектов на пуле процессов.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import hashlib
+import os
+import threading
+import time
+import zipfile
+import zlib
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import BinaryIO, Callable
+
+from toir_manager.services.retry import RetryPolicy, call_with_retry
+
+PARTIAL_SUFFIX = ".partial"
+FINGERPRINT_PREFIX = b"toir-fingerprint:"
+
+# Форматы, которые уже сжаты внутри: повторный deflate почти ничего не даёт.
+DEFAULT_STORED_EXTENSIONS = frozenset(
+    {
+        ".pdf",
+        ".zip",
+        ".7z",
+        ".rar",
+        ".gz",
+        ".bz2",
+        ".xz",
+        ".jpg",
+        ".jpeg",
+        ".png",
+        ".gif",
+        ".webp",
+        ".heic",
+        ".mp3",
+        ".mp4",
+        ".mov",
+        ".avi",
+        ".docx",
+        ".xlsx",
+        ".pptx",
+        ".odt",
+        ".ods",
+        ".dwg",
+        ".dwfx",
+        ".rvt",
+    }
+)
+
+
+@dataclass(frozen=True, slots=True)
+class CompressionPolicy:
+    """Правила сжатия файлов проекта в Native-архиве.
+
+    Уровень из `extension_levels` применяется как задан, даже для
+    расширения из `stored_extensions`. Остальные файлы с расширением из
+    `stored_extensions` кладутся без сжатия, прочие сжимаются с
+    `default_level`. Если `sample_size` > 0 (по умолчанию проба выключена),
+    начало такого файла пробно сжимается, и при выигрыше меньше
+    `1 - sample_min_ratio` файл тоже сохраняется как есть.
+    """
+
+    default_level: int = 6
+    stored_extensions: frozenset[str] = DEFAULT_STORED_EXTENSIONS
+    extension_levels: dict[str, int] = field(default_factory=dict)
+    sample_size: int = 0
+    sample_min_ratio: float = 0.95
+
+    def choose(self, path: Path) -> tuple[int, int | None]:
+        """Вернуть (compress_type, compresslevel) для файла."""
+
+        suffix = path.suffix.lower()
+        level = self.extension_levels.get(suffix)
+        if level is None:
+            if suffix in self.stored_extensions:
+                return zipfile.ZIP_STORED, None
+            level = self.default_level
+            if self.sample_size > 0 and level > 0 and not self._sample_compresses(path):
+                return zipfile.ZIP_STORED, None
+        if level <= 0:
+            return zipfile.ZIP_STORED, None
+        return zipfile.ZIP_DEFLATED, min(level, 9)
+
+    def _sample_compresses(self, path: Path) -> bool:
+        """Пробно сжать начало файла самым быстрым уровнем."""
+
+        try:
+            with path.open("rb") as handler:
+                sample = handler.read(self.sample_size)
+        except OSError:
+            return True
+        if len(sample) < 512:
+            return True
+        compressed = zlib.compress(sample, 1)
+        return len(compressed) / len(sample) < self.sample_min_ratio
+
+
+@dataclass(slots=True)
+class ArchiveResult:
+    """Итог архивации одного проекта."""
+
+    path: Path
+    original_bytes: int = 0
+    compressed_bytes: int = 0
+    seconds: float = 0.0
+    stored_files: int = 0
+    deflated_files: int = 0
+    skipped: bool = False
+    attempts: int = 1
+
+    @property
+    def ratio(self) -> float:
+        """Доля сжатого объёма от исходного (1.0 — без выигрыша)."""
+
+        if not self.original_bytes:
+            return 1.0
+        return self.compressed_bytes / self.original_bytes
+
+
+ArchiveCallback = Callable[[ArchiveResult | None, BaseException | None], None]
+
+
+def partial_path_for(target: Path) -> Path:
+    """Имя, под которым архив пишется до переименования в итоговое."""
+
+    return target.with_name(target.name + PARTIAL_SUFFIX)
+
+
+def project_fingerprint(root: Path) -> str:
+    """Отпечаток дерева проекта по именам, размерам и mtime (без чтения файлов)."""
+
+    digest = hashlib.blake2b(digest_size=20)
+    for current, dirnames, filenames in os.walk(root):
+        dirnames.sort()
+        current_path = Path(current)
+        relative_dir = current_path.relative_to(root)
+        digest.update(f"D{relative_dir.as_posix()}\n".encode("utf-8"))
+        for filename in sorted(filenames):
+            stat = (current_path / filename).stat()
+            digest.update(
+                f"F{(relative_dir / filename).as_posix()}\0{stat.st_size}\0"
+                f"{stat.st_mtime_ns}\n".encode("utf-8")
+            )
+    return digest.hexdigest()
+
+
+def read_archive_fingerprint(path: Path) -> str | None:
+    """Прочитать отпечаток проекта из комментария zip (читается только хвост файла)."""
+
+    try:
+        with zipfile.ZipFile(path) as archive:
+            comment = archive.comment
+    except (OSError, zipfile.BadZipFile):
+        return None
+    if not comment.startswith(FINGERPRINT_PREFIX):
+        return None
+    return comment[len(FINGERPRINT_PREFIX) :].decode("ascii", errors="replace")
+
+
+class _ThrottledWriter:
+    """Файл архива, сообщающий ограничителю скорости о каждой записи."""
+
+    def __init__(self, handle: BinaryIO, throttle: Callable[[int], None]) -> None:
+        self._handle = handle
+        self._throttle = throttle
+
+    def write(self, data: bytes) -> int:
+        written = self._handle.write(data)
+        self._throttle(len(data))
+        return written
+
+    def __getattr__(self, name: str):
+        return getattr(self._handle, name)
+
+
+def write_zip_archive(
+    root_dir: str,
+    target: str,
+    policy: CompressionPolicy | None = None,
+    skip_identical: bool = False,
+    throttle: Callable[[int], None] | None = None,
+) -> ArchiveResult:
+    """Упаковать каталог прямо в каталог назначения (выполняется в дочернем процессе).
+
+    Архив пишется в `<target>.partial` рядом с итоговым файлом и атомарно
+    переименовывается по завершении, поэтому под итоговым именем никогда не
+    оказывается недописанный zip. Структура записей совпадает с
+    `shutil.make_archive(..., "zip", root_dir)`; способ сжатия каждого
+    файла выбирает `policy`.
+
+    В комментарий архива записывается отпечаток дерева проекта; при
+    `skip_identical` архив с тем же отпечатком не пересобирается.
+    `throttle` вызывается с числом байт после каждой записи в архив.
+    """
+
+    policy = policy or CompressionPolicy()
+    root = Path(root_dir)
+    target_path = Path(target)
+    partial = partial_path_for(target_path)
+    if not root.is_dir():
+        raise FileNotFoundError(f"Каталог проекта не найден: {root}")
+    result = ArchiveResult(path=target_path)
+    started = time.perf_counter()
+    fingerprint = project_fingerprint(root)
+    if skip_identical and read_archive_fingerprint(target_path) == fingerprint:
+        result.skipped = True
+        result.seconds = time.perf_counter() - started
+        return result
+    try:
+        with contextlib.ExitStack() as stack:
+            output: str | Path | _ThrottledWriter = partial
+            if throttle is not None:
+                handle = stack.enter_context(partial.open("wb"))
+                output = _ThrottledWriter(handle, throttle)
+            archive = stack.enter_context(
+                zipfile.ZipFile(output, "w", compression=zipfile.ZIP_DEFLATED)
+            )
+            archive.comment = FINGERPRINT_PREFIX + fingerprint.encode("ascii")
+            for current, dirnames, filenames in os.walk(root):
+                dirnames.sort()
+                current_path = Path(current)
+                relative_dir = current_path.relative_to(root)
+                if relative_dir.parts:
+                    archive.write(current_path, relative_dir.as_posix() + "/")
+                for filename in sorted(filenames):
+                    file_path = current_path / filename
+                    if file_path == partial:
+                        continue
+                    compress_type, level = policy.choose(file_path)
+                    archive.write(
+                        file_path,
+                        (relative_dir / filename).as_posix(),
+                        compress_type=compress_type,
+                        compresslevel=level,
+                    )
+                    if compress_type == zipfile.ZIP_STORED:
+                        result.stored_files += 1
+                    else:
+                        result.deflated_files += 1
+            for info in archive.infolist():
+                result.original_bytes += info.file_size
+                result.compressed_bytes += info.compress_size
+        os.replace(partial, target_path)
+    except BaseException:
+        try:
+            partial.unlink()
+        except OSError:
+            pass
+        raise
+    result.seconds = time.perf_counter() - started
+    return result
+
+
+def write_zip_archive_with_retry(
+    retry: RetryPolicy,
+    root_dir: str,
+    target: str,
+    policy: CompressionPolicy | None = None,
+    skip_identical: bool = False,
+    throttle: Callable[[int], None] | None = None,
+) -> ArchiveResult:
+    """`write_zip_archive` с повтором при временных сбоях записи.
+
+    Число попыток сохраняется в `ArchiveResult.attempts`.
+    """
+
+    result, attempts = call_with_retry(
+        lambda: write_zip_archive(root_dir, target, policy, skip_identical, throttle),
+        retry,
+    )
+    result.attempts = attempts
+    return result
+
+
+class ArchiveStage:
+    """Сжимает архивы в пуле процессов и завершает их в отдельном потоке.
+
+    Колбэк `on_done` вызывается в потоке-финализаторе по мере готовности
+    каждого архива, поэтому журналирование готовых архивов не блокирует
+    ни пул процессов, ни рабочие потоки проектов.
+    """
+
+    def __init__(
+        self,
+        max_workers: int | None = None,
+        executor: Executor | None = None,
+        policy: CompressionPolicy | None = None,
+        retry: RetryPolicy | None = None,
+    ) -> None:
+        self._policy = policy or CompressionPolicy()
+        self._retry = retry or RetryPolicy(max_attempts=1)
+        self._executor = executor or ProcessPoolExecutor(max_workers=max_workers)
+        self._finisher = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="toir-archive"
+        )
+        self._lock = threading.Lock()
+        self._pending: list[Future] = []
+        self._closed = False
+
+    def submit(
+        self,
+        project_path: Path,
+        archive_path: Path,
+        on_done: ArchiveCallback,
+        skip_identical: bool = False,
+        throttle: Callable[[int], None] | None = None,
+    ) -> Future:
+        """Поставить проект в очередь на архивацию в `archive_path`.
+
+        `throttle` передаётся в дочерний процесс, поэтому должен сериализоваться
+        pickle (например, `ProcessThrottle`).
+        """
+
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("Стадия архивации уже закрыта")
+            future = self._executor.submit(
+                write_zip_archive_with_retry,
+                self._retry,
+                str(project_path),
+                str(archive_path),
+                self._policy,
+                skip_identical,
+                throttle,
+            )
+            done = Future()  # type: Future[None]
+            self._pending.append(done)
+
+        def _finish() -> None:
+            try:
+                error = future.exception()
+                on_done(None if error else future.result(), error)
+            finally:
+                done.set_result(None)
+
+        future.add_done_callback(lambda _f: self._finisher.submit(_finish))
+        return done
+
+    def close(self) -> None:
+        """Дождаться всех архивов и завершить пулы."""
+
+        with self._lock:
+            self._closed = True
+            pending = list(self._pending)
+        for done in pending:
+            done.result()
+        self._executor.shutdown(wait=True)
+        self._finisher.shutdown(wait=True)
+
+    def __enter__(self) -> "ArchiveStage":
+        return self
+
+    def __exit__(self, *_exc: object) -> None:
+        self.close()
+
+
+__all__ = [
+    "ArchiveResult",
+    "ArchiveStage",
+    "CompressionPolicy",
+    "DEFAULT_STORED_EXTENSIONS",
+    "PARTIAL_SUFFIX",
+    "partial_path_for",
+    "project_fingerprint",
+    "read_archive_fingerprint",
+    "write_zip_archive",
+    "write_zip_archive_with_retry",
+]
@@ -0,0 +1,368 @@
+"""
+Ограничение скорости записи в каталоги назначения (token bucket).
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Mapping
+
+from toir_manager.services.destination_roots import DestinationRoots
+
+BANDWIDTH_ROOTS = ("NOTES", "TRA_GST", "TRA_SUB_APP", "DEST_ROOT")
+ALL_ROOTS = "*"
+DEFAULT_POLL_INTERVAL = 2.0
+MEGABYTE = 1024 * 1024
+
+
+def parse_limits(raw: str) -> dict[str, float]:
+    """Разобрать лимиты `КОРЕНЬ=МБ/с` через `,`/`;` (`*` — для всех корней).
+
+    Нераспознанные правила пропускаются с предупреждением; 0 — без лимита.
+    """
+
+    limits: dict[str, float] = {}
+    for item in raw.replace(";", ",").split(","):
+        item = item.strip()
+        if not item:
+            continue
+        name, _, value = item.partition("=")
+        name = name.strip().upper()
+        try:
+            rate = max(0.0, float(value))
+        except ValueError:
+            rate = -1.0
+        if rate < 0 or (name != ALL_ROOTS and name not in BANDWIDTH_ROOTS):
+            print(f"[WARN] Пропущено правило TOIR_BANDWIDTH: {item}")
+            continue
+        limits[name] = rate
+    return limits
+
+
+def read_control_file(path: Path) -> dict[str, float] | None:
+    """Прочитать лимиты из JSON-файла управления; None — файла нет или он битый."""
+
+    try:
+        payload = json.loads(Path(path).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+    if not isinstance(payload, dict):
+        return None
+    limits: dict[str, float] = {}
+    for name, value in payload.items():
+        key = str(name).strip().upper()
+        if key != ALL_ROOTS and key not in BANDWIDTH_ROOTS:
+            continue
+        try:
+            limits[key] = max(0.0, float(value or 0))
+        except (TypeError, ValueError):
+            continue
+    return limits
+
+
+def _resolve(limits: Mapping[str, float], key: str) -> float:
+    """Лимит корня: собственный, иначе общий `*`, иначе без лимита."""
+
+    return limits.get(key, limits.get(ALL_ROOTS, 0.0))
+
+
+class TokenBucket:
+    """Ведро токенов: не больше `rate` байт в секунду с запасом `burst`.
+
+    Запись, превысившая запас, уходит «в долг», и поток ждёт, пока долг
+    погасится. Долг общий для всех потоков, поэтому суммарная скорость не
+    превышает `rate` при любом числе писателей. `rate <= 0` — без лимита.
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        burst: float | None = None,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ) -> None:
+        self._clock = clock
+        self._sleep = sleep
+        self._lock = threading.Lock()
+        self._burst = burst
+        self.rate = 0.0
+        self._tokens = 0.0
+        self._updated = clock()
+        self.set_rate(rate)
+
+    def _capacity(self) -> float:
+        return self._burst if self._burst is not None else self.rate
+
+    def set_rate(self, rate: float) -> None:
+        """Сменить скорость на ходу; накопленный долг сохраняется."""
+
+        with self._lock:
+            self._refill()
+            self.rate = max(0.0, rate)
+            self._tokens = min(self._tokens, self._capacity())
+
+    def _refill(self) -> None:
+        now = self._clock()
+        if self.rate > 0:
+            self._tokens = min(
+                self._capacity(), self._tokens + (now - self._updated) * self.rate
+            )
+        self._updated = now
+
+    def consume(self, amount: int) -> float:
+        """Списать `amount` байт; возвращает время ожидания в секундах."""
+
+        with self._lock:
+            if self.rate <= 0:
+                return 0.0
+            self._refill()
+            self._tokens -= amount
+            delay = -self._tokens / self.rate if self._tokens < 0 else 0.0
+        if delay > 0:
+            self._sleep(delay)
+        return delay
+
+
+@dataclass(slots=True)
+class RootThroughput:
+    """Сколько записано в корень назначения и сколько ждали ограничителя."""
+
+    root: str
+    bytes_written: int = 0
+    waited: float = 0.0
+    limit: float = 0.0
+
+    def rate(self, seconds: float) -> float:
+        """Средняя скорость записи, МБ/с, за `seconds` секунд."""
+
+        if seconds <= 0:
+            return 0.0
+        return self.bytes_written / MEGABYTE / seconds
+
+
+class BandwidthLimiter:
+    """Ограничитель записи по корням назначения NOTES, TRA_GST, TRA_SUB_APP, DEST_ROOT.
+
+    Корень цели определяется по самому длинному совпадающему пути из
+    `roots`; записи вне корней не ограничиваются. Лимиты (МБ/с) берутся из
+    `limits`, а если задан `control_file` — поверх них из JSON-файла
+    `{"DEST_ROOT": 20, "*": 50}`, который перечитывается при изменении не
+    чаще раза в `poll_interval` секунд: так лимит меняется во время запуска.
+    """
+
+    def __init__(
+        self,
+        roots: Mapping[str, Path],
+        limits: Mapping[str, float] | None = None,
+        control_file: Path | None = None,
+        poll_interval: float = DEFAULT_POLL_INTERVAL,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ) -> None:
+        self._roots = DestinationRoots(roots)
+        self._base = dict(limits or {})
+        self.control_file = Path(control_file) if control_file else None
+        self.poll_interval = poll_interval
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._shares: dict[str, int] = {}
+        self._buckets = {
+            key: TokenBucket(0.0, clock=clock, sleep=sleep) for key in BANDWIDTH_ROOTS
+        }
+        self._stats = {key: RootThroughput(key) for key in BANDWIDTH_ROOTS}
+        self._limits: dict[str, float] = {}
+        self._control_mtime: tuple[int, int] | None = None
+        self._checked = clock()
+        self._apply(self._base)
+        self.reload()
+
+    def _apply(self, limits: Mapping[str, float]) -> None:
+        self._limits = dict(limits)
+        for key, bucket in self._buckets.items():
+            limit = _resolve(limits, key)
+            self._stats[key].limit = limit
+            bucket.set_rate(limit * MEGABYTE / self._shares.get(key, 1))
+
+    @property
+    def enabled(self) -> bool:
+        """Задан ли хотя бы один лимит или файл управления."""
+
+        return self.control_file is not None or any(self._limits.values())
+
+    def limit(self, root: str) -> float:
+        """Текущий лимит корня, МБ/с (0 — без лимита)."""
+
+        return _resolve(self._limits, root)
+
+    def root_for(self, path: Path) -> str | None:
+        """Корень назначения, в который попадает путь."""
+
+        return self._roots.root_for(path)
+
+    def reload(self) -> bool:
+        """Перечитать файл управления, если он изменился; True — лимиты обновлены."""
+
+        if self.control_file is None:
+            return False
+        try:
+            stat = self.control_file.stat()
+            mtime: tuple[int, int] | None = (stat.st_mtime_ns, stat.st_size)
+        except OSError:
+            mtime = None
+        with self._lock:
+            self._checked = self._clock()
+            if mtime == self._control_mtime:
+                return False
+            self._control_mtime = mtime
+            override = (
+                read_control_file(self.control_file) if mtime is not None else None
+            )
+            self._apply({**self._base, **(override or {})})
+        return True
+
+    def _poll(self) -> None:
+        if self.control_file is None:
+            return
+        if self._clock() - self._checked >= self.poll_interval:
+            self.reload()
+
+    def throttle(self, path: Path, amount: int) -> None:
+        """Учесть запись `amount` байт в `path`, при необходимости подождав."""
+
+        key = self.root_for(path)
+        if key is None:
+            return
+        self._poll()
+        waited = self._buckets[key].consume(amount)
+        with self._lock:
+            stats = self._stats[key]
+            stats.bytes_written += amount
+            stats.waited += waited
+
+    def record(self, path: Path, amount: int) -> None:
+        """Учесть байты, записанные в обход ограничителя этого процесса."""
+
+        key = self.root_for(path)
+        if key is None:
+            return
+        with self._lock:
+            self._stats[key].bytes_written += amount
+
+    def for_target(self, path: Path) -> Callable[[int], None]:
+        """Колбэк ограничения записи в один целевой файл."""
+
+        return lambda amount: self.throttle(path, amount)
+
+    def process_throttle(self, path: Path, processes: int) -> ProcessThrottle | None:
+        """Доля лимита корня `path` для каждого из `processes` дочерних процессов.
+
+        Лимит корня делится поровну между этим процессом и дочерними, чтобы
+        их суммарная скорость не превышала лимит. None — корень без лимита
+        и без файла управления.
+        """
+
+        key = self.root_for(path)
+        if key is None or processes <= 0 or not self.enabled:
+            return None
+        with self._lock:
+            self._shares[key] = processes + 1
+            self._apply(self._limits)
+        return ProcessThrottle(
+            root=key,
+            limit=_resolve(self._base, key),
+            share=processes + 1,
+            control_file=str(self.control_file) if self.control_file else None,
+            poll_interval=self.poll_interval,
+        )
+
+    def release_share(self, path: Path) -> None:
+        """Вернуть этому процессу весь лимит корня после остановки дочерних."""
+
+        key = self.root_for(path)
+        if key is None:
+            return
+        with self._lock:
+            self._shares.pop(key, None)
+            self._apply(self._limits)
+
+    def snapshot(self) -> dict[str, RootThroughput]:
+        """Копия счётчиков по корням."""
+
+        with self._lock:
+            return {
+                key: RootThroughput(key, item.bytes_written, item.waited, item.limit)
+                for key, item in self._stats.items()
+            }
+
+
+@dataclass(slots=True)
+class ProcessThrottle:
+    """Ограничитель для дочернего процесса архивации (передаётся через pickle).
+
+    Ведро создаётся в дочернем процессе при первой записи; файл управления
+    опрашивается так же, как в основном процессе.
+    """
+
+    root: str
+    limit: float
+    share: int
+    control_file: str | None = None
+    poll_interval: float = DEFAULT_POLL_INTERVAL
+    _bucket: TokenBucket | None = field(default=None, repr=False)
+    _checked: float = 0.0
+    _mtime: tuple[int, int] | None = None
+
+    def _rate(self) -> float:
+        limit = self.limit
+        if self.control_file is not None:
+            override = read_control_file(Path(self.control_file))
+            if override:
+                limit = override.get(self.root, override.get(ALL_ROOTS, limit))
+        return limit * MEGABYTE / self.share
+
+    def _poll(self, bucket: TokenBucket) -> None:
+        now = time.monotonic()
+        if self.control_file is None or now - self._checked < self.poll_interval:
+            return
+        self._checked = now
+        try:
+            stat = os.stat(self.control_file)
+            mtime: tuple[int, int] | None = (stat.st_mtime_ns, stat.st_size)
+        except OSError:
+            mtime = None
+        if mtime != self._mtime:
+            self._mtime = mtime
+            bucket.set_rate(self._rate())
+
+    def __getstate__(self) -> tuple:
+        return (self.root, self.limit, self.share, self.control_file, self.poll_interval)
+
+    def __setstate__(self, state: tuple) -> None:
+        self.root, self.limit, self.share, self.control_file, self.poll_interval = state
+        self._bucket = None
+        self._checked = 0.0
+        self._mtime = None
+
+    def __call__(self, amount: int) -> None:
+        if self._bucket is None:
+            self._bucket = TokenBucket(self._rate())
+            self._checked = time.monotonic()
+        self._poll(self._bucket)
+        self._bucket.consume(amount)
+
+
+__all__ = [
+    "ALL_ROOTS",
+    "BANDWIDTH_ROOTS",
+    "BandwidthLimiter",
+    "ProcessThrottle",
+    "RootThroughput",
+    "TokenBucket",
+    "parse_limits",
+    "read_control_file",
+]
@@ -0,0 +1,86 @@
+"""
+Буферизация консольного вывода для параллельной обработки проектов.
+"""
+
+from __future__ import annotations
+
+import io
+import sys
+import threading
+from contextlib import contextmanager
+from typing import Iterator, TextIO
+
+
+class BufferedConsole(io.TextIOBase):
+    """Консоль запуска: внутри `capture()` пишет в буфер потока, иначе — напрямую.
+
+    Передаётся через `RunContext` и в `print(file=...)`, а не подменяет
+    `sys.stdout`, поэтому у одновременных запусков в одном процессе свои
+    буферы. Без `target` пишет в текущий `sys.stdout`.
+    """
+
+    def __init__(self, target: TextIO | None = None) -> None:
+        self._target = target
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    @property
+    def target(self) -> TextIO:
+        """Исходный поток вывода."""
+
+        return self._target if self._target is not None else sys.stdout
+
+    @property
+    def encoding(self) -> str:  # type: ignore[override]
+        """Кодировка исходного потока."""
+
+        return getattr(self.target, "encoding", "utf-8") or "utf-8"
+
+    def writable(self) -> bool:
+        """Поток всегда доступен для записи."""
+
+        return True
+
+    def write(self, text: str) -> int:  # type: ignore[override]
+        """Записать текст в буфер текущего потока или в исходный поток."""
+
+        buffer: io.StringIO | None = getattr(self._local, "buffer", None)
+        if buffer is not None:
+            return buffer.write(text)
+        with self._lock:
+            return self.target.write(text)
+
+    def flush(self) -> None:
+        """Сбросить исходный поток (буферы потоков сбрасываются в `capture`)."""
+
+        with self._lock:
+            self.target.flush()
+
+    @contextmanager
+    def capture(self, emit: bool = True) -> Iterator[io.StringIO]:
+        """Собрать вывод текущего потока и напечатать его одним блоком.
+
+        При `emit=False` вывод остаётся только в возвращённом буфере: его
+        печатает вызывающий (например, поток проекта после ответа очередей).
+        """
+
+        buffer = io.StringIO()
+        previous = getattr(self._local, "buffer", None)
+        self._local.buffer = buffer
+        try:
+            yield buffer
+        finally:
+            self._local.buffer = previous
+            payload = buffer.getvalue()
+            if payload and emit:
+                if previous is not None:
+                    previous.write(payload)
+                else:
+                    with self._lock:
+                        self.target.write(payload)
+                        self.target.flush()
+
+
+__all__ = [
+    "BufferedConsole",
+]
@@ -0,0 +1,43 @@
+"""
+Корни назначения запуска: к какому из них относится путь цели.
+"""
+
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Mapping
+
+
+class DestinationRoots:
+    """Именованные корни назначения (NOTES, TRA_GST, TRA_SUB_APP, DEST_ROOT).
+
+    Путь относится к самому глубокому корню, внутри которого лежит, — так
+    вложенные корни (например, NOTES внутри DEST_ROOT) различаются.
+    """
+
+    def __init__(self, roots: Mapping[str, Path]) -> None:
+        self._roots = sorted(
+            ((key, Path(path)) for key, path in roots.items()),
+            key=lambda item: len(item[1].parts),
+            reverse=True,
+        )
+
+    @property
+    def names(self) -> list[str]:
+        """Имена корней."""
+
+        return [key for key, _path in self._roots]
+
+    def root_for(self, path: Path) -> str | None:
+        """Корень назначения, в который попадает путь; None — вне корней."""
+
+        path = Path(path)
+        for key, root in self._roots:
+            if path == root or root in path.parents:
+                return key
+        return None
+
+
+__all__ = [
+    "DestinationRoots",
+]
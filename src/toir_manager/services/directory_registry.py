@@ -0,0 +1,115 @@
+"""
+Реестр каталогов, уже существующих или созданных за время запуска.
+"""
+
+from __future__ import annotations
+
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+
+
+@dataclass(slots=True)
+class DirectoryStats:
+    """Счётчики обращений к реестру каталогов."""
+
+    requests: int = 0
+    hits: int = 0
+    mkdir_calls: int = 0
+    stat_calls: int = 0
+
+    @property
+    def avoided(self) -> int:
+        """Сколько обращений к файловой системе сэкономлено ответами из памяти."""
+
+        return self.hits
+
+
+class DirectoryRegistry:
+    """Помнит каталоги, существование которых уже подтверждено в этом запуске.
+
+    `ensure()` создаёт каталог только при первом запросе; повторные запросы
+    того же каталога и проверки `exists()` отвечаются из памяти. Вместе с
+    каталогом запоминаются все его родители, поэтому для дочерних каталогов
+    известного родителя не выполняется обход `parents=True`. Каталоги,
+    удалённые извне во время запуска, реестр не замечает — он рассчитан на
+    один проход конвейера.
+    """
+
+    def __init__(self) -> None:
+        self._known: set[Path] = set()
+        self._lock = threading.Lock()
+        self._stats = DirectoryStats()
+
+    @property
+    def stats(self) -> DirectoryStats:
+        """Снимок счётчиков."""
+
+        with self._lock:
+            return DirectoryStats(
+                requests=self._stats.requests,
+                hits=self._stats.hits,
+                mkdir_calls=self._stats.mkdir_calls,
+                stat_calls=self._stats.stat_calls,
+            )
+
+    def _remember(self, path: Path) -> None:
+        """Запомнить каталог и всех его родителей (вызывается под блокировкой)."""
+
+        for item in (path, *path.parents):
+            if item in self._known:
+                break
+            self._known.add(item)
+
+    def is_known(self, path: Path) -> bool:
+        """Каталог уже подтверждён в этом запуске."""
+
+        with self._lock:
+            return Path(path) in self._known
+
+    def mark(self, path: Path) -> None:
+        """Отметить каталог как существующий (например, созданный в обход реестра)."""
+
+        with self._lock:
+            self._remember(Path(path))
+
+    def exists(self, path: Path) -> bool:
+        """Проверить, что каталог существует; положительный ответ кешируется."""
+
+        path = Path(path)
+        with self._lock:
+            self._stats.requests += 1
+            if path in self._known:
+                self._stats.hits += 1
+                return True
+            self._stats.stat_calls += 1
+        if not path.is_dir():
+            return False
+        with self._lock:
+            self._remember(path)
+        return True
+
+    def ensure(self, path: Path) -> None:
+        """Создать каталог, если он ещё не подтверждён в этом запуске."""
+
+        path = Path(path)
+        with self._lock:
+            self._stats.requests += 1
+            if path in self._known:
+                self._stats.hits += 1
+                return
+            parent_known = path.parent in self._known
+            self._stats.mkdir_calls += 1
+        try:
+            path.mkdir(parents=not parent_known, exist_ok=True)
+        except FileNotFoundError:
+            # Родителя удалили извне: создаём цепочку целиком.
+            path.mkdir(parents=True, exist_ok=True)
+        with self._lock:
+            self._remember(path)
+
+
+__all__ = [
+    "DirectoryRegistry",
+    "DirectoryStats",
+]
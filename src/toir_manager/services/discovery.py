@@ -0,0 +1,107 @@
+"""
+Поиск папок проектов во входном каталоге одним обходом `os.scandir`.
+"""
+
+from __future__ import annotations
+
+import fnmatch
+import os
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Sequence
+
+from toir_manager.services.leases import LEASE_DIR_NAME
+
+ALL_FILE_PATTERN = "*_All*.[pP][dD][fF]"
+# Служебные каталоги конвейера внутри INBOX: не проекты и не просматриваются
+SERVICE_DIR_NAMES = frozenset({LEASE_DIR_NAME})
+
+
+@dataclass(slots=True)
+class DiscoveredProject:
+    """Папка проекта и найденные в ней файлы `_All` (None — не собраны)."""
+
+    path: Path
+    candidates: list[Path] | None = None
+
+
+@dataclass(slots=True)
+class DiscoveryStats:
+    """Счётчики одного обхода."""
+
+    directories: int = 0
+    excluded: int = 0
+    depth_limited: int = 0
+
+
+def _is_excluded(name: str, relative: str, patterns: Sequence[str]) -> bool:
+    """Подпадает ли каталог под шаблон исключения (по имени или пути от корня)."""
+
+    for pattern in patterns:
+        subject = relative if "/" in pattern else name
+        if fnmatch.fnmatch(subject, pattern):
+            return True
+    return False
+
+
+def discover_projects(
+    root: Path,
+    max_depth: int | None = None,
+    exclude: Sequence[str] = (),
+    stats: DiscoveryStats | None = None,
+) -> list[DiscoveredProject]:
+    """Найти каталоги с файлами `_All` и собрать эти файлы за один обход.
+
+    Глубина считается от `root` (0 — сам входной каталог, 1 — его папки);
+    каталоги глубже `max_depth` не читаются. Каталоги, имя которых (или путь
+    от корня, если в шаблоне есть `/`) подходит под один из шаблонов
+    `exclude`, пропускаются вместе с содержимым. Символические ссылки на
+    каталоги не раскрываются, недоступные каталоги пропускаются — как и у
+    `Path.rglob`. Сопоставление имён повторяет `glob` (`fnmatch`).
+    """
+
+    root = Path(root)
+    stats = stats if stats is not None else DiscoveryStats()
+    projects: list[DiscoveredProject] = []
+    stack: list[tuple[Path, str, int]] = [(root, "", 0)]
+    while stack:
+        directory, relative, depth = stack.pop()
+        stats.directories += 1
+        candidates: list[Path] = []
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            if entry.name in SERVICE_DIR_NAMES:
+                                continue
+                            child_relative = (
+                                f"{relative}/{entry.name}" if relative else entry.name
+                            )
+                            if _is_excluded(entry.name, child_relative, exclude):
+                                stats.excluded += 1
+                            elif max_depth is not None and depth + 1 > max_depth:
+                                stats.depth_limited += 1
+                            else:
+                                stack.append(
+                                    (Path(entry.path), child_relative, depth + 1)
+                                )
+                        elif fnmatch.fnmatch(entry.name, ALL_FILE_PATTERN) and entry.is_file():
+                            candidates.append(Path(entry.path))
+                    except OSError:
+                        continue
+        except OSError:
+            continue
+        if candidates:
+            projects.append(DiscoveredProject(path=directory, candidates=candidates))
+    projects.sort(key=lambda item: item.path.as_posix().lower())
+    return projects
+
+
+__all__ = [
+    "ALL_FILE_PATTERN",
+    "DiscoveredProject",
+    "DiscoveryStats",
+    "SERVICE_DIR_NAMES",
+    "discover_projects",
+]
@@ -0,0 +1,155 @@
+"""
+Межпроцессная блокировка файлом на общем (в том числе сетевом) диске.
+"""
+
+from __future__ import annotations
+
+import os
+import socket
+import time
+import uuid
+from pathlib import Path
+from typing import Callable
+
+DEFAULT_LOCK_TIMEOUT = 30.0
+DEFAULT_STALE_AFTER = 120.0
+
+
+class FileLock:
+    """Блокировка созданием файла с `O_CREAT | O_EXCL`.
+
+    Работает между процессами и машинами, у которых общий каталог, и не
+    зависит от `fcntl`/`msvcrt`, которые на SMB ведут себя по-разному. Файл
+    хранит имя машины, PID, срок действия (`stale_after` секунд от взятия) и
+    токен владельца. Просроченную блокировку (владелец упал, не сняв её)
+    ожидающий переименовывает в уникальное имя и сверяет токен: если за это
+    время блокировку уже перехватил другой, файл возвращается на место.
+    Срок сравнивается по часам машин, поэтому часы должны быть
+    синхронизированы. Если блокировку не удалось взять за `timeout` секунд,
+    поднимается `TimeoutError`.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        timeout: float = DEFAULT_LOCK_TIMEOUT,
+        stale_after: float = DEFAULT_STALE_AFTER,
+        poll_interval: float = 0.05,
+        clock: Callable[[], float] = time.time,
+        sleep: Callable[[float], None] = time.sleep,
+    ) -> None:
+        self.path = Path(path)
+        self.timeout = timeout
+        self.stale_after = stale_after
+        self.poll_interval = poll_interval
+        self._clock = clock
+        self._sleep = sleep
+        self._token: str | None = None
+        self.waited = 0.0
+
+    def _try_create(self, token: str) -> bool:
+        try:
+            descriptor = os.open(self.path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
+            return False
+        expires_at = self._clock() + self.stale_after
+        owner = f"{socket.gethostname()} {os.getpid()} {expires_at:.3f} {token}"
+        try:
+            os.write(descriptor, owner.encode("utf-8"))
+        finally:
+            os.close(descriptor)
+        return True
+
+    @staticmethod
+    def _read(path: Path) -> tuple[str, float] | None:
+        """Токен и срок владельца из файла; None — файл пуст или в старом формате."""
+
+        try:
+            parts = path.read_text(encoding="utf-8").split()
+        except OSError:
+            return None
+        if len(parts) < 4:
+            return None
+        try:
+            return parts[-1], float(parts[-2])
+        except ValueError:
+            return None
+
+    def _expired(self, owner: tuple[str, float] | None) -> bool:
+        if owner is not None:
+            return owner[1] <= self._clock()
+        # Владелец ещё пишет файл или это файл старого формата — судим по mtime
+        try:
+            return self.path.stat().st_mtime + self.stale_after <= self._clock()
+        except FileNotFoundError:
+            return True
+        except OSError:
+            return False
+
+    def _break_stale(self) -> bool:
+        """Убрать блокировку упавшего владельца; True — файл блокировки убран."""
+
+        if not self.path.exists():
+            return True
+        seen = self._read(self.path)
+        if not self._expired(seen):
+            return False
+        stale = self.path.with_name(f"{self.path.name}.{uuid.uuid4().hex}.stale")
+        try:
+            os.rename(self.path, stale)
+        except FileNotFoundError:
+            return True
+        except OSError:
+            return False
+        moved = self._read(stale)
+        seen_token = seen[0] if seen is not None else None
+        moved_token = moved[0] if moved is not None else None
+        if moved_token != seen_token:
+            # Между проверкой и переименованием блокировку взял другой
+            try:
+                os.link(stale, self.path)
+            except OSError:
+                pass
+            stale.unlink(missing_ok=True)
+            return False
+        stale.unlink(missing_ok=True)
+        return True
+
+    def acquire(self) -> None:
+        """Взять блокировку, ожидая не дольше `timeout`."""
+
+        token = uuid.uuid4().hex
+        started = self._clock()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        while not self._try_create(token):
+            if self._break_stale():
+                continue
+            if self._clock() - started >= self.timeout:
+                raise TimeoutError(f"Не удалось взять блокировку {self.path}")
+            self._sleep(self.poll_interval)
+        self._token = token
+        self.waited = self._clock() - started
+
+    def release(self) -> None:
+        """Снять блокировку, если она всё ещё наша."""
+
+        token, self._token = self._token, None
+        if token is None:
+            return
+        owner = self._read(self.path)
+        if owner is not None and owner[0] == token:
+            self.path.unlink(missing_ok=True)
+
+    def __enter__(self) -> "FileLock":
+        self.acquire()
+        return self
+
+    def __exit__(self, *_exc: object) -> None:
+        self.release()
+
+
+__all__ = [
+    "DEFAULT_LOCK_TIMEOUT",
+    "DEFAULT_STALE_AFTER",
+    "FileLock",
+]
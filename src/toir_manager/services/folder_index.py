@@ -0,0 +1,96 @@
+"""
+Индекс содержимого каталогов назначения для поиска папок по префиксу.
+"""
+
+from __future__ import annotations
+
+import bisect
+import os
+import threading
+from pathlib import Path
+
+
+class _Listing:
+    """Отсортированный список имён одного каталога."""
+
+    __slots__ = ("keys", "names")
+
+    def __init__(self, names: list[str]) -> None:
+        pairs = sorted((os.path.normcase(name), name) for name in names)
+        self.keys = [key for key, _ in pairs]
+        self.names = [name for _, name in pairs]
+
+    def insert(self, name: str) -> None:
+        key = os.path.normcase(name)
+        position = bisect.bisect_left(self.keys, key)
+        if position < len(self.keys) and self.keys[position] == key:
+            return
+        self.keys.insert(position, key)
+        self.names.insert(position, name)
+
+    def with_prefix(self, prefix: str) -> list[str]:
+        key = os.path.normcase(prefix)
+        position = bisect.bisect_left(self.keys, key)
+        result: list[str] = []
+        while position < len(self.keys) and self.keys[position].startswith(key):
+            result.append(self.names[position])
+            position += 1
+        return result
+
+
+class FolderIndex:
+    """Однократно читает каталог и отвечает на запросы по префиксу из памяти.
+
+    Порядок совпадает с `sorted(parent.glob(prefix + "*"))`: имена
+    сравниваются с учётом регистра файловой системы (`os.path.normcase`).
+    Каталоги, создаваемые конвейером, добавляются через `add()`, поэтому
+    повторно перечитывать каталог не нужно.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._listings: dict[Path, _Listing] = {}
+        self.listings = 0
+        self.lookups = 0
+
+    def _listing(self, parent: Path) -> _Listing:
+        """Содержимое каталога (читается один раз за запуск)."""
+
+        with self._lock:
+            listing = self._listings.get(parent)
+            if listing is not None:
+                return listing
+        try:
+            with os.scandir(parent) as entries:
+                names = [entry.name for entry in entries]
+        except (FileNotFoundError, NotADirectoryError):
+            names = []
+        with self._lock:
+            listing = self._listings.get(parent)
+            if listing is None:
+                listing = _Listing(names)
+                self._listings[parent] = listing
+                self.listings += 1
+            return listing
+
+    def find_prefix(self, parent: Path, prefix: str) -> list[Path]:
+        """Элементы каталога, имя которых начинается с `prefix`, по порядку."""
+
+        parent = Path(parent)
+        listing = self._listing(parent)
+        with self._lock:
+            self.lookups += 1
+            return [parent / name for name in listing.with_prefix(prefix)]
+
+    def add(self, parent: Path, name: str) -> None:
+        """Учесть папку, созданную (или запланированную) конвейером."""
+
+        parent = Path(parent)
+        listing = self._listing(parent)
+        with self._lock:
+            listing.insert(name)
+
+
+__all__ = [
+    "FolderIndex",
+]
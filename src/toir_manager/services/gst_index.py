@@ -0,0 +1,191 @@
+"""
+Индекс рабочих недель каталога 04_TRA_GST: какие недели заняты архивами.
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator
+
+from toir_manager.services.file_lock import (
+    DEFAULT_LOCK_TIMEOUT,
+    DEFAULT_STALE_AFTER,
+    FileLock,
+)
+
+GST_LOCK_MARKER = "CT-GST-TRA-PRM-"
+GST_ARCHIVE_EXTENSIONS = (".zip", ".7z", ".rar")
+GST_ALLOCATION_LOCK_NAME = ".toir_gst_week.lock"
+
+
+def gst_folder_name(year: str, week: int) -> str:
+    """Имя папки рабочей недели: `<год>_T<неделя>_GST`."""
+
+    return f"{year}_T{week}_GST"
+
+
+class GstWeekIndex:
+    """Кеширует на время запуска состояние папок недель 04_TRA_GST.
+
+    Неделя занята, если в её папке лежит архив (`.zip`, `.7z`, `.rar`) с
+    `CT-GST-TRA-PRM-` в имени. Каждая папка просматривается одним
+    `scandir` за запуск, первая свободная неделя для исходной запоминается.
+    Конвейер кладёт в папки недель только PDF, которые неделю не занимают,
+    поэтому кеш после копирования не сбрасывается; `invalidate` нужен, только
+    если в папку положили архив.
+    """
+
+    def __init__(self, root: Path) -> None:
+        self.root = Path(root)
+        self._lock = threading.Lock()
+        self._locked: dict[str, bool] = {}
+        self._first_free: dict[tuple[str, int], int] = {}
+        self.scans = 0
+        self.hits = 0
+
+    def _scan(self, folder_name: str) -> bool:
+        """Просмотреть папку недели и определить, занята ли она."""
+
+        try:
+            with os.scandir(self.root / folder_name) as entries:
+                for entry in entries:
+                    name = entry.name
+                    if GST_LOCK_MARKER in name and name.lower().endswith(
+                        GST_ARCHIVE_EXTENSIONS
+                    ):
+                        return True
+        except (FileNotFoundError, NotADirectoryError):
+            return False
+        return False
+
+    def is_locked(self, folder_name: str) -> bool:
+        """Занята ли папка недели архивом GST."""
+
+        with self._lock:
+            cached = self._locked.get(folder_name)
+            if cached is not None:
+                self.hits += 1
+                return cached
+            self.scans += 1
+        locked = self._scan(folder_name)
+        with self._lock:
+            self._locked[folder_name] = locked
+        return locked
+
+    def first_free_week(self, year: str, week: int) -> int:
+        """Первая незанятая неделя, начиная с `week`."""
+
+        key = (year, week)
+        with self._lock:
+            cached = self._first_free.get(key)
+            if cached is not None:
+                self.hits += 1
+                return cached
+        candidate = week
+        while self.is_locked(gst_folder_name(year, candidate)):
+            candidate += 1
+        with self._lock:
+            self._first_free[key] = candidate
+        return candidate
+
+    def invalidate(self, folder_name: str) -> None:
+        """Забыть состояние папки, в которую положили архив GST."""
+
+        with self._lock:
+            self._locked.pop(folder_name, None)
+            self._first_free.clear()
+
+    def recheck(self, folder_name: str) -> bool:
+        """Занята ли папка недели по свежему просмотру; кеш обновляется."""
+
+        with self._lock:
+            self.scans += 1
+        locked = self._scan(folder_name)
+        with self._lock:
+            previous = self._locked.get(folder_name)
+            self._locked[folder_name] = locked
+            if previous is not None and previous != locked:
+                self._first_free.clear()
+        return locked
+
+    def recheck_from(self, year: str, week: int) -> int:
+        """Первая незанятая неделя от `week` по свежему просмотру папок.
+
+        Кеш не используется, а обновляется результатами просмотра.
+        """
+
+        candidate = week
+        while self.recheck(gst_folder_name(year, candidate)):
+            candidate += 1
+        return candidate
+
+
+class GstWeekAllocator:
+    """Согласованный между процессами выбор недели 04_TRA_GST.
+
+    Неделя выбирается под файловой блокировкой `.toir_gst_week.lock` в корне
+    04_TRA_GST по свежему просмотру папки недели, и блокировка держится, пока
+    в папку выбранной недели пишется отчёт. Поэтому одновременные запуски
+    (UI и плановый, несколько машин) выбирают одну и ту же неделю и не пишут
+    в неделю, которую другой запуск в это время признал занятой. Решение не
+    запоминается: каждый отчёт проверяет неделю заново непосредственно перед
+    записью. Внутри процесса потоки ждут друг друга на обычной блокировке,
+    не опрашивая файл.
+    """
+
+    def __init__(
+        self,
+        index: GstWeekIndex,
+        timeout: float = DEFAULT_LOCK_TIMEOUT,
+        stale_after: float = DEFAULT_STALE_AFTER,
+    ) -> None:
+        self.index = index
+        self.timeout = timeout
+        self.stale_after = stale_after
+        self._lock = threading.Lock()
+        self.decisions = 0
+        self.moved = 0
+        self.lock_wait = 0.0
+
+    @property
+    def root(self) -> Path:
+        return self.index.root
+
+    @contextmanager
+    def reserve(self, year: str, planned_week: int) -> Iterator[int]:
+        """Выбрать неделю плана или следующую свободную и держать блокировку.
+
+        Под блокировкой заново просматривается только папка недели плана;
+        следующие недели проверяются, лишь если она оказалась занята.
+        Блокировка снимается при выходе из блока, в котором пишется отчёт.
+        `TimeoutError` — блокировку взять не удалось.
+        """
+
+        with self._lock:
+            lock = FileLock(
+                self.root / GST_ALLOCATION_LOCK_NAME,
+                timeout=self.timeout,
+                stale_after=self.stale_after,
+            )
+            with lock:
+                self.lock_wait += lock.waited
+                week = planned_week
+                if self.index.recheck(gst_folder_name(year, planned_week)):
+                    week = self.index.recheck_from(year, planned_week + 1)
+                self.decisions += 1
+                if week != planned_week:
+                    self.moved += 1
+                yield week
+
+
+__all__ = [
+    "GST_ALLOCATION_LOCK_NAME",
+    "GST_ARCHIVE_EXTENSIONS",
+    "GST_LOCK_MARKER",
+    "GstWeekAllocator",
+    "GstWeekIndex",
+    "gst_folder_name",
+]
@@ -0,0 +1,155 @@
+"""
+Отдельные очереди записи для каждого корня назначения.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Mapping, TypeVar
+
+from toir_manager.services.destination_roots import DestinationRoots
+
+_R = TypeVar("_R")
+
+DEFAULT_ROOT_CONCURRENCY = 2
+OTHER_ROOT = "OTHER"
+ALL_ROOTS = "*"
+
+
+def parse_concurrency(raw: str) -> dict[str, int]:
+    """Разобрать лимиты `КОРЕНЬ=N` через `,`/`;` (`*` — для остальных корней)."""
+
+    limits: dict[str, int] = {}
+    for item in raw.replace(";", ",").split(","):
+        item = item.strip()
+        if not item:
+            continue
+        name, _, value = item.partition("=")
+        try:
+            limit = int(value)
+        except ValueError:
+            limit = 0
+        if limit <= 0 or not name.strip():
+            print(f"[WARN] Пропущено правило TOIR_IO_QUEUES: {item}")
+            continue
+        limits[name.strip().upper()] = limit
+    return limits
+
+
+@dataclass(slots=True)
+class QueueStats:
+    """Счётчики очереди одного корня."""
+
+    root: str
+    limit: int
+    tasks: int = 0
+    busy: float = 0.0
+    waited: float = 0.0
+    peak: int = 0
+
+
+class DestinationQueues:
+    """Пул потоков на каждый корень назначения со своим числом одновременных записей.
+
+    Задача ставится в очередь корня, в который попадает путь цели (пути вне
+    корней — в общую очередь `OTHER`). Медленный сервер занимает только
+    потоки своего корня, поэтому записи в остальные корни идут без ожидания.
+    """
+
+    def __init__(
+        self,
+        roots: Mapping[str, Path],
+        limits: Mapping[str, int] | None = None,
+        default_limit: int = DEFAULT_ROOT_CONCURRENCY,
+    ) -> None:
+        self._roots = DestinationRoots(roots)
+        limits = dict(limits or {})
+        fallback = limits.get(ALL_ROOTS, default_limit)
+        self._limits = {
+            key: limits.get(key, fallback) for key in (*self._roots.names, OTHER_ROOT)
+        }
+        self._lock = threading.Lock()
+        self._executors: dict[str, ThreadPoolExecutor] = {}
+        self._stats = {key: QueueStats(key, limit) for key, limit in self._limits.items()}
+        self._running = {key: 0 for key in self._limits}
+
+    def __enter__(self) -> "DestinationQueues":
+        return self
+
+    def __exit__(self, *_exc: object) -> None:
+        self.close()
+
+    def root_for(self, path: Path) -> str:
+        """Очередь, в которую попадает запись по пути."""
+
+        return self._roots.root_for(path) or OTHER_ROOT
+
+    def _executor(self, root: str) -> ThreadPoolExecutor:
+        with self._lock:
+            executor = self._executors.get(root)
+            if executor is None:
+                executor = ThreadPoolExecutor(
+                    max_workers=self._limits[root],
+                    thread_name_prefix=f"toir-io-{root.lower()}",
+                )
+                self._executors[root] = executor
+            return executor
+
+    def submit(
+        self, path: Path, func: Callable[..., _R], *args: object
+    ) -> Future[_R]:
+        """Поставить запись по `path` в очередь её корня."""
+
+        root = self.root_for(path)
+        queued = time.perf_counter()
+
+        def run() -> _R:
+            started = time.perf_counter()
+            with self._lock:
+                stats = self._stats[root]
+                self._running[root] += 1
+                stats.peak = max(stats.peak, self._running[root])
+                stats.waited += started - queued
+            try:
+                return func(*args)
+            finally:
+                with self._lock:
+                    self._running[root] -= 1
+                    stats.tasks += 1
+                    stats.busy += time.perf_counter() - started
+
+        return self._executor(root).submit(run)
+
+    def stats(self) -> list[QueueStats]:
+        """Счётчики очередей, в которые ставились задачи."""
+
+        with self._lock:
+            return [
+                QueueStats(
+                    item.root, item.limit, item.tasks, item.busy, item.waited, item.peak
+                )
+                for item in self._stats.values()
+                if item.tasks
+            ]
+
+    def close(self) -> None:
+        """Дождаться всех поставленных записей и остановить потоки."""
+
+        with self._lock:
+            executors = list(self._executors.values())
+            self._executors.clear()
+        for executor in executors:
+            executor.shutdown(wait=True)
+
+
+__all__ = [
+    "DEFAULT_ROOT_CONCURRENCY",
+    "DestinationQueues",
+    "OTHER_ROOT",
+    "QueueStats",
+    "parse_concurrency",
+]
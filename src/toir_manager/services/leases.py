@@ -0,0 +1,299 @@
+"""
+Аренда папок проектов общего INBOX несколькими машинами (файлы `.lease`).
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import socket
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable
+
+LEASE_DIR_NAME = ".toir_leases"
+LEASE_SUFFIX = ".lease"
+DONE_SUFFIX = ".done"
+DEFAULT_LEASE_TTL = 300.0
+DEFAULT_DONE_TTL = 86400.0
+
+
+def lease_key(inbox_dir: Path, project_dir: Path) -> str:
+    """Имя файла аренды: хеш пути проекта от корня INBOX (одинаков на всех узлах)."""
+
+    try:
+        relative = Path(project_dir).relative_to(inbox_dir).as_posix()
+    except ValueError:
+        relative = Path(project_dir).as_posix()
+    return hashlib.sha1(relative.casefold().encode("utf-8")).hexdigest()[:20]
+
+
+@dataclass(slots=True)
+class Lease:
+    """Аренда, удерживаемая этим процессом."""
+
+    key: str
+    project: str
+    token: str
+    expires_at: float
+
+
+class LeaseManager:
+    """Захват, продление и освобождение аренды папок проектов.
+
+    Аренда — файл `<ключ>.lease` в `lease_dir`, созданный атомарно
+    (`O_CREAT | O_EXCL`) с именем узла, PID, токеном и сроком действия. Пока
+    проект обрабатывается, фоновый поток продлевает все удерживаемые аренды
+    каждые `ttl / 3` секунд. Просроченную аренду (упавший узел) другой узел
+    забирает: старый файл переименовывается в уникальное имя — это удаётся
+    только одному претенденту, — после чего аренда создаётся заново.
+    Обработанный проект отмечается файлом `<ключ>.done`, и до истечения
+    `done_ttl` другие узлы его не берут. Сроки сравниваются по часам узлов,
+    поэтому часы машин должны быть синхронизированы.
+    """
+
+    def __init__(
+        self,
+        lease_dir: Path,
+        ttl: float = DEFAULT_LEASE_TTL,
+        done_ttl: float = DEFAULT_DONE_TTL,
+        clock: Callable[[], float] = time.time,
+        hostname: str | None = None,
+        pid: int | None = None,
+    ) -> None:
+        self.lease_dir = Path(lease_dir)
+        self.ttl = ttl
+        self.done_ttl = done_ttl
+        self._clock = clock
+        self.hostname = hostname or socket.gethostname()
+        self.pid = os.getpid() if pid is None else pid
+        self._held: dict[str, Lease] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def __enter__(self) -> "LeaseManager":
+        self.start_renewal()
+        return self
+
+    def __exit__(self, *_exc: object) -> None:
+        self.close()
+
+    def _path(self, key: str, suffix: str) -> Path:
+        return self.lease_dir / f"{key}{suffix}"
+
+    def _payload(self, lease: Lease) -> bytes:
+        payload = {
+            "project": lease.project,
+            "host": self.hostname,
+            "pid": self.pid,
+            "token": lease.token,
+            "expires_at": lease.expires_at,
+        }
+        return json.dumps(payload, ensure_ascii=False).encode("utf-8")
+
+    @staticmethod
+    def _read(path: Path) -> dict[str, Any] | None:
+        try:
+            payload = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+        return payload if isinstance(payload, dict) else None
+
+    def _expired(self, payload: dict[str, Any] | None) -> bool:
+        if payload is None:
+            return True
+        try:
+            return float(payload.get("expires_at", 0)) <= self._clock()
+        except (TypeError, ValueError):
+            return True
+
+    def _stale_unreadable(self, path: Path) -> bool:
+        """Нечитаемый файл аренды (другой узел ещё пишет его) просрочен по mtime."""
+
+        try:
+            return path.stat().st_mtime + self.ttl <= self._clock()
+        except FileNotFoundError:
+            return True
+        except OSError:
+            return False
+
+    def _create(self, path: Path, data: bytes) -> bool:
+        """Атомарно создать файл; False — файл уже есть."""
+
+        try:
+            descriptor = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
+            return False
+        try:
+            os.write(descriptor, data)
+        finally:
+            os.close(descriptor)
+        return True
+
+    def _take_over(self, path: Path, seen: dict[str, Any] | None) -> bool:
+        """Убрать просроченную аренду; True — файл аренды освобождён нами."""
+
+        stale = path.with_name(f"{path.name}.{uuid.uuid4().hex}.stale")
+        try:
+            os.rename(path, stale)
+        except FileNotFoundError:
+            return True
+        except OSError:
+            return False
+        moved = self._read(stale)
+        seen_token = seen.get("token") if seen is not None else None
+        if moved is not None and moved.get("token") != seen_token:
+            # Между чтением и переименованием аренду уже обновил другой узел
+            try:
+                os.link(stale, path)
+            except OSError:
+                pass
+            stale.unlink(missing_ok=True)
+            return False
+        stale.unlink(missing_ok=True)
+        return True
+
+    def is_done(self, key: str) -> bool:
+        """Отмечен ли проект обработанным и срок отметки не истёк."""
+
+        path = self._path(key, DONE_SUFFIX)
+        if not path.exists():
+            return False
+        return not self._expired(self._read(path))
+
+    def acquire(self, key: str, project: str = "") -> Lease | None:
+        """Захватить аренду проекта; None — проект занят или уже обработан."""
+
+        if self.is_done(key):
+            return None
+        self.lease_dir.mkdir(parents=True, exist_ok=True)
+        path = self._path(key, LEASE_SUFFIX)
+        lease = Lease(key, project, uuid.uuid4().hex, self._clock() + self.ttl)
+        for _attempt in range(2):
+            if self._create(path, self._payload(lease)):
+                with self._lock:
+                    self._held[key] = lease
+                return lease
+            current = self._read(path)
+            if current is None and not self._stale_unreadable(path):
+                return None
+            if not self._expired(current) or not self._take_over(path, current):
+                return None
+        return None
+
+    def _claim(self, path: Path, token: str) -> bool:
+        """Убрать свой файл аренды; True — файл был наш и больше не лежит на месте.
+
+        Файл сначала переименовывается в имя с токеном — это атомарно, — и
+        токен проверяется уже в переименованном файле; чужая аренда
+        возвращается на место.
+        """
+
+        claimed = path.with_name(f"{path.name}.{token}.own")
+        try:
+            os.rename(path, claimed)
+        except FileNotFoundError:
+            return False
+        current = self._read(claimed)
+        if current is None or current.get("token") != token:
+            # Аренду уже перехватил другой узел — вернуть его файл
+            try:
+                os.link(claimed, path)
+            except OSError:
+                pass
+            claimed.unlink(missing_ok=True)
+            return False
+        claimed.unlink(missing_ok=True)
+        return True
+
+    def renew(self, lease: Lease) -> bool:
+        """Продлить аренду, если файл всё ещё наш.
+
+        Новый файл создаётся через `O_EXCL`: если аренду успел создать другой
+        узел, продление не удаётся и аренда остаётся за ним.
+        """
+
+        path = self._path(lease.key, LEASE_SUFFIX)
+        if not self._claim(path, lease.token):
+            return False
+        lease.expires_at = self._clock() + self.ttl
+        return self._create(path, self._payload(lease))
+
+    def release(
+        self, lease: Lease, done: bool = False, aliases: tuple[str, ...] = ()
+    ) -> None:
+        """Освободить аренду; `done` — отметить проект (и `aliases`) обработанным."""
+
+        with self._lock:
+            self._held.pop(lease.key, None)
+        if done:
+            marker = Lease(
+                lease.key, lease.project, lease.token, self._clock() + self.done_ttl
+            )
+            for key in (lease.key, *aliases):
+                target = self._path(key, DONE_SUFFIX)
+                temporary = target.with_name(f"{target.name}.{lease.token}.tmp")
+                temporary.write_bytes(self._payload(marker))
+                os.replace(temporary, target)
+        self._claim(self._path(lease.key, LEASE_SUFFIX), lease.token)
+
+    def held(self) -> list[Lease]:
+        """Аренды, удерживаемые сейчас."""
+
+        with self._lock:
+            return list(self._held.values())
+
+    def renew_all(self) -> None:
+        """Продлить все удерживаемые аренды; потерянные перестают продлеваться."""
+
+        for lease in self.held():
+            try:
+                renewed = self.renew(lease)
+            except OSError:
+                continue
+            if not renewed:
+                with self._lock:
+                    self._held.pop(lease.key, None)
+
+    def start_renewal(self) -> None:
+        """Запустить фоновое продление аренды."""
+
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        interval = max(self.ttl / 3, 0.01)
+
+        def run() -> None:
+            while not self._stop.wait(interval):
+                self.renew_all()
+
+        self._thread = threading.Thread(target=run, name="toir-leases", daemon=True)
+        self._thread.start()
+
+    def close(self) -> None:
+        """Остановить продление и освободить незавершённые аренды."""
+
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        for lease in self.held():
+            try:
+                self.release(lease)
+            except OSError:
+                continue
+
+
+__all__ = [
+    "DEFAULT_DONE_TTL",
+    "DEFAULT_LEASE_TTL",
+    "LEASE_DIR_NAME",
+    "Lease",
+    "LeaseManager",
+    "lease_key",
+]
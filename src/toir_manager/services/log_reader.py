@@ -8,9 +8,14 @@ from collections import Counter
 from dataclasses import dataclass
 from datetime import datetime
 from pathlib import Path
-from typing import Iterable, Iterator
-
-from toir_manager.core.logging_models import TransferLogEntry, TransferStatus
+from typing import Any, Iterable, Iterator
+
+from toir_manager.core.logging_models import (
+    SUMMARY_ACTIONS,
+    TransferAction,
+    TransferLogEntry,
+    TransferStatus,
+)
 from toir_manager.services.log_writer import iter_logs, iter_run_logs
 
 
@@ -54,18 +59,32 @@ def list_runs(base_dir: Path | None = None) -> list[RunInfo]:
 
 
 def summarize_entries(entries: Iterable[TransferLogEntry]) -> dict[str, int | float]:
-    """Набор агрегатов для отображения в CLI/UI."""
+    """Набор агрегатов для отображения в CLI/UI.
+
+    Служебные записи-сводки (`inbox_summary`) операциями не считаются.
+    """
 
-    entries = list(entries)
+    entries = [entry for entry in entries if entry.action not in SUMMARY_ACTIONS]
     total = len(entries)
     status_counter = Counter(entry.status for entry in entries)
     return {
         "total": total,
         "success": status_counter.get(TransferStatus.SUCCESS, 0),
         "errors": status_counter.get(TransferStatus.ERROR, 0),
+        "skipped": status_counter.get(TransferStatus.SKIPPED, 0),
     }
 
 
+def inbox_summaries(entries: Iterable[TransferLogEntry]) -> list[dict[str, Any]]:
+    """Сводки по входным каталогам запуска в порядке их обработки."""
+
+    return [
+        dict(entry.metadata)
+        for entry in entries
+        if entry.action == TransferAction.INBOX_SUMMARY
+    ]
+
+
 def iter_all_logs(base_dir: Path | None = None) -> Iterator[TransferLogEntry]:
     """Синоним для экспорта: возвращает все записи."""
 
@@ -74,6 +93,7 @@ def iter_all_logs(base_dir: Path | None = None) -> Iterator[TransferLogEntry]:
 
 __all__ = [
     "RunInfo",
+    "inbox_summaries",
     "iter_all_logs",
     "list_runs",
     "summarize_entries",
@@ -7,18 +7,35 @@ from __future__ import annotations
 import json
 import os
 import threading
+from collections import Counter
 from contextlib import AbstractContextManager
 from datetime import datetime
 from pathlib import Path
 from typing import Any, Iterator, Optional
 
 from toir_manager.core.logging_models import (
+    SUMMARY_ACTIONS,
     TransferAction,
     TransferLogEntry,
     TransferStatus,
 )
 
 
+def resolve_dispatch_dir(base_dir: Path | None = None) -> Path:
+    """Каталог журналов: явный путь, TOIR_DISPATCH_DIR или `logs/dispatch`."""
+
+    env_override = os.environ.get("TOIR_DISPATCH_DIR")
+    if base_dir is not None:
+        candidate = Path(base_dir)
+    elif env_override:
+        candidate = Path(env_override).expanduser()
+    else:
+        candidate = Path("logs") / "dispatch"
+    if not candidate.is_absolute():
+        candidate = (Path.cwd() / candidate).resolve()
+    return candidate
+
+
 class DispatchLogger(AbstractContextManager["DispatchLogger"]):
     """Потокобезопасный писатель JSONL-журнала."""
 
@@ -27,20 +44,12 @@ class DispatchLogger(AbstractContextManager["DispatchLogger"]):
         base_dir: Path | None = None,
         run_id: str | None = None,
     ) -> None:
-        env_override = os.environ.get("TOIR_DISPATCH_DIR")
-        if base_dir is not None:
-            candidate = Path(base_dir)
-        elif env_override:
-            candidate = Path(env_override).expanduser()
-        else:
-            candidate = Path("logs") / "dispatch"
-        if not candidate.is_absolute():
-            candidate = (Path.cwd() / candidate).resolve()
-        self._base_dir = candidate
+        self._base_dir = resolve_dispatch_dir(base_dir)
         self._base_dir.mkdir(parents=True, exist_ok=True)
         self._run_id = run_id or datetime.now().strftime("%Y%m%d_%H%M%S")
         self._file_path = self._base_dir / f"{self._run_id}.jsonl"
         self._lock = threading.Lock()
+        self._counts: Counter[TransferStatus] = Counter()
 
     def __enter__(self) -> "DispatchLogger":
         """Вернуть self для использования в with."""
@@ -87,6 +96,14 @@ class DispatchLogger(AbstractContextManager["DispatchLogger"]):
             with self._file_path.open("a", encoding="utf-8") as handler:
                 handler.write(payload)
                 handler.write("\n")
+            if action not in SUMMARY_ACTIONS:
+                self._counts[status] += 1
+
+    def status_counts(self) -> dict[TransferStatus, int]:
+        """Сколько записей каждого статуса записано этим писателем (без сводок)."""
+
+        with self._lock:
+            return dict(self._counts)
 
     def log_success(
         self,
@@ -106,6 +123,26 @@ class DispatchLogger(AbstractContextManager["DispatchLogger"]):
             metadata=metadata,
         )
 
+    def log_skipped(
+        self,
+        *,
+        action: TransferAction,
+        source_path: Path,
+        target_path: Path | None,
+        message: str = "",
+        metadata: Optional[dict[str, Any]] = None,
+    ) -> None:
+        """Сокращённая запись пропущенной (уже актуальной) цели."""
+
+        self.log(
+            action=action,
+            status=TransferStatus.SKIPPED,
+            source_path=source_path,
+            target_path=target_path,
+            message=message,
+            metadata=metadata,
+        )
+
     def log_error(
         self,
         *,
@@ -186,4 +223,5 @@ __all__ = [
     "DispatchLogger",
     "iter_logs",
     "iter_run_logs",
+    "resolve_dispatch_dir",
 ]
@@ -0,0 +1,359 @@
+"""
+Пакетная проверка и транслитерация имён проектов и файлов `_All`.
+"""
+
+from __future__ import annotations
+
+import os
+import re
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Iterable, Iterator, NamedTuple, Sequence
+
+from toir_manager.services.discovery import ALL_FILE_PATTERN
+
+# Регулярное выражение для разбора имени файла на основе предоставленной схемы
+RE_FILENAME = re.compile(
+    r"""^CT-
+    (?P<type>CL|DR)-
+    (?P<scope>[A-Z0-9]+)-
+    (?P<part>CS|LP)-
+    (?P<object_name>[A-Z0-9]+)-
+    (?P<tz_index>[\w\.]+)-
+    (?P<reserved>\d{2})-
+    (?P<period>\w+)-
+    (?P<date>\d{8})-
+    (?P<revision>\d{2})
+    _All.*?\.pdf$""",  # Ищем _All, затем любые символы, и только .pdf
+    re.IGNORECASE | re.VERBOSE,
+)
+
+TRANSLITERATION_BASE: dict[str, str] = {
+    "А": "A",
+    "Б": "B",
+    "В": "V",
+    "Г": "G",
+    "Ё": "Jo",
+    "Е": "E",
+    "Ж": "Zh",
+    "З": "Z",
+    "И": "I",
+    "Й": "Yo",
+    "К": "K",
+    "Л": "L",
+    "М": "M",
+    "Н": "H",
+    "О": "O",
+    "П": "P",
+    "Р": "P",
+    "С": "C",
+    "Т": "T",
+    "У": "U",
+    "Ф": "F",
+    "Х": "X",
+    "Ц": "C",
+    "Ч": "Ch",
+    "Ш": "Sh",
+    "Щ": "Sch",
+    "Ы": "Y",
+    "Э": "E",
+    "Ю": "Yu",
+    "Я": "Ya",
+}
+
+TRANSLIT_MAP: dict[str, str] = {}
+for _kir, _lat in TRANSLITERATION_BASE.items():
+    TRANSLIT_MAP[_kir] = _lat
+    _lower = _kir.lower()
+    if _lower != _kir:
+        TRANSLIT_MAP[_lower] = _lat.lower()
+
+ALLOWED_ASCII_CHARS = frozenset(
+    "abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789-_."
+)
+
+_SAFE_NAME = re.compile(r"[A-Za-z0-9._-]*")
+_UNSAFE_CHAR = re.compile(r"[^A-Za-z0-9._-]")
+# Разделитель имён при пакетной обработке: в именах файлов он невозможен
+_BATCH_SEPARATOR = "\0"
+_UNSAFE_BATCH_CHAR = re.compile(r"[^A-Za-z0-9._\0-]")
+
+
+def _replace_char(match: re.Match[str]) -> str:
+    """Замена одного недопустимого символа: латиница или подчёркивание."""
+
+    return TRANSLIT_MAP.get(match.group(), "_")
+
+
+def transliterate(value: str) -> str:
+    """Преобразует строку в латиницу, заменяя неподдерживаемые символы подчёркиванием.
+
+    Имена, уже состоящие из допустимых ASCII-символов, возвращаются как есть
+    без построения новой строки; в остальных заменяются только недопустимые
+    символы (`re.sub` вместо цикла по каждому символу).
+    """
+
+    if _SAFE_NAME.fullmatch(value):
+        return value
+    return _UNSAFE_CHAR.sub(_replace_char, value)
+
+
+def transliterate_many(values: Sequence[str]) -> list[str]:
+    """Транслитерировать список строк одним проходом `re.sub` по их склейке.
+
+    Регулярное выражение пропускает допустимые ASCII-символы в C, а функция
+    замены вызывается только для кириллицы и прочих недопустимых символов.
+    Результат совпадает с `transliterate` для каждой строки.
+    """
+
+    if not values:
+        return []
+    blob = _UNSAFE_BATCH_CHAR.sub(_replace_char, _BATCH_SEPARATOR.join(values))
+    return blob.split(_BATCH_SEPARATOR)
+
+
+class ParsedName(NamedTuple):
+    """Поля имени отчёта по шаблону `RE_FILENAME` (строка компактной таблицы)."""
+
+    type: str
+    scope: str
+    part: str
+    object_name: str
+    tz_index: str
+    reserved: str
+    period: str
+    date: str
+    revision: str
+
+    def as_dict(self) -> dict[str, str]:
+        """Поля в порядке шаблона, как `Match.groupdict()`."""
+
+        return dict(zip(self._fields, self))
+
+
+def parse_name(name: str) -> ParsedName | None:
+    """Разобрать имя файла отчёта; None — имя не соответствует шаблону."""
+
+    match = RE_FILENAME.match(name)
+    if match is None:
+        return None
+    return ParsedName(*match.groups())
+
+
+@dataclass(slots=True)
+class FileName:
+    """Файл `_All` проекта: латинское имя, разобранные поля и конфликт."""
+
+    source: Path
+    target_name: str
+    parsed: ParsedName | None
+    conflict: bool = False
+
+    @property
+    def renamed(self) -> bool:
+        """Нужно ли переименовывать файл."""
+
+        return self.target_name != self.source.name
+
+
+@dataclass(slots=True)
+class FolderNames:
+    """Папка проекта: латинское имя, конфликт и файлы `_All`."""
+
+    source: Path
+    target_name: str
+    conflict: str | None = None
+    conflict_with: Path | None = None
+    files: list[FileName] = field(default_factory=list)
+
+    @property
+    def target(self) -> Path:
+        """Путь папки после переименования."""
+
+        return self.source.parent / self.target_name
+
+    @property
+    def renamed(self) -> bool:
+        """Нужно ли переименовывать папку."""
+
+        return self.target_name != self.source.name
+
+
+def _name_key(name: str) -> str:
+    """Ключ сравнения имён с учётом регистронезависимых файловых систем."""
+
+    return os.path.normcase(name)
+
+
+class NameTable:
+    """Имена всех проектов запуска, проверенные одним проходом.
+
+    Для каждой папки и её файлов `_All` заранее считаются латинские имена и
+    поля шаблона, а конфликты переименования ищутся сразу по всему INBOX:
+    цель уже существует (`exists`) или в одно имя переименовываются несколько
+    папок (`duplicate`) либо файлов одной папки.
+
+    Таблица хранится по столбцам (списки строк и кортежей полей), а записи
+    `FolderNames`/`FileName` собираются по запросу `folder()`: на сотнях
+    тысяч имён это не плодит долгоживущих объектов.
+    """
+
+    def __init__(self) -> None:
+        self._index: dict[str, int] = {}
+        self._folders: list[Path] = []
+        self._folder_targets: list[str] = []
+        self._folder_conflicts: dict[int, tuple[str, Path | None]] = {}
+        self._file_bounds: list[int] = [0]
+        self._files: list[Path] = []
+        self._file_targets: list[str] = []
+        self._file_conflicts: set[int] = set()
+        self._parsed: list[tuple[str, ...] | None] = []
+
+    @classmethod
+    def build(
+        cls, projects: Iterable[tuple[Path, Sequence[Path] | None]]
+    ) -> "NameTable":
+        """Собрать таблицу по парам (папка, файлы `_All` или None — найти).
+
+        Имена всех папок и файлов транслитерируются одним пакетом
+        (`transliterate_many`), каждое имя файла разбирается шаблоном один раз.
+        """
+
+        table = cls()
+        names: list[str] = []
+        for folder, candidates in projects:
+            if not isinstance(folder, Path):
+                folder = Path(folder)
+            if candidates is None:
+                candidates = list(folder.glob(ALL_FILE_PATTERN))
+            table._index[os.fspath(folder)] = len(table._folders)
+            table._folders.append(folder)
+            table._files.extend(candidates)
+            table._file_bounds.append(len(table._files))
+            names.append(folder.name)
+        folder_count = len(table._folders)
+        file_names = [item.name for item in table._files]
+        suffixes: list[str] = []
+        for name in file_names:
+            index = name.rfind(".")
+            if 0 < index < len(name) - 1:
+                names.append(name[:index])
+                suffixes.append(name[index:].lower())
+            else:
+                names.append(name)
+                suffixes.append("")
+        translated = transliterate_many(names)
+
+        claimed: dict[str, Path] = {}
+        for index, folder in enumerate(table._folders):
+            target_name = translated[index] or "_"
+            table._folder_targets.append(target_name)
+            if target_name != names[index]:
+                target = folder.parent / target_name
+                key = _name_key(str(target))
+                if key in claimed:
+                    table._folder_conflicts[index] = ("duplicate", claimed[key])
+                elif target.exists():
+                    table._folder_conflicts[index] = ("exists", None)
+                else:
+                    claimed[key] = folder
+            table._plan_files(
+                file_names,
+                suffixes,
+                translated,
+                table._file_bounds[index],
+                table._file_bounds[index + 1],
+                folder_count,
+            )
+        return table
+
+    def _plan_files(
+        self,
+        names: list[str],
+        suffixes: list[str],
+        stems: list[str],
+        start: int,
+        end: int,
+        stem_offset: int,
+    ) -> None:
+        """Латинские имена, поля и конфликты файлов `_All` одной папки.
+
+        Цель переименования тоже подходит под шаблон `_All`, поэтому занятые
+        имена известны из самого списка кандидатов и диск не опрашивается.
+        """
+
+        match = RE_FILENAME.match
+        existing: set[str] | None = None
+        reserved: set[str] = set()
+        for position in range(start, end):
+            name = names[position]
+            target_name = (stems[stem_offset + position] or "_") + suffixes[position]
+            self._file_targets.append(target_name)
+            if target_name != name:
+                key = _name_key(target_name)
+                if end - start > 1:
+                    if existing is None:
+                        existing = {_name_key(item) for item in names[start:end]}
+                    if key in reserved or (key in existing and key != _name_key(name)):
+                        self._file_conflicts.add(position)
+                        parsed = match(name)
+                        self._parsed.append(parsed.groups() if parsed else None)
+                        continue
+                reserved.add(key)
+            parsed = match(target_name)
+            self._parsed.append(parsed.groups() if parsed else None)
+
+    def _view(self, index: int) -> FolderNames:
+        """Собрать запись папки из столбцов таблицы."""
+
+        conflict, conflict_with = self._folder_conflicts.get(index, (None, None))
+        files = []
+        for position in range(self._file_bounds[index], self._file_bounds[index + 1]):
+            parsed = self._parsed[position]
+            files.append(
+                FileName(
+                    self._files[position],
+                    self._file_targets[position],
+                    ParsedName._make(parsed) if parsed is not None else None,
+                    position in self._file_conflicts,
+                )
+            )
+        return FolderNames(
+            source=self._folders[index],
+            target_name=self._folder_targets[index],
+            conflict=conflict,
+            conflict_with=conflict_with,
+            files=files,
+        )
+
+    def folder(self, path: Path) -> FolderNames | None:
+        """Вернуть запись папки проекта."""
+
+        index = self._index.get(os.fspath(path))
+        return self._view(index) if index is not None else None
+
+    def __len__(self) -> int:
+        return len(self._folders)
+
+    def __iter__(self) -> Iterator[FolderNames]:
+        return (self._view(index) for index in range(len(self._folders)))
+
+    def conflicts(self) -> list[FolderNames]:
+        """Папки, которые нельзя переименовать."""
+
+        return [self._view(index) for index in sorted(self._folder_conflicts)]
+
+
+__all__ = [
+    "ALLOWED_ASCII_CHARS",
+    "FileName",
+    "FolderNames",
+    "NameTable",
+    "ParsedName",
+    "RE_FILENAME",
+    "TRANSLITERATION_BASE",
+    "TRANSLIT_MAP",
+    "parse_name",
+    "transliterate",
+    "transliterate_many",
+]
@@ -0,0 +1,103 @@
+"""
+Восстановление прерванного запуска по его JSONL-журналу.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from toir_manager.core.logging_models import TransferAction, TransferStatus
+from toir_manager.services.log_writer import iter_run_logs, resolve_dispatch_dir
+
+# Шаги проекта, которые можно пропустить при продолжении запуска.
+RESUMABLE_ACTIONS = frozenset(
+    {
+        TransferAction.COPY_NOTES,
+        TransferAction.COPY_GST,
+        TransferAction.COPY_TRA_SUB,
+        TransferAction.COPY_DESTINATION,
+        TransferAction.CREATE_ARCHIVE,
+        TransferAction.COPY_ARCHIVE,
+    }
+)
+DONE_STATUSES = frozenset({TransferStatus.SUCCESS, TransferStatus.SKIPPED})
+
+
+def resume_key(inbox_dir: Path, project_dir: Path) -> str:
+    """Ключ проекта в журнале: входной каталог и путь папки от него.
+
+    Одноимённые папки в разных подкаталогах или разных входных каталогах
+    запуска получают разные ключи.
+    """
+
+    try:
+        relative = Path(project_dir).relative_to(inbox_dir).as_posix()
+    except ValueError:
+        return Path(project_dir).as_posix()
+    return f"{Path(inbox_dir).as_posix()}::{relative}"
+
+
+@dataclass(slots=True)
+class ResumeState:
+    """Выполненные шаги запуска по ключам проектов (`resume_key`).
+
+    Записи журналов без `metadata.project_key` учитываются по имени папки
+    (`project_folder`).
+    """
+
+    run_id: str
+    file_path: Path
+    completed: dict[str, set[TransferAction]] = field(default_factory=dict)
+    projects: set[str] = field(default_factory=set)
+    entries: int = 0
+
+    def completed_for(self, project: str) -> set[TransferAction]:
+        """Шаги проекта, завершённые в прерванном запуске."""
+
+        return set(self.completed.get(project, ()))
+
+    def seen(self, project: str) -> bool:
+        """Встречался ли проект в журнале."""
+
+        return project in self.projects
+
+
+def load_resume_state(run_id: str, base_dir: Path | None = None) -> ResumeState:
+    """Прочитать журнал запуска и собрать успешные шаги по `project_key`.
+
+    Успешными считаются записи со статусом `success` или `skipped`; служебные
+    события каталога назначения (`metadata.destination_event`) не учитываются.
+    """
+
+    root = resolve_dispatch_dir(base_dir)
+    file_path = root / f"{run_id}.jsonl"
+    if not file_path.exists():
+        raise FileNotFoundError(f"Журнал запуска не найден: {file_path}")
+
+    state = ResumeState(run_id=run_id, file_path=file_path)
+    for entry in iter_run_logs(run_id, base_dir=root):
+        state.entries += 1
+        project = entry.metadata.get("project_key") or entry.metadata.get(
+            "project_folder"
+        )
+        if not project:
+            continue
+        state.projects.add(project)
+        if entry.action not in RESUMABLE_ACTIONS:
+            continue
+        if entry.status not in DONE_STATUSES:
+            continue
+        if entry.metadata.get("destination_event"):
+            continue
+        state.completed.setdefault(project, set()).add(entry.action)
+    return state
+
+
+__all__ = [
+    "DONE_STATUSES",
+    "RESUMABLE_ACTIONS",
+    "ResumeState",
+    "load_resume_state",
+    "resume_key",
+]
@@ -0,0 +1,249 @@
+"""
+Повтор записи при временных сбоях сетевых дисков и размыкатель по корням назначения.
+"""
+
+from __future__ import annotations
+
+import errno
+import random
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Mapping, TypeVar
+
+from toir_manager.services.destination_roots import DestinationRoots
+
+_T = TypeVar("_T")
+
+# Сбои, после которых повтор имеет смысл: таймауты и обрывы SMB/NFS,
+# занятый файл, ещё не видимый на сервере только что созданный каталог.
+TRANSIENT_ERRNOS = frozenset(
+    code
+    for code in (
+        errno.ENOENT,
+        errno.EAGAIN,
+        errno.EBUSY,
+        errno.EIO,
+        errno.ETIMEDOUT,
+        errno.ECONNRESET,
+        errno.ECONNABORTED,
+        errno.EHOSTUNREACH,
+        errno.ENETUNREACH,
+        errno.ENETRESET,
+        getattr(errno, "ESTALE", None),
+    )
+    if code is not None
+)
+# Коды Windows: 32 — файл занят другим процессом, 33 — блокировка части
+# файла, 53/67 — сетевой путь не найден, 64 — сетевое имя больше недоступно,
+# 121 — таймаут семафора, 1231 — сеть недоступна.
+TRANSIENT_WINERRORS = frozenset({32, 33, 53, 64, 67, 121, 1231})
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+def is_transient(error: BaseException) -> bool:
+    """Временный ли сбой записи (стоит повторить)."""
+
+    if isinstance(error, CircuitOpenError) or not isinstance(error, OSError):
+        return False
+    if getattr(error, "winerror", None) in TRANSIENT_WINERRORS:
+        return True
+    return isinstance(error, TimeoutError) or error.errno in TRANSIENT_ERRNOS
+
+
+class CircuitOpenError(OSError):
+    """Корень назначения временно отключён размыкателем."""
+
+
+@dataclass(frozen=True, slots=True)
+class RetryPolicy:
+    """Число попыток и экспоненциальная пауза между ними со случайным разбросом.
+
+    Пауза перед попыткой `n + 1` — `base_delay * 2 ** (n - 1)`, но не больше
+    `max_delay`, уменьшенная на случайную долю до `jitter`, чтобы потоки,
+    упавшие одновременно, не повторяли запись синхронно.
+    """
+
+    max_attempts: int = 3
+    base_delay: float = 0.5
+    max_delay: float = 10.0
+    jitter: float = 0.5
+
+    def delay(self, attempt: int, rng: Callable[[], float] = random.random) -> float:
+        """Пауза после неудачной попытки `attempt` (с 1)."""
+
+        delay = min(self.max_delay, self.base_delay * 2 ** (attempt - 1))
+        return delay * (1 - self.jitter * rng())
+
+
+def call_with_retry(
+    func: Callable[[], _T],
+    policy: RetryPolicy,
+    sleep: Callable[[float], None] = time.sleep,
+) -> tuple[_T, int]:
+    """Вызвать `func`, повторяя при временных сбоях; вернуть результат и число попыток.
+
+    Последняя ошибка пробрасывается с атрибутом `attempts`.
+    """
+
+    attempt = 1
+    while True:
+        try:
+            return func(), attempt
+        except OSError as exc:
+            if attempt >= policy.max_attempts or not is_transient(exc):
+                exc.attempts = attempt  # type: ignore[attr-defined]
+                raise
+        sleep(policy.delay(attempt))
+        attempt += 1
+
+
+class CircuitBreaker:
+    """Размыкатель одного корня назначения.
+
+    После `threshold` сбоев подряд корень отключается на `cooldown` секунд:
+    запись в него сразу завершается `CircuitOpenError`, не занимая потоки
+    ожиданием. По истечении паузы пропускается одна пробная запись; успех
+    замыкает размыкатель, сбой снова отключает корень.
+    """
+
+    def __init__(
+        self,
+        threshold: int = 5,
+        cooldown: float = 60.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at: float | None = None
+        self._trial = False
+        self.trips = 0
+
+    @property
+    def state(self) -> str:
+        """Состояние: `closed`, `open` или `half_open`."""
+
+        with self._lock:
+            if self._opened_at is None:
+                return CLOSED
+            if self._clock() - self._opened_at < self.cooldown:
+                return OPEN
+            return HALF_OPEN
+
+    def allow(self) -> bool:
+        """Можно ли писать в корень сейчас."""
+
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if self._clock() - self._opened_at < self.cooldown or self._trial:
+                return False
+            self._trial = True
+            return True
+
+    def record_success(self) -> None:
+        """Успешная запись: замкнуть размыкатель и сбросить счётчик сбоев."""
+
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial = False
+
+    def release(self) -> None:
+        """Вернуть пробную запись, исход которой неизвестен; состояние не меняется."""
+
+        with self._lock:
+            self._trial = False
+
+    def record_failure(self) -> None:
+        """Сбой записи: после `threshold` подряд или пробной записи — отключить корень."""
+
+        with self._lock:
+            self._failures += 1
+            if self._trial or (
+                self._opened_at is None and self._failures >= self.threshold
+            ):
+                self._opened_at = self._clock()
+                self.trips += 1
+            self._trial = False
+
+
+class CircuitBreakers:
+    """Размыкатели по корням назначения (NOTES, TRA_GST, TRA_SUB_APP, DEST_ROOT)."""
+
+    def __init__(
+        self,
+        roots: Mapping[str, Path],
+        threshold: int = 5,
+        cooldown: float = 60.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self._roots = DestinationRoots(roots)
+        self._breakers = {
+            key: CircuitBreaker(threshold, cooldown, clock) for key in self._roots.names
+        }
+
+    def root_for(self, path: Path) -> str | None:
+        """Корень назначения, в который попадает путь."""
+
+        return self._roots.root_for(path)
+
+    def breaker_for(self, path: Path) -> CircuitBreaker | None:
+        """Размыкатель корня пути; None — путь вне корней назначения."""
+
+        key = self.root_for(path)
+        return self._breakers.get(key) if key is not None else None
+
+    def check(self, path: Path) -> None:
+        """Поднять `CircuitOpenError`, если корень пути отключён."""
+
+        breaker = self.breaker_for(path)
+        if breaker is not None and not breaker.allow():
+            raise CircuitOpenError(
+                errno.EHOSTDOWN,
+                f"Запись в {self.root_for(path)} приостановлена после серии сбоев",
+                str(path),
+            )
+
+    def record(self, path: Path, error: BaseException | None) -> None:
+        """Учесть исход записи: временный сбой приближает размыкание, иначе замыкает."""
+
+        breaker = self.breaker_for(path)
+        if breaker is None or isinstance(error, CircuitOpenError):
+            return
+        if error is not None and is_transient(error):
+            breaker.record_failure()
+        else:
+            # Постоянная ошибка (нет прав, диск полон) — сервер отвечает
+            breaker.record_success()
+
+    def release(self, path: Path) -> None:
+        """Вернуть разрешение на запись, если запись прервалась до исхода."""
+
+        breaker = self.breaker_for(path)
+        if breaker is not None:
+            breaker.release()
+
+    def tripped(self) -> dict[str, int]:
+        """Сколько раз размыкался каждый корень (только ненулевые)."""
+
+        return {key: item.trips for key, item in self._breakers.items() if item.trips}
+
+
+__all__ = [
+    "CircuitBreaker",
+    "CircuitBreakers",
+    "CircuitOpenError",
+    "RetryPolicy",
+    "TRANSIENT_ERRNOS",
+    "TRANSIENT_WINERRORS",
+    "call_with_retry",
+    "is_transient",
+]
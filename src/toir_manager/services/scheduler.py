@@ -0,0 +1,193 @@
+"""
+Планировщик порядка обработки проектов с ограниченной очередью готовых.
+"""
+
+from __future__ import annotations
+
+import queue
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Generic, Mapping, Sequence, TypeVar
+
+_T = TypeVar("_T")
+
+SCHEDULE_ORDERS = ("destination", "alpha", "smallest", "oldest")
+DEFAULT_SCHEDULE_ORDER = "destination"
+_NO_DATE = "99999999"
+
+
+def parse_priorities(raw: str) -> tuple[tuple[str, str], ...]:
+    """Разобрать правила приоритета `поле=значение` через `;` или `,`.
+
+    Первое правило важнее следующих: `part=CS;object_name=BVS5`.
+    """
+
+    rules: list[tuple[str, str]] = []
+    for chunk in raw.replace(",", ";").split(";"):
+        name, separator, value = chunk.partition("=")
+        name = name.strip().lower()
+        value = value.strip().upper()
+        if separator and name and value:
+            rules.append((name, value))
+    return tuple(rules)
+
+
+@dataclass(slots=True)
+class ScheduleEntry(Generic[_T]):
+    """Проект в очереди: ключи порядка и замеры ожидания."""
+
+    item: _T
+    name: str
+    group: str = ""
+    date: str = ""
+    attributes: Mapping[str, str] = field(default_factory=dict)
+    size: int | None = None
+    priority: int = 0
+    rank: int = 0
+    queued_at: float = 0.0
+    ready_at: float = 0.0
+    started_at: float = 0.0
+
+    @property
+    def queue_wait(self) -> float:
+        """Сколько проект ждал в очереди готовых."""
+
+        return max(0.0, self.started_at - self.ready_at)
+
+    @property
+    def start_delay(self) -> float:
+        """Сколько прошло от начала раскладки до старта проекта."""
+
+        return max(0.0, self.started_at - self.queued_at)
+
+
+class ProjectScheduler:
+    """Выбирает порядок проектов и раздаёт их потокам через ограниченную очередь.
+
+    Порядки: `destination` — подряд по каталогу назначения (как раньше),
+    `alpha` — по имени папки, `smallest` — сначала маленькие папки,
+    `oldest` — сначала отчёты с самой ранней датой. Правила `priorities`
+    (`поле=значение` по атрибутам имени отчёта) поднимают подходящие проекты
+    в начало при любом порядке. Очередь готовых ограничена `queue_size`
+    (по умолчанию удвоенное число потоков): в неё попадают только ближайшие
+    проекты, поэтому порядок соблюдается и при параллельной обработке.
+    """
+
+    def __init__(
+        self,
+        order: str = DEFAULT_SCHEDULE_ORDER,
+        priorities: Sequence[tuple[str, str]] = (),
+        queue_size: int = 0,
+        size_of: Callable[[_T], int] | None = None,
+        clock: Callable[[], float] = time.perf_counter,
+    ) -> None:
+        if order not in SCHEDULE_ORDERS:
+            raise ValueError(f"Неизвестный порядок обработки: {order}")
+        self.order = order
+        self.priorities = tuple(priorities)
+        self.queue_size = queue_size
+        self._size_of = size_of
+        self._clock = clock
+
+    def _priority(self, entry: ScheduleEntry) -> int:
+        for position, (name, value) in enumerate(self.priorities):
+            if str(entry.attributes.get(name, "")).upper() == value:
+                return position
+        return len(self.priorities)
+
+    def _key(self, entry: ScheduleEntry) -> tuple:
+        if self.order == "alpha":
+            return (entry.priority, entry.name.lower())
+        if self.order == "smallest":
+            return (entry.priority, entry.size or 0, entry.name.lower())
+        if self.order == "oldest":
+            return (entry.priority, entry.date or _NO_DATE, entry.name.lower())
+        return (entry.priority, entry.group)
+
+    def arrange(self, entries: Sequence[ScheduleEntry]) -> list[ScheduleEntry]:
+        """Упорядочить проекты и проставить им номер в очереди."""
+
+        for entry in entries:
+            entry.priority = self._priority(entry)
+            if self.order == "smallest" and entry.size is None:
+                entry.size = self._size_of(entry.item) if self._size_of else 0
+        ordered = sorted(entries, key=self._key)
+        for rank, entry in enumerate(ordered, start=1):
+            entry.rank = rank
+        return ordered
+
+    def run(
+        self,
+        entries: Sequence[ScheduleEntry],
+        func: Callable[[ScheduleEntry], None],
+        workers: int,
+    ) -> None:
+        """Выполнить `func` для проектов в порядке `entries`.
+
+        Последовательно при одном потоке; иначе проекты подаются в очередь
+        готовых размером `queue_size` и разбираются `workers` потоками.
+        """
+
+        started = self._clock()
+        for entry in entries:
+            entry.queued_at = started
+        if workers <= 1 or len(entries) <= 1:
+            for entry in entries:
+                entry.ready_at = self._clock()
+                entry.started_at = entry.ready_at
+                func(entry)
+            return
+
+        ready: queue.Queue[ScheduleEntry | None] = queue.Queue(
+            maxsize=self.queue_size or workers * 2
+        )
+        errors: list[BaseException] = []
+
+        def worker() -> None:
+            while True:
+                entry = ready.get()
+                if entry is None:
+                    return
+                entry.started_at = self._clock()
+                try:
+                    func(entry)
+                except BaseException as exc:  # noqa: BLE001
+                    errors.append(exc)
+
+        threads = [
+            threading.Thread(target=worker, name=f"toir-project-{index}", daemon=True)
+            for index in range(workers)
+        ]
+        for thread in threads:
+            thread.start()
+        try:
+            for entry in entries:
+                entry.ready_at = self._clock()
+                ready.put(entry)
+        finally:
+            for _thread in threads:
+                ready.put(None)
+            for thread in threads:
+                thread.join()
+        if errors:
+            raise errors[0]
+
+
+def wait_summary(entries: Sequence[ScheduleEntry]) -> tuple[float, float]:
+    """Среднее и наибольшее ожидание старта по проектам."""
+
+    if not entries:
+        return 0.0, 0.0
+    delays = [entry.start_delay for entry in entries]
+    return sum(delays) / len(delays), max(delays)
+
+
+__all__ = [
+    "DEFAULT_SCHEDULE_ORDER",
+    "ProjectScheduler",
+    "SCHEDULE_ORDERS",
+    "ScheduleEntry",
+    "parse_priorities",
+    "wait_summary",
+]
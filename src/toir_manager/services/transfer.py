@@ -0,0 +1,332 @@
+"""
+Примитивы копирования файлов отчётов по каталогам назначения.
+"""
+
+from __future__ import annotations
+
+import errno
+import hashlib
+import os
+import shutil
+import sys
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import BinaryIO, Callable, Sequence, cast
+
+DEFAULT_CHUNK_SIZE = 4 * 1024 * 1024
+
+# Ограничение скорости: вызывается с целью и числом байт после каждой записи.
+Throttle = Callable[[Path, int], None]
+
+SKIP_MODE_STAT = "stat"
+SKIP_MODE_HASH = "hash"
+SKIP_MODES = (SKIP_MODE_STAT, SKIP_MODE_HASH)
+
+# Допуск сравнения mtime: FAT/SMB хранят время с точностью до 2 секунд.
+MTIME_TOLERANCE_NS = 2_000_000_000
+
+LINK_MODE_COPY = "copy"
+LINK_MODE_HARDLINK = "hardlink"
+LINK_MODE_REFLINK = "reflink"
+LINK_MODES = (LINK_MODE_COPY, LINK_MODE_HARDLINK, LINK_MODE_REFLINK)
+
+# ioctl FICLONE из linux/fs.h (Btrfs, XFS, bcachefs и др.)
+_FICLONE = 0x40049409
+
+
+@dataclass(slots=True)
+class CopyOutcome:
+    """Результат записи одного целевого файла."""
+
+    target: Path
+    method: str = LINK_MODE_COPY
+    error: BaseException | None = None
+    bytes_written: int = 0
+    skipped: bool = False
+
+    @property
+    def ok(self) -> bool:
+        """Запись завершилась без ошибки."""
+
+        return self.error is None
+
+
+def _file_digest(path: Path) -> str:
+    """Посчитать BLAKE2b содержимого файла."""
+
+    digest = hashlib.blake2b()
+    with path.open("rb") as handler:
+        for chunk in iter(lambda: handler.read(DEFAULT_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def is_identical(source: Path, target: Path, mode: str = SKIP_MODE_STAT) -> bool:
+    """Проверить, что цель уже содержит тот же файл.
+
+    В режиме `stat` сравниваются размер и mtime (с допуском 2 с); в режиме
+    `hash` — размер и хеш содержимого, mtime не учитывается.
+    """
+
+    try:
+        source_stat = os.stat(source)
+        target_stat = os.stat(target)
+    except OSError:
+        return False
+    if source_stat.st_size != target_stat.st_size:
+        return False
+    if mode == SKIP_MODE_HASH:
+        try:
+            return _file_digest(Path(source)) == _file_digest(Path(target))
+        except OSError:
+            return False
+    return abs(source_stat.st_mtime_ns - target_stat.st_mtime_ns) <= MTIME_TOLERANCE_NS
+
+
+def _same_file(source: Path, target: Path) -> bool:
+    """Проверить, что цель указывает на тот же файл, что и источник."""
+
+    try:
+        return os.path.samefile(source, target)
+    except OSError:
+        return False
+
+
+def _discard(handle: BinaryIO, target: Path) -> None:
+    """Закрыть и удалить недописанный файл."""
+
+    try:
+        handle.close()
+    except OSError:
+        pass
+    try:
+        target.unlink()
+    except OSError:
+        pass
+
+
+def fanout_copy(
+    source: Path,
+    targets: Sequence[Path],
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    throttle: Throttle | None = None,
+) -> list[CopyOutcome]:
+    """Прочитать источник один раз и записать его во все цели.
+
+    Ошибка одной цели не прерывает запись остальных: недописанный файл
+    удаляется, а исключение возвращается в `CopyOutcome.error`. Как и
+    `shutil.copy2`, копируются содержимое, права доступа и время
+    изменения (по нему повторный запуск узнаёт актуальные цели). Порядок
+    результатов совпадает с порядком `targets`. `throttle` вызывается после
+    записи каждого блока в каждую цель.
+    """
+
+    outcomes = [CopyOutcome(target=Path(target)) for target in targets]
+    writers: dict[Path, tuple[BinaryIO, list[CopyOutcome]]] = {}
+    for outcome in outcomes:
+        existing = writers.get(outcome.target)
+        if existing is not None:
+            existing[1].append(outcome)
+            continue
+        if _same_file(source, outcome.target):
+            outcome.error = shutil.SameFileError(
+                f"{source!s} and {outcome.target!s} are the same file"
+            )
+            continue
+        try:
+            handle = outcome.target.open("wb")
+        except OSError as exc:
+            outcome.error = exc
+            continue
+        writers[outcome.target] = (handle, [outcome])
+
+    try:
+        with Path(source).open("rb") as reader:
+            while writers:
+                chunk = reader.read(chunk_size)
+                if not chunk:
+                    break
+                for target, (handle, group) in list(writers.items()):
+                    try:
+                        handle.write(chunk)
+                    except OSError as exc:
+                        _discard(handle, target)
+                        del writers[target]
+                        for outcome in group:
+                            outcome.error = exc
+                        continue
+                    for outcome in group:
+                        outcome.bytes_written += len(chunk)
+                    if throttle is not None:
+                        throttle(target, len(chunk))
+    except OSError as exc:
+        for target, (handle, group) in writers.items():
+            _discard(handle, target)
+            for outcome in group:
+                outcome.error = exc
+        writers.clear()
+
+    for target, (handle, group) in writers.items():
+        try:
+            handle.close()
+            shutil.copystat(source, target)
+        except OSError as exc:
+            for outcome in group:
+                outcome.error = exc
+    return outcomes
+
+
+def _same_device(source: Path, target_dir: Path) -> bool:
+    """Источник и каталог назначения лежат на одном томе."""
+
+    try:
+        return os.stat(source).st_dev == os.stat(target_dir).st_dev
+    except OSError:
+        return False
+
+
+def _device(target_dir: Path) -> int | None:
+    """Том каталога назначения; None — каталог недоступен."""
+
+    try:
+        return os.stat(target_dir).st_dev
+    except OSError:
+        return None
+
+
+def _reflink(source: Path, target: Path) -> None:
+    """Создать copy-on-write клон файла (только Linux, FICLONE)."""
+
+    if not sys.platform.startswith("linux"):
+        raise OSError(errno.EOPNOTSUPP, "reflink не поддерживается на этой платформе")
+    import fcntl
+
+    with source.open("rb") as reader, target.open("wb") as writer:
+        fcntl.ioctl(writer.fileno(), _FICLONE, reader.fileno())
+    shutil.copystat(source, target)
+
+
+def _link_into_place(source: Path, target: Path, mode: str) -> None:
+    """Создать ссылку/клон под временным именем и атомарно заменить цель."""
+
+    staging = target.with_name(
+        f".{target.name}.{os.getpid()}.{threading.get_ident()}.link"
+    )
+    try:
+        if mode == LINK_MODE_HARDLINK:
+            os.link(source, staging)
+        else:
+            _reflink(source, staging)
+        os.replace(staging, target)
+    except OSError:
+        try:
+            staging.unlink()
+        except OSError:
+            pass
+        raise
+
+
+def distribute_file(
+    source: Path,
+    targets: Sequence[Path],
+    link_mode: str = LINK_MODE_COPY,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    skip_identical: str | None = None,
+    throttle: Throttle | None = None,
+) -> list[CopyOutcome]:
+    """Разложить файл по целям ссылками (где возможно) или копированием.
+
+    В режимах `hardlink`/`reflink` цели на том же томе, что и источник,
+    получают жёсткую ссылку или CoW-клон источника. На каждый другой том
+    файл копируется один раз (общим fan-out), а остальные цели этого тома
+    получают ссылку на эту копию; цели, где ссылку создать не удалось,
+    копируются. Исходы возвращаются в порядке `targets`, способ записи
+    каждой цели — в `CopyOutcome.method`. При заданном `skip_identical`
+    (`stat`/`hash`) уже актуальные цели не перезаписываются и помечаются
+    `CopyOutcome.skipped`.
+    """
+
+    source = Path(source)
+    linkable = link_mode in (LINK_MODE_HARDLINK, LINK_MODE_REFLINK)
+    outcomes: list[CopyOutcome | None] = [None] * len(targets)
+    to_copy: list[int] = []
+    # Первая копия на томе -> цели того же тома, которые получат ссылку на неё.
+    primaries: dict[int, int] = {}
+    followers: dict[int, list[int]] = {}
+    for position, raw_target in enumerate(targets):
+        target = Path(raw_target)
+        if skip_identical and is_identical(source, target, skip_identical):
+            outcomes[position] = CopyOutcome(target=target, skipped=True)
+            continue
+        if link_mode == LINK_MODE_HARDLINK and _same_file(source, target):
+            # Повторный запуск: цель уже является жёсткой ссылкой на источник.
+            outcomes[position] = CopyOutcome(target=target, method=link_mode)
+            continue
+        if linkable and _same_device(source, target.parent):
+            try:
+                _link_into_place(source, target, link_mode)
+            except OSError:
+                to_copy.append(position)
+                continue
+            outcomes[position] = CopyOutcome(
+                target=target,
+                method=link_mode,
+                bytes_written=0,
+            )
+            continue
+        device = _device(target.parent) if linkable else None
+        if device is not None:
+            primary = primaries.setdefault(device, position)
+            if primary != position and Path(targets[primary]) != target:
+                followers.setdefault(primary, []).append(position)
+                continue
+        to_copy.append(position)
+
+    copied = fanout_copy(
+        source, [Path(targets[i]) for i in to_copy], chunk_size, throttle
+    )
+    for position, outcome in zip(to_copy, copied):
+        outcomes[position] = outcome
+
+    fallback: list[int] = []
+    for primary, group in followers.items():
+        origin = outcomes[primary]
+        for index, position in enumerate(group):
+            target = Path(targets[position])
+            if origin is None or not origin.ok:
+                fallback.extend(group[index:])
+                break
+            try:
+                _link_into_place(origin.target, target, link_mode)
+            except OSError:
+                # Том не поддерживает ссылки — остальные его цели копируются.
+                fallback.extend(group[index:])
+                break
+            outcomes[position] = CopyOutcome(target=target, method=link_mode)
+    if fallback:
+        copied = fanout_copy(
+            source, [Path(targets[i]) for i in fallback], chunk_size, throttle
+        )
+        for position, outcome in zip(fallback, copied):
+            outcomes[position] = outcome
+    missing = [str(targets[i]) for i, item in enumerate(outcomes) if item is None]
+    assert not missing, f"Нет исхода записи для целей: {missing}"
+    return cast(list[CopyOutcome], outcomes)
+
+
+__all__ = [
+    "CopyOutcome",
+    "DEFAULT_CHUNK_SIZE",
+    "LINK_MODES",
+    "LINK_MODE_COPY",
+    "LINK_MODE_HARDLINK",
+    "LINK_MODE_REFLINK",
+    "SKIP_MODES",
+    "SKIP_MODE_HASH",
+    "SKIP_MODE_STAT",
+    "Throttle",
+    "distribute_file",
+    "fanout_copy",
+    "is_identical",
+]
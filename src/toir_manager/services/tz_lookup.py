@@ -0,0 +1,263 @@
+"""
+Индекс справочника TZ_glob.xlsx: `tz_index -> суффикс`.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any
+
+CACHE_VERSION = 1
+
+
+class TzLookupError(Exception):
+    """Справочник не удалось разобрать."""
+
+
+@dataclass(slots=True)
+class TzIndexReport:
+    """Замечания, собранные за один проход по листу справочника."""
+
+    rows: int = 0
+    missing_suffix: list[str] = field(default_factory=list)
+    duplicates: list[str] = field(default_factory=list)
+
+    @property
+    def has_issues(self) -> bool:
+        """Есть ли индексы без суффикса или повторы."""
+
+        return bool(self.missing_suffix or self.duplicates)
+
+
+def _column_index(letter: str) -> int:
+    """Перевести букву колонки в индекс с нуля."""
+
+    return ord(letter.strip().upper()) - ord("A")
+
+
+def normalize_tz_key(value: object) -> str:
+    """Нормализовать индекс так же, как при сравнении в справочнике."""
+
+    return str(value).strip().lower() if value else ""
+
+
+def _file_sha256(path: Path) -> str:
+    """Посчитать SHA-256 содержимого файла."""
+
+    digest = hashlib.sha256()
+    with path.open("rb") as handler:
+        for chunk in iter(lambda: handler.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class TzLookup:
+    """Однократно разбирает лист справочника и перечитывает его при изменении файла.
+
+    При заданном `cache_path` разобранный индекс сохраняется в JSON-кеш с
+    ключом (путь, размер, mtime, SHA-256). Если размер и mtime совпадают,
+    кеш используется без чтения книги; если изменился только mtime, но не
+    содержимое, кеш подтверждается по хешу. openpyxl импортируется лишь при
+    фактическом разборе листа.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        sheet_name: str,
+        lookup_col: str,
+        suffix_col: str,
+        cache_path: Path | None = None,
+    ) -> None:
+        self.path = Path(path)
+        self.sheet_name = sheet_name
+        self.cache_path = Path(cache_path) if cache_path is not None else None
+        self._lookup_col = lookup_col.strip().upper()
+        self._suffix_col = suffix_col.strip().upper()
+        self._lookup_idx = _column_index(lookup_col)
+        self._suffix_idx = _column_index(suffix_col)
+        self._lock = threading.Lock()
+        self._signature: tuple[int, int] | None = None
+        self._index: dict[str, str | None] = {}
+        self._report = TzIndexReport()
+        self.loads = 0
+        self.cache_hits = 0
+        self.last_source: str | None = None
+
+    @property
+    def report(self) -> TzIndexReport:
+        """Замечания последней загрузки."""
+
+        return self._report
+
+    def index(self) -> dict[str, str | None]:
+        """Актуальный словарь `нормализованный индекс -> суффикс`."""
+
+        self.reload_if_changed()
+        return dict(self._index)
+
+    def reload_if_changed(self) -> bool:
+        """Перечитать справочник, если изменились mtime или размер файла.
+
+        Возвращает True, если индекс был построен заново.
+        """
+
+        stat = self.path.stat()
+        signature = (stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            if signature == self._signature:
+                return False
+            cached = self._load_cache(stat.st_size, stat.st_mtime_ns)
+            if cached is not None:
+                self._index, self._report = cached
+                self.cache_hits += 1
+                self.last_source = "cache"
+            else:
+                self._index, self._report = self._parse()
+                self.loads += 1
+                self.last_source = "xlsx"
+                self._store_cache(stat.st_size, stat.st_mtime_ns, None)
+            self._signature = signature
+            return True
+
+    def _cache_key(self) -> dict[str, Any]:
+        """Поля, которые должны совпасть, чтобы кеш был применим."""
+
+        try:
+            resolved = str(self.path.resolve())
+        except OSError:
+            resolved = str(self.path)
+        return {
+            "version": CACHE_VERSION,
+            "path": resolved,
+            "sheet": self.sheet_name,
+            "lookup_col": self._lookup_col,
+            "suffix_col": self._suffix_col,
+        }
+
+    def _load_cache(
+        self, size: int, mtime_ns: int
+    ) -> tuple[dict[str, str | None], TzIndexReport] | None:
+        """Прочитать кеш, если он соответствует текущему файлу."""
+
+        if self.cache_path is None:
+            return None
+        try:
+            payload = json.loads(self.cache_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+        if not isinstance(payload, dict):
+            return None
+        key = self._cache_key()
+        if any(payload.get(name) != value for name, value in key.items()):
+            return None
+        if payload.get("size") != size:
+            return None
+        if payload.get("mtime_ns") != mtime_ns:
+            # Файл могли скопировать или «потрогать» без изменений.
+            try:
+                content_hash = _file_sha256(self.path)
+            except OSError:
+                return None
+            if payload.get("sha256") != content_hash:
+                return None
+            self._store_cache(size, mtime_ns, payload, content_hash)
+        index = payload.get("index")
+        report = payload.get("report")
+        if not isinstance(index, dict) or not isinstance(report, dict):
+            return None
+        try:
+            return dict(index), TzIndexReport(**report)
+        except TypeError:
+            return None
+
+    def _store_cache(
+        self,
+        size: int,
+        mtime_ns: int,
+        payload: dict[str, Any] | None,
+        content_hash: str | None = None,
+    ) -> None:
+        """Атомарно записать кеш рядом с журналами; ошибки записи не критичны."""
+
+        if self.cache_path is None:
+            return
+        try:
+            if payload is None:
+                payload = {
+                    "index": self._index,
+                    "report": asdict(self._report),
+                }
+            payload.update(self._cache_key())
+            payload["size"] = size
+            payload["mtime_ns"] = mtime_ns
+            payload["sha256"] = content_hash or _file_sha256(self.path)
+            self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.cache_path.with_name(
+                f"{self.cache_path.name}.{os.getpid()}.tmp"
+            )
+            tmp_path.write_text(
+                json.dumps(payload, ensure_ascii=False), encoding="utf-8"
+            )
+            os.replace(tmp_path, self.cache_path)
+        except OSError:
+            pass
+
+    def lookup(self, key: str) -> str | None:
+        """Вернуть суффикс для индекса или None."""
+
+        self.reload_if_changed()
+        return self._index.get(normalize_tz_key(key))
+
+    def _parse(self) -> tuple[dict[str, str | None], TzIndexReport]:
+        """Разобрать лист за один проход."""
+
+        try:
+            from openpyxl import load_workbook
+        except ImportError as exc:
+            raise TzLookupError(
+                "Библиотека openpyxl не найдена. Пожалуйста, установите ее: pip install openpyxl"
+            ) from exc
+
+        workbook = load_workbook(self.path, read_only=True, data_only=True)
+        try:
+            if self.sheet_name not in workbook.sheetnames:
+                raise TzLookupError(
+                    f"Лист '{self.sheet_name}' не найден в файле {self.path}"
+                )
+            sheet = workbook[self.sheet_name]
+            index: dict[str, str | None] = {}
+            report = TzIndexReport()
+            for row in sheet.iter_rows(min_row=2, values_only=True):
+                report.rows += 1
+                key_value = row[self._lookup_idx] if len(row) > self._lookup_idx else None
+                key = normalize_tz_key(key_value)
+                if not key:
+                    continue
+                raw_suffix = (
+                    row[self._suffix_idx] if len(row) > self._suffix_idx else None
+                )
+                suffix = str(raw_suffix).strip() if raw_suffix else None
+                if key in index:
+                    # Как и прежний построчный поиск, побеждает первая строка.
+                    report.duplicates.append(key)
+                    continue
+                index[key] = suffix
+                if suffix is None:
+                    report.missing_suffix.append(key)
+            return index, report
+        finally:
+            workbook.close()
+
+
+__all__ = [
+    "TzIndexReport",
+    "TzLookup",
+    "TzLookupError",
+    "normalize_tz_key",
+]
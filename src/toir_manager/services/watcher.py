@@ -0,0 +1,139 @@
+"""
+Наблюдение за входным каталогом: какие папки проектов перестали меняться.
+"""
+
+from __future__ import annotations
+
+import os
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Sequence
+
+from toir_manager.services.discovery import discover_projects
+
+Signature = tuple[int, int, int]
+
+
+def folder_signature(path: Path) -> Signature | None:
+    """Число файлов, их суммарный размер и последний mtime в дереве папки.
+
+    Содержимое файлов не читается — только `stat` через `os.scandir`.
+    Возвращает None, если папки больше нет.
+    """
+
+    root = Path(path)
+    count = 0
+    total_size = 0
+    newest = 0
+    stack = [root]
+    found_root = False
+    while stack:
+        directory = stack.pop()
+        try:
+            with os.scandir(directory) as entries:
+                found_root = True
+                for entry in entries:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            stack.append(Path(entry.path))
+                            continue
+                        stat = entry.stat(follow_symlinks=False)
+                    except OSError:
+                        continue
+                    count += 1
+                    total_size += stat.st_size
+                    newest = max(newest, stat.st_mtime_ns)
+        except OSError:
+            if directory == root:
+                return None
+    if not found_root:
+        return None
+    return count, total_size, newest
+
+
+@dataclass(slots=True)
+class _FolderState:
+    """Последнее наблюдение за папкой."""
+
+    signature: Signature
+    changed_at: float
+    done_signature: Signature | None = None
+
+
+class InboxWatcher:
+    """Опрашивает INBOX и отдаёт папки проектов, «успокоившиеся» на `settle_seconds`.
+
+    Папка готова, если её сигнатура (`folder_signature`) не менялась не
+    меньше `settle_seconds`. При первом обнаружении отсчёт идёт от mtime
+    самого свежего файла, поэтому давно лежащие проекты отдаются сразу.
+    Обработанные папки отмечаются `mark_done` и повторно отдаются, только
+    если их содержимое изменится.
+    """
+
+    def __init__(
+        self,
+        inbox_dir: Path,
+        settle_seconds: float,
+        discover: Callable[[Path], Sequence[Path]] | None = None,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self.inbox_dir = Path(inbox_dir)
+        self.settle_seconds = settle_seconds
+        self._discover = discover or (
+            lambda root: [item.path for item in discover_projects(root)]
+        )
+        self._clock = clock
+        self._states: dict[Path, _FolderState] = {}
+
+    def poll(self) -> list[Path]:
+        """Один опрос: вернуть папки, готовые к обработке."""
+
+        now = self._clock()
+        seen: set[Path] = set()
+        ready: list[Path] = []
+        for folder in self._discover(self.inbox_dir):
+            folder = Path(folder)
+            if folder == self.inbox_dir:
+                continue
+            signature = folder_signature(folder)
+            if signature is None:
+                continue
+            seen.add(folder)
+            state = self._states.get(folder)
+            if state is None:
+                newest_seconds = signature[2] / 1_000_000_000
+                state = _FolderState(signature, min(now, newest_seconds))
+                self._states[folder] = state
+            elif state.signature != signature:
+                state.signature = signature
+                state.changed_at = now
+            if state.signature == state.done_signature:
+                continue
+            if now - state.changed_at >= self.settle_seconds:
+                ready.append(folder)
+        for folder in list(self._states):
+            if folder not in seen:
+                del self._states[folder]
+        return ready
+
+    def mark_done(self, folder: Path) -> None:
+        """Запомнить текущее состояние обработанной папки."""
+
+        folder = Path(folder)
+        signature = folder_signature(folder)
+        if signature is None:
+            self._states.pop(folder, None)
+            return
+        state = self._states.get(folder)
+        if state is None:
+            state = _FolderState(signature, self._clock())
+            self._states[folder] = state
+        state.signature = signature
+        state.done_signature = signature
+
+
+__all__ = [
+    "InboxWatcher",
+    "folder_signature",
+]
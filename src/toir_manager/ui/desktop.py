@@ -222,7 +222,7 @@ def _collect_processed_projects(
         if project_dir != resolved_inbox and resolved_inbox not in project_dir.parents:
             continue
         state = states.setdefault(project_dir, {"success": False, "error": False})
-        if entry.status == TransferStatus.SUCCESS:
+        if entry.status in (TransferStatus.SUCCESS, TransferStatus.SKIPPED):
             state["success"] = True
         elif entry.status == TransferStatus.ERROR:
             state["error"] = True
@@ -346,7 +346,8 @@ def _update_summary(
 
     summary = summarize_entries(entries)
     summary_var.set(
-        "Всего: {total} | Успехов: {success} | Ошибок: {errors}".format(**summary)
+        "Всего: {total} | Успехов: {success} | Ошибок: {errors} | "
+        "Пропущено: {skipped}".format(**summary)
     )
 
 
@@ -7,6 +7,16 @@ from __future__ import annotations
 import sys
 from pathlib import Path
 
+import pytest
+
 SRC_DIR = Path(__file__).resolve().parents[1] / "src"
 if str(SRC_DIR) not in sys.path:
     sys.path.insert(0, str(SRC_DIR))
+
+
+@pytest.fixture(autouse=True)
+def _isolated_ui_paths(tmp_path_factory, monkeypatch):
+    """Не подхватывать сохранённые пути UI пользователя в тестах конвейера."""
+
+    monkeypatch.delenv("TOIR_UI_CONFIG_FILE", raising=False)
+    monkeypatch.setenv("TOIR_UI_CONFIG_DIR", str(tmp_path_factory.mktemp("ui_config")))
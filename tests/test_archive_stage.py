@@ -0,0 +1,172 @@
+"""Тесты стадии архивации на пуле процессов."""
+
+from __future__ import annotations
+
+import os
+import zipfile
+from pathlib import Path
+
+import pytest
+
+from toir_manager.services.archiver import (
+    ArchiveResult,
+    ArchiveStage,
+    CompressionPolicy,
+    partial_path_for,
+    read_archive_fingerprint,
+    write_zip_archive,
+)
+
+
+def test_archive_stage_reports_each_archive(tmp_path: Path) -> None:
+    results: list[tuple[ArchiveResult | None, BaseException | None]] = []
+    projects = []
+    for index in range(3):
+        project = tmp_path / "inbox" / f"project{index}"
+        project.mkdir(parents=True)
+        (project / "report_All.pdf").write_text(f"pdf{index}", encoding="utf-8")
+        projects.append(project)
+
+    with ArchiveStage(max_workers=2) as stage:
+        for project in projects:
+            out_dir = tmp_path / "out" / project.name
+            out_dir.mkdir(parents=True)
+            stage.submit(
+                project,
+                out_dir / f"{project.name}.zip",
+                lambda path, error: results.append((path, error)),
+            )
+
+    assert len(results) == 3
+    for result, error in results:
+        assert error is None
+        assert result is not None
+        with zipfile.ZipFile(result.path) as archive:
+            assert "report_All.pdf" in archive.namelist()
+
+
+def test_archive_stage_passes_errors_to_callback(tmp_path: Path) -> None:
+    results: list[BaseException | None] = []
+    with ArchiveStage(max_workers=1) as stage:
+        stage.submit(
+            tmp_path / "missing",
+            tmp_path / "missing_archive",
+            lambda _path, error: results.append(error),
+        )
+
+    assert len(results) == 1
+    assert results[0] is not None
+
+
+def test_write_zip_archive_renames_partial_into_place(tmp_path: Path) -> None:
+    project = tmp_path / "project"
+    (project / "Native" / "cad").mkdir(parents=True)
+    (project / "report_All.pdf").write_bytes(b"pdf")
+    (project / "Native" / "cad" / "drawing.dwg").write_bytes(b"dwg")
+    target = tmp_path / "dest" / "project.zip"
+    target.parent.mkdir()
+
+    result = write_zip_archive(str(project), str(target))
+
+    assert result.path == target
+    assert not partial_path_for(target).exists()
+    with zipfile.ZipFile(target) as archive:
+        assert archive.namelist() == [
+            "report_All.pdf",
+            "Native/",
+            "Native/cad/",
+            "Native/cad/drawing.dwg",
+        ]
+
+
+def test_write_zip_archive_leaves_no_partial_on_failure(
+    tmp_path: Path, monkeypatch
+) -> None:
+    project = tmp_path / "project"
+    project.mkdir()
+    (project / "report_All.pdf").write_bytes(b"pdf")
+    target = tmp_path / "dest" / "project.zip"
+    target.parent.mkdir()
+    target.write_bytes(b"previous archive")
+
+    def _broken_write(self, *_args, **_kwargs):
+        assert partial_path_for(target).exists()
+        raise OSError("network share dropped")
+
+    monkeypatch.setattr(zipfile.ZipFile, "write", _broken_write)
+    with pytest.raises(OSError):
+        write_zip_archive(str(project), str(target))
+
+    assert target.read_bytes() == b"previous archive"
+    assert not partial_path_for(target).exists()
+
+
+def test_compression_policy_stores_incompressible_files(tmp_path: Path) -> None:
+    project = tmp_path / "project"
+    project.mkdir()
+    (project / "report_All.pdf").write_bytes(b"%PDF" + b"a" * 4096)
+    (project / "notes.txt").write_bytes(b"compressible text " * 1000)
+    (project / "scan.tif").write_bytes(os.urandom(8192))
+    (project / "model.dxf").write_bytes(b"0\nSECTION\n" * 1000)
+    target = tmp_path / "project.zip"
+    policy = CompressionPolicy(
+        default_level=1, extension_levels={".dxf": 9}, sample_size=64 * 1024
+    )
+
+    result = write_zip_archive(str(project), str(target), policy)
+
+    with zipfile.ZipFile(target) as archive:
+        infos = {info.filename: info for info in archive.infolist()}
+        assert archive.read("notes.txt") == b"compressible text " * 1000
+    assert infos["report_All.pdf"].compress_type == zipfile.ZIP_STORED
+    assert infos["scan.tif"].compress_type == zipfile.ZIP_STORED
+    assert infos["notes.txt"].compress_type == zipfile.ZIP_DEFLATED
+    assert infos["model.dxf"].compress_type == zipfile.ZIP_DEFLATED
+    assert result.stored_files == 2
+    assert result.deflated_files == 2
+    assert 0 < result.ratio < 1
+    assert result.seconds >= 0
+
+
+def test_compression_policy_level_zero_stores_everything(tmp_path: Path) -> None:
+    sample = tmp_path / "notes.txt"
+    sample.write_bytes(b"text " * 1000)
+
+    assert CompressionPolicy(default_level=0).choose(sample) == (
+        zipfile.ZIP_STORED,
+        None,
+    )
+    assert CompressionPolicy(sample_size=0).choose(sample) == (
+        zipfile.ZIP_DEFLATED,
+        6,
+    )
+
+
+def test_compression_policy_extension_level_overrides_stored(tmp_path: Path) -> None:
+    report = tmp_path / "report.pdf"
+    report.write_bytes(b"%PDF" + b"a" * 4096)
+
+    assert CompressionPolicy().choose(report) == (zipfile.ZIP_STORED, None)
+    assert CompressionPolicy(extension_levels={".pdf": 9}).choose(report) == (
+        zipfile.ZIP_DEFLATED,
+        9,
+    )
+
+
+def test_write_zip_archive_skips_unchanged_project(tmp_path: Path) -> None:
+    project = tmp_path / "project"
+    project.mkdir()
+    report = project / "report_All.pdf"
+    report.write_bytes(b"pdf")
+    target = tmp_path / "project.zip"
+
+    first = write_zip_archive(str(project), str(target), skip_identical=True)
+    assert not first.skipped
+    assert read_archive_fingerprint(target)
+
+    second = write_zip_archive(str(project), str(target), skip_identical=True)
+    assert second.skipped
+
+    report.write_bytes(b"pdf, revised")
+    third = write_zip_archive(str(project), str(target), skip_identical=True)
+    assert not third.skipped
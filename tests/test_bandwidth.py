@@ -0,0 +1,118 @@
+"""Тесты ограничения скорости записи по корням назначения."""
+
+from __future__ import annotations
+
+import importlib.util
+import json
+import pickle
+from pathlib import Path
+
+from toir_manager.services.bandwidth import (
+    MEGABYTE,
+    BandwidthLimiter,
+    TokenBucket,
+    parse_limits,
+)
+
+MODULE_PATH = Path(__file__).resolve().parents[1] / "toir_raspredelenije.py"
+NAME = "CT-DR-B-LP-UNIT-I.1.1-00-C-20250101-00_All"
+
+
+def _load_pipeline_module():
+    spec = importlib.util.spec_from_file_location("toir_raspredelenije", MODULE_PATH)
+    if spec is None or spec.loader is None:
+        raise RuntimeError("Failed to load toir_raspredelenije")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+class _Clock:
+    def __init__(self) -> None:
+        self.now = 100.0
+        self.slept = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        self.slept += seconds
+        self.now += seconds
+
+
+def test_token_bucket_limits_rate() -> None:
+    clock = _Clock()
+    bucket = TokenBucket(100.0, clock=clock, sleep=clock.sleep)
+
+    assert bucket.consume(100) == 1.0
+    assert bucket.consume(50) == 0.5
+    clock.now += 10
+    assert bucket.consume(100) == 0.0
+
+    bucket.set_rate(0)
+    assert bucket.consume(10_000) == 0.0
+    assert clock.slept == 1.5
+
+
+def test_limiter_follows_control_file(tmp_path) -> None:
+    clock = _Clock()
+    control = tmp_path / "bandwidth.json"
+    limiter = BandwidthLimiter(
+        roots={"NOTES": tmp_path / "notes", "DEST_ROOT": tmp_path / "dest"},
+        limits=parse_limits("notes=1, *=4"),
+        control_file=control,
+        poll_interval=5,
+        clock=clock,
+        sleep=clock.sleep,
+    )
+    assert limiter.limit("NOTES") == 1
+    assert limiter.limit("DEST_ROOT") == 4
+    assert limiter.root_for(tmp_path / "elsewhere" / "a.pdf") is None
+
+    limiter.throttle(tmp_path / "notes" / "a.pdf", MEGABYTE)
+    assert clock.slept == 1.0
+
+    control.write_text(json.dumps({"NOTES": 0, "DEST_ROOT": 2}), encoding="utf-8")
+    clock.now += 5
+    limiter.throttle(tmp_path / "notes" / "b.pdf", MEGABYTE)
+    assert clock.slept == 1.0
+    assert limiter.limit("DEST_ROOT") == 2
+
+    stats = limiter.snapshot()
+    assert stats["NOTES"].bytes_written == 2 * MEGABYTE
+    assert stats["NOTES"].waited == 1.0
+
+    throttle = limiter.process_throttle(tmp_path / "dest" / "a.zip", 3)
+    assert throttle is not None and throttle.share == 4
+    restored = pickle.loads(pickle.dumps(throttle))
+    restored(1024)
+    assert restored.root == "DEST_ROOT"
+
+
+def test_run_summary_reports_throughput(tmp_path, monkeypatch, capsys) -> None:
+    module = _load_pipeline_module()
+    project_dir = tmp_path / "inbox" / NAME
+    project_dir.mkdir(parents=True)
+    (project_dir / f"{NAME}.pdf").write_bytes(b"pdf" * 1000)
+
+    monkeypatch.setattr(module, "NOTES_DIR", tmp_path / "notes")
+    monkeypatch.setattr(module, "TRA_GST_DIR", tmp_path / "gst")
+    monkeypatch.setattr(module, "DEST_ROOT_DIR", tmp_path / "dest")
+    monkeypatch.setenv("TOIR_DISPATCH_DIR", str(tmp_path / "logs"))
+    monkeypatch.setenv("TOIR_ENABLE_TRA_SUB_APP", "0")
+    monkeypatch.setenv("TOIR_ARCHIVE_WORKERS", "0")
+    monkeypatch.setenv("TOIR_BANDWIDTH", "*=100")
+
+    module.main(inbox_dir=tmp_path / "inbox")
+
+    assert "Запись: NOTES" in capsys.readouterr().out
+    log_file = next((tmp_path / "logs").glob("*.jsonl"))
+    summary = [
+        json.loads(line)
+        for line in log_file.read_text(encoding="utf-8").splitlines()
+        if '"inbox_summary"' in line
+    ][0]
+    throughput = summary["metadata"]["throughput"]
+    assert throughput["NOTES"]["bytes"] == 3000
+    assert throughput["NOTES"]["limit"] == 100
+    assert throughput["DEST_ROOT"]["bytes"] > 3000
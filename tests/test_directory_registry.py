@@ -0,0 +1,75 @@
+"""Тесты реестра каталогов запуска."""
+
+from __future__ import annotations
+
+import importlib.util
+from pathlib import Path
+
+from toir_manager.services.directory_registry import DirectoryRegistry
+
+MODULE_PATH = Path(__file__).resolve().parents[1] / "toir_raspredelenije.py"
+
+
+def _load_pipeline_module():
+    spec = importlib.util.spec_from_file_location("toir_raspredelenije", MODULE_PATH)
+    if spec is None or spec.loader is None:
+        raise RuntimeError("Failed to load toir_raspredelenije")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def test_registry_creates_each_directory_once(tmp_path) -> None:
+    registry = DirectoryRegistry()
+    target = tmp_path / "2025" / "01.January" / "LP" / "pdf"
+
+    registry.ensure(target)
+    registry.ensure(target)
+    registry.ensure(target.parent)
+
+    assert target.is_dir()
+    stats = registry.stats
+    assert stats.requests == 3
+    assert stats.mkdir_calls == 1
+    assert stats.avoided == 2
+    assert registry.is_known(tmp_path)
+
+
+def test_registry_exists_caches_only_positive_answers(tmp_path) -> None:
+    registry = DirectoryRegistry()
+    missing = tmp_path / "missing"
+
+    assert not registry.exists(missing)
+    missing.mkdir()
+    assert registry.exists(missing)
+    assert registry.exists(missing)
+
+    assert registry.stats.stat_calls == 2
+    assert registry.stats.hits == 1
+
+
+def test_main_reports_avoided_directory_calls(tmp_path, monkeypatch, capsys) -> None:
+    module = _load_pipeline_module()
+    inbox_dir = tmp_path / "inbox"
+    inbox_dir.mkdir()
+    monkeypatch.setattr(module, "NOTES_DIR", tmp_path / "notes")
+    monkeypatch.setattr(module, "TRA_GST_DIR", tmp_path / "gst")
+    monkeypatch.setattr(module, "TRA_SUB_APP_DIR", tmp_path / "tra_sub")
+    monkeypatch.setattr(module, "DEST_ROOT_DIR", tmp_path / "dest")
+    monkeypatch.setenv("TOIR_DISPATCH_DIR", str(tmp_path / "logs"))
+    monkeypatch.setenv("TOIR_ENABLE_TRA_SUB_APP", "0")
+    monkeypatch.setenv("TOIR_ARCHIVE_WORKERS", "0")
+
+    for index in range(3):
+        name = f"CT-DR-B-LP-UNIT-I.1.1-00-C-2025010{index + 1}-00_All.pdf"
+        project_dir = inbox_dir / name.replace(".pdf", "")
+        project_dir.mkdir()
+        (project_dir / name).write_text("pdf", encoding="utf-8")
+
+    module.main(inbox_dir=inbox_dir)
+
+    output = capsys.readouterr().out
+    stats_line = next(line for line in output.splitlines() if line.startswith("Каталоги:"))
+    avoided = int(stats_line.split("из памяти ")[1].split(",")[0])
+    assert avoided > 0
+    assert module.DIRECTORIES is None
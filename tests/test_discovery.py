@@ -0,0 +1,88 @@
+"""Тесты поиска проектов во входном каталоге."""
+
+from __future__ import annotations
+
+import importlib.util
+from pathlib import Path
+
+import pytest
+
+from toir_manager.services.discovery import DiscoveryStats, discover_projects
+
+MODULE_PATH = Path(__file__).resolve().parents[1] / "toir_raspredelenije.py"
+NAME = "CT-DR-B-LP-UNIT-I.1.1-00-C-20250101-00_All.pdf"
+
+
+def _load_pipeline_module():
+    spec = importlib.util.spec_from_file_location("toir_raspredelenije", MODULE_PATH)
+    if spec is None or spec.loader is None:
+        raise RuntimeError("Failed to load toir_raspredelenije")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def _touch(path: Path) -> Path:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text("pdf", encoding="utf-8")
+    return path
+
+
+@pytest.fixture()
+def inbox(tmp_path: Path) -> Path:
+    root = tmp_path / "inbox"
+    _touch(root / "a" / NAME)
+    _touch(root / "a" / "Native" / "cad" / "drawing.dwg")
+    _touch(root / "outer" / "inner" / NAME)
+    _touch(root / "b" / "notes.PDF")
+    _touch(root / "b" / "CT-X_All_copy.PDF")
+    return root
+
+
+def test_discovery_matches_rglob(inbox: Path) -> None:
+    projects = discover_projects(inbox)
+
+    expected = sorted(
+        {item.parent for item in inbox.rglob("*_All*.[pP][dD][fF]")},
+        key=lambda item: item.as_posix().lower(),
+    )
+    assert [item.path for item in projects] == expected
+    by_path = {item.path: item.candidates for item in projects}
+    assert by_path[inbox / "b"] == [inbox / "b" / "CT-X_All_copy.PDF"]
+
+
+def test_discovery_respects_depth_and_excludes(inbox: Path) -> None:
+    stats = DiscoveryStats()
+    shallow = discover_projects(inbox, max_depth=1, stats=stats)
+    assert {item.path.name for item in shallow} == {"a", "b"}
+    assert stats.depth_limited > 0
+
+    excluded = discover_projects(inbox, exclude=["Native", "outer/inner"])
+    assert {item.path.name for item in excluded} == {"a", "b"}
+
+
+def test_pipeline_env_configures_discovery(inbox: Path, monkeypatch) -> None:
+    module = _load_pipeline_module()
+    monkeypatch.setenv("TOIR_DISCOVERY_MAX_DEPTH", "1")
+    assert {item.name for item in module.find_project_folders(inbox)} == {"a", "b"}
+
+    monkeypatch.setenv("TOIR_DISCOVERY_MAX_DEPTH", "")
+    monkeypatch.setenv("TOIR_DISCOVERY_EXCLUDE", "outer; b")
+    assert [item.name for item in module.find_project_folders(inbox)] == ["a"]
+
+
+def test_planning_reuses_discovered_candidates(
+    inbox: Path, tmp_path: Path, monkeypatch
+) -> None:
+    module = _load_pipeline_module()
+    monkeypatch.setattr(module, "DEST_ROOT_DIR", tmp_path / "dest")
+    monkeypatch.setenv("TOIR_ENABLE_TRA_SUB_APP", "0")
+    projects = module.discover_inbox(inbox)
+
+    def _no_glob(self, pattern):  # noqa: ANN001
+        raise AssertionError(f"повторный просмотр {self}")
+
+    monkeypatch.setattr(Path, "glob", _no_glob)
+    plan = module.build_distribution_plan(inbox, projects)
+
+    assert [item.executable for item in plan.projects] == [True, False, True]
@@ -0,0 +1,140 @@
+"""Тесты разделения планирования и исполнения (--plan-only)."""
+
+from __future__ import annotations
+
+import importlib.util
+import json
+from pathlib import Path
+
+from toir_manager.core.logging_models import TransferAction
+
+MODULE_PATH = Path(__file__).resolve().parents[1] / "toir_raspredelenije.py"
+
+
+def _load_pipeline_module():
+    spec = importlib.util.spec_from_file_location("toir_raspredelenije", MODULE_PATH)
+    if spec is None or spec.loader is None:
+        raise RuntimeError("Failed to load toir_raspredelenije")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def _prepare(module, tmp_path: Path, monkeypatch) -> dict[str, Path]:
+    paths = {
+        "notes": tmp_path / "notes",
+        "gst": tmp_path / "gst",
+        "tra_sub": tmp_path / "tra_sub",
+        "dest": tmp_path / "dest",
+        "inbox": tmp_path / "inbox",
+    }
+    paths["inbox"].mkdir()
+    monkeypatch.setattr(module, "NOTES_DIR", paths["notes"])
+    monkeypatch.setattr(module, "TRA_GST_DIR", paths["gst"])
+    monkeypatch.setattr(module, "TRA_SUB_APP_DIR", paths["tra_sub"])
+    monkeypatch.setattr(module, "DEST_ROOT_DIR", paths["dest"])
+    monkeypatch.setattr(module, "LOGGER", None)
+    monkeypatch.setenv("TOIR_DISPATCH_DIR", str(tmp_path / "logs"))
+    monkeypatch.setenv("TOIR_ENABLE_TRA_SUB_APP", "0")
+    monkeypatch.setenv("TOIR_ARCHIVE_WORKERS", "0")
+    return paths
+
+
+def _make_project(inbox: Path, folder: str, filename: str) -> Path:
+    project_dir = inbox / folder
+    project_dir.mkdir()
+    (project_dir / filename).write_text("pdf", encoding="utf-8")
+    return project_dir
+
+
+def test_plan_project_does_not_touch_disk(tmp_path, monkeypatch) -> None:
+    module = _load_pipeline_module()
+    paths = _prepare(module, tmp_path, monkeypatch)
+    project_dir = _make_project(
+        paths["inbox"],
+        "Проект",
+        "CT-DR-B-CS-GCU3-II.18.2-00-1M-20250817-00_All.pdf",
+    )
+
+    plan = module.plan_project(project_dir)
+
+    assert project_dir.exists()
+    assert not paths["dest"].exists()
+    assert not paths["notes"].exists()
+    assert plan.executable
+    assert [item.kind for item in plan.renames] == ["folder"]
+    assert plan.project_path.name == module._transliterate_text("Проект")
+    assert plan.report_file.parent == plan.project_path
+    assert plan.destination_event[0] == "created"
+    assert plan.gst_folder == "2025_T33_GST"
+    pdf_dir = paths["dest"] / "2025" / "08.August" / "CS" / "pdf" / "II.18_UPS"
+    assert plan.copy_for(TransferAction.COPY_DESTINATION).target.parent == pdf_dir
+    assert plan.archive.target.name == f"{plan.project_path.name}.zip"
+    assert pdf_dir in plan.directories
+
+
+def test_plan_only_writes_json_without_side_effects(tmp_path, monkeypatch) -> None:
+    module = _load_pipeline_module()
+    paths = _prepare(module, tmp_path, monkeypatch)
+    _make_project(
+        paths["inbox"],
+        "CT-DR-B-LP-UNIT1-I.1.1-00-C-20250101-00_All",
+        "CT-DR-B-LP-UNIT1-I.1.1-00-C-20250101-00_All.pdf",
+    )
+    _make_project(
+        paths["inbox"],
+        "broken",
+        "CT-XX_All.pdf",
+    )
+    plan_path = tmp_path / "plan.json"
+
+    module.main(inbox_dir=paths["inbox"], plan_only=str(plan_path))
+
+    payload = json.loads(plan_path.read_text(encoding="utf-8"))
+    assert payload["summary"]["projects"] == 2
+    assert payload["summary"]["executable"] == 1
+    by_reason = {item["skip_reason"]: item for item in payload["projects"]}
+    assert by_reason["no_matching_files"]["issues"]
+    actions = [item["action"] for item in by_reason[None]["copies"]]
+    assert actions == ["copy_notes", "copy_gst", "copy_destination"]
+    assert not paths["dest"].exists()
+    assert not paths["notes"].exists()
+    assert not (tmp_path / "logs").exists()
+
+
+def test_plan_only_to_stdout_keeps_chatter_on_stderr(
+    tmp_path, monkeypatch, capsys
+) -> None:
+    module = _load_pipeline_module()
+    paths = _prepare(module, tmp_path, monkeypatch)
+    _make_project(
+        paths["inbox"],
+        "CT-DR-B-LP-UNIT1-I.1.1-00-C-20250101-00_All",
+        "CT-DR-B-LP-UNIT1-I.1.1-00-C-20250101-00_All.pdf",
+    )
+
+    module.main(inbox_dir=paths["inbox"], plan_only="-")
+
+    captured = capsys.readouterr()
+    payload = json.loads(captured.out)
+    assert payload["summary"]["copies"] == 3
+    assert "Обрабатываем проект" in captured.err
+
+
+def test_executor_applies_plan(tmp_path, monkeypatch) -> None:
+    module = _load_pipeline_module()
+    paths = _prepare(module, tmp_path, monkeypatch)
+    name = "CT-DR-B-LP-UNIT1-I.1.1-00-C-20250101-00_All.pdf"
+    project_dir = _make_project(paths["inbox"], "Отчёт", name)
+
+    plan = module.build_distribution_plan(paths["inbox"], [project_dir])
+    module.execute_distribution_plan(plan)
+
+    renamed = plan.projects[0].project_path
+    assert not project_dir.exists()
+    assert (renamed / name).exists()
+    assert (paths["notes"] / name).exists()
+    assert any(paths["dest"].rglob(name))
+    assert any(paths["dest"].rglob(f"{renamed.name}.zip"))
+    for directory in plan.directories():
+        assert directory.is_dir()
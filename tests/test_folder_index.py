@@ -0,0 +1,103 @@
+"""Тесты индекса папок CS для поиска по префиксу."""
+
+from __future__ import annotations
+
+import importlib.util
+import json
+from pathlib import Path
+
+from toir_manager.services.folder_index import FolderIndex
+
+MODULE_PATH = Path(__file__).resolve().parents[1] / "toir_raspredelenije.py"
+
+
+def _load_pipeline_module():
+    spec = importlib.util.spec_from_file_location("toir_raspredelenije", MODULE_PATH)
+    if spec is None or spec.loader is None:
+        raise RuntimeError("Failed to load toir_raspredelenije")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def test_find_prefix_matches_sorted_glob(tmp_path) -> None:
+    for name in ("II.1_Pumps", "II.10_Valves", "II.1", "II.2_Other", "I.1"):
+        (tmp_path / name).mkdir()
+    index = FolderIndex()
+
+    for prefix in ("II.1", "II.2", "II.3", "I"):
+        expected = sorted(tmp_path.glob(f"{prefix}*"))
+        assert index.find_prefix(tmp_path, prefix) == expected
+
+    assert index.listings == 1
+
+
+def test_add_updates_listing_without_rescan(tmp_path) -> None:
+    parent = tmp_path / "pdf"
+    index = FolderIndex()
+
+    assert index.find_prefix(parent, "II.18") == []
+    index.add(parent, "II.18_UPS")
+    index.add(parent, "II.18_UPS")
+
+    assert index.find_prefix(parent, "II.18") == [parent / "II.18_UPS"]
+    assert index.listings == 1
+
+
+def test_cs_projects_share_one_listing(tmp_path, monkeypatch) -> None:
+    module = _load_pipeline_module()
+    inbox_dir = tmp_path / "inbox"
+    inbox_dir.mkdir()
+    monkeypatch.setattr(module, "DEST_ROOT_DIR", tmp_path / "dest")
+    monkeypatch.setenv("TOIR_ENABLE_NOTES", "0")
+    monkeypatch.setenv("TOIR_ENABLE_TRA_GST", "0")
+    monkeypatch.setenv("TOIR_ENABLE_TRA_SUB_APP", "0")
+
+    folders = []
+    for index in range(3):
+        name = f"CT-DR-B-CS-GCU{index}-II.18.2-00-1M-2025081{index}-00_All.pdf"
+        project_dir = inbox_dir / name.replace(".pdf", "")
+        project_dir.mkdir()
+        (project_dir / name).write_text("pdf", encoding="utf-8")
+        folders.append(project_dir)
+
+    monkeypatch.setattr(module, "FOLDERS", FolderIndex())
+    plan = module.build_distribution_plan(inbox_dir, folders)
+
+    events = [project.destination_event[0] for project in plan.projects]
+    assert events == ["created", "created", "created"]
+    assert module.FOLDERS.listings == 1
+    assert module.FOLDERS.lookups == 3
+    pdf_parent = tmp_path / "dest" / "2025" / "08.August" / "CS" / "pdf"
+    assert module.FOLDERS.find_prefix(pdf_parent, "II.18") == []
+
+
+def test_planned_folder_is_indexed_after_creation(tmp_path, monkeypatch) -> None:
+    module = _load_pipeline_module()
+    inbox_dir = tmp_path / "inbox"
+    monkeypatch.setattr(module, "NOTES_DIR", tmp_path / "notes")
+    monkeypatch.setattr(module, "TRA_GST_DIR", tmp_path / "gst")
+    monkeypatch.setattr(module, "TRA_SUB_APP_DIR", tmp_path / "tra_sub")
+    monkeypatch.setattr(module, "DEST_ROOT_DIR", tmp_path / "dest")
+    monkeypatch.setenv("TOIR_DISPATCH_DIR", str(tmp_path / "logs"))
+    monkeypatch.setenv("TOIR_ENABLE_NOTES", "0")
+    monkeypatch.setenv("TOIR_ENABLE_TRA_GST", "0")
+    monkeypatch.setenv("TOIR_ENABLE_TRA_SUB_APP", "0")
+    monkeypatch.setenv("TOIR_ARCHIVE_WORKERS", "0")
+    monkeypatch.setenv("TOIR_WORKERS", "1")
+    for index in range(2):
+        name = f"CT-DR-B-CS-GCU{index}-II.18.2-00-1M-2025081{index}-00_All"
+        (inbox_dir / name).mkdir(parents=True)
+        (inbox_dir / name / f"{name}.pdf").write_text("pdf", encoding="utf-8")
+
+    module.main(inbox_dir=inbox_dir, plan_only=str(tmp_path / "plan.json"))
+    assert not (tmp_path / "dest").exists()
+    module.main(inbox_dir=inbox_dir)
+
+    log_file = next((tmp_path / "logs").glob("*.jsonl"))
+    events = [
+        json.loads(line)["metadata"]["destination_event"]
+        for line in log_file.read_text(encoding="utf-8").splitlines()
+        if '"destination_event"' in line
+    ]
+    assert events == ["created", "found"]
@@ -0,0 +1,214 @@
+"""Тесты индекса рабочих недель 04_TRA_GST."""
+
+from __future__ import annotations
+
+import importlib.util
+import os
+from pathlib import Path
+
+import pytest
+
+from toir_manager.services.file_lock import FileLock
+from toir_manager.services.gst_index import (
+    GST_ALLOCATION_LOCK_NAME,
+    GstWeekAllocator,
+    GstWeekIndex,
+)
+
+MODULE_PATH = Path(__file__).resolve().parents[1] / "toir_raspredelenije.py"
+
+
+def _load_pipeline_module():
+    spec = importlib.util.spec_from_file_location("toir_raspredelenije", MODULE_PATH)
+    if spec is None or spec.loader is None:
+        raise RuntimeError("Failed to load toir_raspredelenije")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def _lock_week(root: Path, folder: str, name: str = "CT-GST-TRA-PRM-001.zip") -> None:
+    (root / folder).mkdir(parents=True, exist_ok=True)
+    (root / folder / name).write_bytes(b"")
+
+
+def test_first_free_week_scans_each_folder_once(tmp_path) -> None:
+    _lock_week(tmp_path, "2025_T2_GST")
+    _lock_week(tmp_path, "2025_T3_GST", "CT-GST-TRA-PRM-002.7Z")
+    (tmp_path / "2025_T4_GST").mkdir()
+    (tmp_path / "2025_T4_GST" / "CT-GST-TRA-PRM-003.pdf").write_bytes(b"")
+    index = GstWeekIndex(tmp_path)
+
+    assert index.first_free_week("2025", 2) == 4
+    assert index.first_free_week("2025", 3) == 4
+    assert index.first_free_week("2025", 2) == 4
+    assert index.first_free_week("2025", 4) == 4
+
+    assert index.scans == 3
+
+
+def test_invalidate_rechecks_folder(tmp_path) -> None:
+    index = GstWeekIndex(tmp_path)
+    assert index.first_free_week("2025", 10) == 10
+
+    _lock_week(tmp_path, "2025_T10_GST")
+    assert index.first_free_week("2025", 10) == 10
+
+    index.invalidate("2025_T10_GST")
+    assert index.first_free_week("2025", 10) == 11
+
+
+def test_pipeline_plans_next_free_week(tmp_path, monkeypatch) -> None:
+    module = _load_pipeline_module()
+    gst_dir = tmp_path / "gst"
+    _lock_week(gst_dir, "2025_T1_GST")
+    monkeypatch.setattr(module, "TRA_GST_DIR", gst_dir)
+    context = module.RunContext(
+        config=module.resolve_run_config(), gst_index=GstWeekIndex(gst_dir)
+    )
+
+    report = tmp_path / "CT-DR-B-LP-UNIT-I.1.1-00-C-20250101-00_All.pdf"
+    first = module._resolve_gst_target(context, report, "20250101", gst_dir)
+    second = module._resolve_gst_target(context, report, "20250102", gst_dir)
+
+    assert first.target.parent.name == "2025_T2_GST"
+    assert second.metadata["week"] == "2"
+    assert context.gst_index.scans == 2
+
+
+def test_pdf_copies_keep_week_cache(tmp_path, monkeypatch) -> None:
+    module = _load_pipeline_module()
+    gst_dir = tmp_path / "gst"
+    _lock_week(gst_dir, "2025_T1_GST")
+    projects = []
+    for index in (1, 2):
+        name = f"CT-DR-B-LP-UNIT{index}-I.1.1-00-C-2025010{index}-00_All"
+        project = tmp_path / "inbox" / name
+        project.mkdir(parents=True)
+        (project / f"{name}.pdf").write_text("pdf", encoding="utf-8")
+        projects.append(project)
+    config = module.resolve_run_config(
+        settings={
+            "TOIR_NOTES_DIR": str(tmp_path / "notes"),
+            "TOIR_TRA_GST_DIR": str(gst_dir),
+            "TOIR_DEST_ROOT_DIR": str(tmp_path / "dest"),
+            "TOIR_ENABLE_TRA_SUB_APP": "0",
+        }
+    )
+
+    with module._run_context(config) as context:
+        plan = module.build_distribution_plan(tmp_path / "inbox", projects, 1, context)
+        module.execute_distribution_plan(plan, 1, context)
+        scans = context.gst_index.scans
+        assert context.gst_index.first_free_week("2025", 1) == 2
+        assert context.gst_index.scans == scans
+
+    assert len(list((gst_dir / "2025_T2_GST").glob("*.pdf"))) == 2
+
+
+def test_file_lock_is_exclusive_and_breaks_stale_owner(tmp_path) -> None:
+    path = tmp_path / "week.lock"
+    with FileLock(path):
+        with pytest.raises(TimeoutError):
+            FileLock(path, timeout=0).acquire()
+    assert not path.exists()
+
+    path.write_text("crashed 1 token", encoding="utf-8")
+    with FileLock(path, timeout=0, stale_after=-1) as lock:
+        assert path.read_text(encoding="utf-8").endswith(lock._token)
+
+
+def test_file_lock_expiry_comes_from_owner_not_mtime(tmp_path) -> None:
+    path = tmp_path / "week.lock"
+    path.write_text("other 1 9999999999.000 token", encoding="utf-8")
+    os.utime(path, (0, 0))
+
+    with pytest.raises(TimeoutError):
+        FileLock(path, timeout=0).acquire()
+    assert path.exists()
+
+
+def test_file_lock_keeps_lock_taken_over_by_another_waiter(
+    tmp_path, monkeypatch
+) -> None:
+    path = tmp_path / "week.lock"
+    path.write_text("crashed 1 0.000 old", encoding="utf-8")
+    fresh = FileLock(path)
+    waiter = FileLock(path, timeout=0)
+    real_expired = FileLock._expired
+
+    def expired_then_taken(self, owner):
+        # Другой ожидающий успел убрать старую блокировку и взять новую
+        result = real_expired(self, owner)
+        path.unlink()
+        fresh.acquire()
+        return result
+
+    monkeypatch.setattr(FileLock, "_expired", expired_then_taken)
+    assert not waiter._break_stale()
+    monkeypatch.undo()
+
+    assert path.read_text(encoding="utf-8").endswith(fresh._token)
+    with pytest.raises(TimeoutError):
+        waiter.acquire()
+    fresh.release()
+    assert not path.exists()
+
+
+def test_allocator_moves_week_locked_after_planning(tmp_path) -> None:
+    index = GstWeekIndex(tmp_path)
+    allocator = GstWeekAllocator(index)
+    assert index.first_free_week("2025", 1) == 1
+
+    _lock_week(tmp_path, "2025_T1_GST")
+
+    with allocator.reserve("2025", 1) as week:
+        assert week == 2
+    assert index.first_free_week("2025", 1) == 2
+    assert allocator.moved == 1
+    assert not (tmp_path / GST_ALLOCATION_LOCK_NAME).exists()
+
+
+def test_allocator_holds_lock_until_report_is_written(tmp_path) -> None:
+    index = GstWeekIndex(tmp_path)
+    allocator = GstWeekAllocator(index)
+    other = GstWeekAllocator(GstWeekIndex(tmp_path), timeout=0)
+
+    with allocator.reserve("2025", 5) as week:
+        assert week == 5
+        assert (tmp_path / GST_ALLOCATION_LOCK_NAME).exists()
+        with pytest.raises(TimeoutError):
+            with other.reserve("2025", 5):
+                pass
+        _lock_week(tmp_path, "2025_T5_GST")
+
+    with allocator.reserve("2025", 5) as week:
+        assert week == 6
+    assert allocator.decisions == 2
+    assert index.scans == 3
+
+
+def test_pipeline_copies_into_week_confirmed_at_execution(tmp_path, monkeypatch) -> None:
+    module = _load_pipeline_module()
+    gst_dir = tmp_path / "gst"
+    name = "CT-DR-B-LP-UNIT-I.1.1-00-C-20250101-00_All"
+    project = tmp_path / "inbox" / name
+    project.mkdir(parents=True)
+    (project / f"{name}.pdf").write_text("pdf", encoding="utf-8")
+    config = module.resolve_run_config(
+        settings={
+            "TOIR_NOTES_DIR": str(tmp_path / "notes"),
+            "TOIR_TRA_GST_DIR": str(gst_dir),
+            "TOIR_DEST_ROOT_DIR": str(tmp_path / "dest"),
+            "TOIR_ENABLE_TRA_SUB_APP": "0",
+            "TOIR_ARCHIVE_WORKERS": "0",
+        }
+    )
+
+    with module._run_context(config) as context:
+        plan = module.build_distribution_plan(project.parent, [project], 1, context)
+        _lock_week(gst_dir, "2025_T1_GST")
+        module.execute_distribution_plan(plan, 1, context)
+
+    assert (gst_dir / "2025_T2_GST" / f"{name}.pdf").exists()
+    assert not (gst_dir / "2025_T1_GST" / f"{name}.pdf").exists()
@@ -0,0 +1,52 @@
+"""Повторный запуск по тем же данным пропускает уже актуальные цели."""
+
+from __future__ import annotations
+
+import importlib.util
+from pathlib import Path
+
+from toir_manager.core.logging_models import TransferStatus
+from toir_manager.services.log_writer import DispatchLogger, iter_run_logs
+
+MODULE_PATH = Path(__file__).resolve().parents[1] / "toir_raspredelenije.py"
+
+
+def _load_pipeline_module():
+    spec = importlib.util.spec_from_file_location("toir_raspredelenije", MODULE_PATH)
+    if spec is None or spec.loader is None:
+        raise RuntimeError("Failed to load toir_raspredelenije")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def test_second_run_skips_identical_targets(tmp_path, monkeypatch) -> None:
+    module = _load_pipeline_module()
+    for attr, name in (
+        ("NOTES_DIR", "notes"),
+        ("TRA_GST_DIR", "gst"),
+        ("TRA_SUB_APP_DIR", "tra_sub"),
+        ("DEST_ROOT_DIR", "dest"),
+    ):
+        path = tmp_path / name
+        path.mkdir()
+        monkeypatch.setattr(module, attr, path)
+    monkeypatch.setenv("TOIR_SKIP_IDENTICAL", "1")
+
+    name = "CT-DR-B-LP-UNIT-I.1.1-00-C-20250101-00_All.pdf"
+    project_dir = tmp_path / "inbox" / name.replace(".pdf", "")
+    project_dir.mkdir(parents=True)
+    (project_dir / name).write_bytes(b"pdf")
+
+    statuses: list[list[TransferStatus]] = []
+    for run_id in ("first", "second"):
+        with DispatchLogger(base_dir=tmp_path / "logs", run_id=run_id) as logger:
+            monkeypatch.setattr(module, "LOGGER", logger)
+            module.process_project_folder(project_dir)
+        statuses.append(
+            [entry.status for entry in iter_run_logs(run_id, tmp_path / "logs")]
+        )
+
+    assert TransferStatus.SKIPPED not in statuses[0]
+    assert len(statuses[1]) == len(statuses[0])
+    assert set(statuses[1]) == {TransferStatus.SKIPPED}
@@ -0,0 +1,92 @@
+"""Тесты очередей записи по корням назначения."""
+
+from __future__ import annotations
+
+import importlib.util
+import json
+import threading
+import time
+from pathlib import Path
+
+from toir_manager.services.io_queues import DestinationQueues, parse_concurrency
+
+MODULE_PATH = Path(__file__).resolve().parents[1] / "toir_raspredelenije.py"
+NAME = "CT-DR-B-LP-UNIT-I.1.1-00-C-20250101-00_All"
+
+
+def _load_pipeline_module():
+    spec = importlib.util.spec_from_file_location("toir_raspredelenije", MODULE_PATH)
+    if spec is None or spec.loader is None:
+        raise RuntimeError("Failed to load toir_raspredelenije")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def test_slow_root_does_not_block_other_roots(tmp_path) -> None:
+    release = threading.Event()
+    roots = {"NOTES": tmp_path / "notes", "DEST_ROOT": tmp_path / "dest"}
+    limits = parse_concurrency("notes=1, *=3")
+    assert limits == {"NOTES": 1, "*": 3}
+
+    with DestinationQueues(roots, limits) as queues:
+        slow = [
+            queues.submit(tmp_path / "notes" / f"{index}.pdf", release.wait, 5)
+            for index in range(3)
+        ]
+        fast = [
+            queues.submit(tmp_path / "dest" / f"{index}.pdf", time.sleep, 0.01)
+            for index in range(6)
+        ]
+        for future in fast:
+            future.result(timeout=5)
+        assert not any(future.done() for future in slow)
+        release.set()
+
+    stats = {item.root: item for item in queues.stats()}
+    assert stats["NOTES"].tasks == 3 and stats["NOTES"].peak == 1
+    assert stats["DEST_ROOT"].tasks == 6 and stats["DEST_ROOT"].peak <= 3
+    assert queues.root_for(tmp_path / "other" / "a.pdf") == "OTHER"
+
+
+def test_pipeline_writes_each_root_independently(tmp_path, monkeypatch, capsys) -> None:
+    module = _load_pipeline_module()
+    project_dir = tmp_path / "inbox" / NAME
+    project_dir.mkdir(parents=True)
+    (project_dir / f"{NAME}.pdf").write_text("pdf", encoding="utf-8")
+    notes_dir = (tmp_path / "notes").resolve()
+
+    monkeypatch.setattr(module, "NOTES_DIR", notes_dir)
+    monkeypatch.setattr(module, "TRA_GST_DIR", tmp_path / "gst")
+    monkeypatch.setattr(module, "DEST_ROOT_DIR", tmp_path / "dest")
+    monkeypatch.setenv("TOIR_DISPATCH_DIR", str(tmp_path / "logs"))
+    monkeypatch.setenv("TOIR_ENABLE_TRA_SUB_APP", "0")
+    monkeypatch.setenv("TOIR_ARCHIVE_WORKERS", "0")
+    monkeypatch.setenv("TOIR_IO_QUEUES", "1")
+
+    real = module.distribute_file
+
+    def slow_notes(source, targets, **kwargs):
+        if any(Path(target).parent == notes_dir for target in targets):
+            time.sleep(0.2)
+        return real(source, targets, **kwargs)
+
+    monkeypatch.setattr(module, "distribute_file", slow_notes)
+    module.main(inbox_dir=tmp_path / "inbox")
+
+    output = capsys.readouterr().out
+    assert "Очереди записи: " in output
+    block = output.split("--- Раскладываем проект: ")[1]
+    # Вывод задач очередей печатается в блоке своего проекта
+    assert f"File copied to {notes_dir}" in block
+    assert "Архив сохранён" in block
+
+    log_file = next((tmp_path / "logs").glob("*.jsonl"))
+    actions = [
+        json.loads(line)["action"]
+        for line in log_file.read_text(encoding="utf-8").splitlines()
+        if '"status": "success"' in line
+    ]
+    assert actions.index("copy_destination") < actions.index("copy_notes")
+    assert actions.index("copy_archive") > actions.index("copy_notes")
+    assert (notes_dir / f"{NAME}.pdf").exists()
@@ -0,0 +1,158 @@
+"""Тесты аренды папок проектов общего INBOX."""
+
+from __future__ import annotations
+
+import importlib.util
+import json
+from pathlib import Path
+
+from toir_manager.services.leases import LEASE_DIR_NAME, LeaseManager, lease_key
+
+MODULE_PATH = Path(__file__).resolve().parents[1] / "toir_raspredelenije.py"
+FIRST = "CT-DR-B-LP-UNIT1-I.1.1-00-C-20250101-00_All"
+SECOND = "CT-DR-B-LP-UNIT2-I.1.1-00-C-20250101-00_All"
+
+
+def _load_pipeline_module():
+    spec = importlib.util.spec_from_file_location("toir_raspredelenije", MODULE_PATH)
+    if spec is None or spec.loader is None:
+        raise RuntimeError("Failed to load toir_raspredelenije")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+class _Clock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_lease_is_exclusive_until_expired(tmp_path) -> None:
+    clock = _Clock()
+    first = LeaseManager(tmp_path, ttl=60, clock=clock, hostname="node-a", pid=1)
+    second = LeaseManager(tmp_path, ttl=60, clock=clock, hostname="node-b", pid=2)
+
+    lease = first.acquire("project", "P1")
+    assert lease is not None
+    assert second.acquire("project") is None
+
+    clock.now += 30
+    assert first.renew(lease)
+    clock.now += 45
+    assert second.acquire("project") is None
+
+    clock.now += 60
+    taken = second.acquire("project")
+    assert taken is not None
+    assert not first.renew(lease)
+    assert json.loads((tmp_path / "project.lease").read_text())["token"] == taken.token
+    assert second.renew(taken)
+    first.release(lease)
+    assert (tmp_path / "project.lease").exists()
+
+
+def test_renew_does_not_overwrite_new_owner(tmp_path) -> None:
+    clock = _Clock()
+    first = LeaseManager(tmp_path, ttl=60, clock=clock, hostname="node-a")
+    second = LeaseManager(tmp_path, ttl=60, clock=clock, hostname="node-b")
+    lease = first.acquire("project")
+    assert lease is not None
+    clock.now += 61
+    taken = []
+    original_read = first._read
+
+    def read_during_takeover(path: Path):
+        # Другой узел забирает просроченную аренду сразу после проверки токена
+        payload = original_read(path)
+        if not taken:
+            taken.append(second.acquire("project"))
+        return payload
+
+    first._read = read_during_takeover  # type: ignore[method-assign]
+
+    assert not first.renew(lease)
+    assert taken[0] is not None
+    owner = json.loads((tmp_path / "project.lease").read_text(encoding="utf-8"))
+    assert owner["token"] == taken[0].token
+    assert second.renew(taken[0])
+
+
+def test_done_marker_blocks_until_ttl(tmp_path) -> None:
+    clock = _Clock()
+    first = LeaseManager(tmp_path, ttl=60, done_ttl=600, clock=clock, hostname="a")
+    second = LeaseManager(tmp_path, ttl=60, done_ttl=600, clock=clock, hostname="b")
+
+    lease = first.acquire("project")
+    first.release(lease, done=True, aliases=("renamed",))
+
+    assert not (tmp_path / "project.lease").exists()
+    assert second.acquire("project") is None
+    assert second.acquire("renamed") is None
+    clock.now += 601
+    assert second.acquire("project") is not None
+
+
+def test_pipeline_skips_projects_leased_by_other_node(tmp_path, monkeypatch) -> None:
+    module = _load_pipeline_module()
+    inbox_dir = tmp_path / "inbox"
+    notes_dir = tmp_path / "notes"
+    for name in (FIRST, SECOND):
+        (inbox_dir / name).mkdir(parents=True)
+        (inbox_dir / name / f"{name}.pdf").write_text("pdf", encoding="utf-8")
+    other = LeaseManager(inbox_dir / LEASE_DIR_NAME, ttl=600, hostname="other")
+    assert other.acquire(lease_key(inbox_dir, inbox_dir / SECOND)) is not None
+
+    monkeypatch.setattr(module, "NOTES_DIR", notes_dir)
+    monkeypatch.setattr(module, "TRA_GST_DIR", tmp_path / "gst")
+    monkeypatch.setattr(module, "DEST_ROOT_DIR", tmp_path / "dest")
+    monkeypatch.setenv("TOIR_DISPATCH_DIR", str(tmp_path / "logs"))
+    monkeypatch.setenv("TOIR_ENABLE_TRA_SUB_APP", "0")
+    monkeypatch.setenv("TOIR_ARCHIVE_WORKERS", "0")
+    monkeypatch.setenv("TOIR_LEASES", "1")
+
+    module.main(inbox_dir=inbox_dir)
+
+    assert (notes_dir / f"{FIRST}.pdf").exists()
+    assert not (notes_dir / f"{SECOND}.pdf").exists()
+    lease_dir = inbox_dir / LEASE_DIR_NAME
+    assert (lease_dir / f"{lease_key(inbox_dir, inbox_dir / FIRST)}.done").exists()
+
+    (notes_dir / f"{FIRST}.pdf").unlink()
+    module.main(inbox_dir=inbox_dir)
+
+    assert not (notes_dir / f"{FIRST}.pdf").exists()
+
+
+def test_failed_project_is_not_marked_done(tmp_path, monkeypatch) -> None:
+    module = _load_pipeline_module()
+    inbox_dir = tmp_path / "inbox"
+    (inbox_dir / FIRST).mkdir(parents=True)
+    (inbox_dir / FIRST / f"{FIRST}.pdf").write_text("pdf", encoding="utf-8")
+    notes_dir = tmp_path / "notes"
+    # Каталог на месте файла отчёта — копирование в 03_Notes не удастся
+    (notes_dir / f"{FIRST}.pdf").mkdir(parents=True)
+
+    monkeypatch.setattr(module, "NOTES_DIR", notes_dir)
+    monkeypatch.setattr(module, "TRA_GST_DIR", tmp_path / "gst")
+    monkeypatch.setattr(module, "DEST_ROOT_DIR", tmp_path / "dest")
+    monkeypatch.setenv("TOIR_DISPATCH_DIR", str(tmp_path / "logs"))
+    monkeypatch.setenv("TOIR_ENABLE_TRA_SUB_APP", "0")
+    monkeypatch.setenv("TOIR_ARCHIVE_WORKERS", "0")
+    monkeypatch.setenv("TOIR_RETRY_ATTEMPTS", "1")
+    monkeypatch.setenv("TOIR_LEASES", "1")
+
+    module.main(inbox_dir=inbox_dir)
+
+    lease_dir = inbox_dir / LEASE_DIR_NAME
+    key = lease_key(inbox_dir, inbox_dir / FIRST)
+    assert not (lease_dir / f"{key}.done").exists()
+    assert not (lease_dir / f"{key}.lease").exists()
+
+    (notes_dir / f"{FIRST}.pdf").rmdir()
+    module.main(inbox_dir=inbox_dir)
+
+    assert (notes_dir / f"{FIRST}.pdf").is_file()
+    assert (lease_dir / f"{key}.done").exists()
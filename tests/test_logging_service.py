@@ -46,4 +46,4 @@ def test_dispatch_logger_writes_jsonl(tmp_path: Path) -> None:
     assert runs and runs[0].total_records == 2
 
     summary = summarize_entries(entries)
-    assert summary == {"total": 2, "success": 1, "errors": 1}
+    assert summary == {"total": 2, "success": 1, "errors": 1, "skipped": 0}
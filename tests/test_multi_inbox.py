@@ -0,0 +1,82 @@
+"""Тесты запуска по нескольким входным каталогам."""
+
+from __future__ import annotations
+
+import importlib.util
+from pathlib import Path
+
+from toir_manager.core.logging_models import TransferAction
+from toir_manager.core.run_config import InboxSource
+from toir_manager.services.log_reader import inbox_summaries, summarize_entries
+from toir_manager.services.log_writer import iter_logs
+
+MODULE_PATH = Path(__file__).resolve().parents[1] / "toir_raspredelenije.py"
+LP_NAME = "CT-DR-B-LP-UNIT-I.1.1-00-C-20250101-00_All"
+OTHER_LP_NAME = "CT-DR-B-LP-UNIT2-I.1.1-00-C-20250101-00_All"
+
+
+def _load_pipeline_module():
+    spec = importlib.util.spec_from_file_location("toir_raspredelenije", MODULE_PATH)
+    if spec is None or spec.loader is None:
+        raise RuntimeError("Failed to load toir_raspredelenije")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def _make_project(inbox: Path, name: str) -> None:
+    (inbox / name).mkdir(parents=True)
+    (inbox / name / f"{name}.pdf").write_text("pdf", encoding="utf-8")
+
+
+def test_parse_inbox_source(tmp_path) -> None:
+    module = _load_pipeline_module()
+
+    assert module.parse_inbox_source(f"{tmp_path}=lp") == InboxSource(
+        tmp_path.resolve(), "LP"
+    )
+    assert module.parse_inbox_source(str(tmp_path / "a=b")) == InboxSource(
+        (tmp_path / "a=b").resolve()
+    )
+    config = module.resolve_run_config(
+        settings={"TOIR_INBOX_DIRS": f"{tmp_path / 'a'};{tmp_path / 'b'}=CS"}
+    )
+    assert [item.part_filter for item in config.inboxes] == [None, "CS"]
+    assert config.inbox_dir == (tmp_path / "a").resolve()
+
+
+def test_main_processes_each_inbox_with_own_filter(tmp_path, monkeypatch) -> None:
+    module = _load_pipeline_module()
+    logs_dir = tmp_path / "logs"
+    notes_dir = tmp_path / "notes"
+    first = tmp_path / "contractor_a"
+    second = tmp_path / "contractor_b"
+    _make_project(first, LP_NAME)
+    _make_project(second, OTHER_LP_NAME)
+
+    monkeypatch.setattr(module, "NOTES_DIR", notes_dir)
+    monkeypatch.setattr(module, "TRA_GST_DIR", tmp_path / "gst")
+    monkeypatch.setattr(module, "DEST_ROOT_DIR", tmp_path / "dest")
+    monkeypatch.setenv("TOIR_DISPATCH_DIR", str(logs_dir))
+    monkeypatch.setenv("TOIR_ENABLE_TRA_SUB_APP", "0")
+    monkeypatch.setenv("TOIR_ARCHIVE_WORKERS", "0")
+
+    module.main(inbox_dir=[str(first), f"{second}=CS"])
+
+    assert (notes_dir / f"{LP_NAME}.pdf").exists()
+    assert not (notes_dir / f"{OTHER_LP_NAME}.pdf").exists()
+
+    entries = list(iter_logs(base_dir=logs_dir))
+    summaries = inbox_summaries(entries)
+    assert [item["inbox"] for item in summaries] == [
+        str(first.resolve()),
+        str(second.resolve()),
+    ]
+    assert [item["part_filter"] for item in summaries] == ["CS/LP", "CS"]
+    assert summaries[0]["success"] > 0
+    assert summaries[1]["success"] == 0
+    assert summaries[1]["projects"] == 1
+    operations = [
+        entry for entry in entries if entry.action != TransferAction.INBOX_SUMMARY
+    ]
+    assert summarize_entries(entries)["total"] == len(operations)
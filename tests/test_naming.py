@@ -0,0 +1,120 @@
+"""Тесты пакетной транслитерации и проверки имён."""
+
+from __future__ import annotations
+
+import importlib.util
+from pathlib import Path
+
+from toir_manager.core.logging_models import TransferAction
+from toir_manager.services.naming import (
+    ALLOWED_ASCII_CHARS,
+    TRANSLIT_MAP,
+    NameTable,
+    parse_name,
+    transliterate,
+)
+
+MODULE_PATH = Path(__file__).resolve().parents[1] / "toir_raspredelenije.py"
+NAME = "CT-DR-B-CS-GCU3-II.18.2-00-1M-20250817-00_All.pdf"
+
+
+def _load_pipeline_module():
+    spec = importlib.util.spec_from_file_location("toir_raspredelenije", MODULE_PATH)
+    if spec is None or spec.loader is None:
+        raise RuntimeError("Failed to load toir_raspredelenije")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def _per_char(value: str) -> str:
+    result: list[str] = []
+    for char in value:
+        if char in TRANSLIT_MAP:
+            result.append(TRANSLIT_MAP[char])
+        elif char in ALLOWED_ASCII_CHARS:
+            result.append(char)
+        else:
+            result.append("_")
+    return "".join(result)
+
+
+def test_transliterate_matches_per_char_reference() -> None:
+    samples = [
+        "",
+        NAME,
+        "Проект ёлка (копия)",
+        "CT-DR-B-СS-ГЦУ-II.1-00-С-20250101-00_All",
+        "tab\tand/slash\\é",
+        "ЖЖЖ-щщщ.PDF",
+    ]
+    for sample in samples:
+        assert transliterate(sample) == _per_char(sample)
+    assert transliterate(NAME) is NAME
+
+
+def test_parse_name_fields() -> None:
+    parsed = parse_name(NAME)
+
+    assert parsed is not None
+    assert (parsed.type, parsed.part, parsed.tz_index, parsed.period, parsed.date) == (
+        "DR",
+        "CS",
+        "II.18.2",
+        "1M",
+        "20250817",
+    )
+    assert list(parsed.as_dict()) == [
+        "type",
+        "scope",
+        "part",
+        "object_name",
+        "tz_index",
+        "reserved",
+        "period",
+        "date",
+        "revision",
+    ]
+    assert parse_name("notes.pdf") is None
+
+
+def test_name_table_finds_conflicts_up_front(tmp_path: Path) -> None:
+    first = tmp_path / "Р1"
+    second = tmp_path / "П1"
+    taken = tmp_path / "Д1"
+    (tmp_path / "_1").mkdir()
+    files = [first / "Х_All.PDF", first / "X_All.pdf", first / "Ц_All.pdf"]
+
+    table = NameTable.build([(first, files), (second, []), (taken, [])])
+
+    assert table.folder(first).conflict is None
+    assert table.folder(second).conflict == "duplicate"
+    assert table.folder(second).conflict_with == first
+    assert table.folder(taken).conflict == "exists"
+    entries = table.folder(first).files
+    assert [(item.target_name, item.conflict) for item in entries] == [
+        ("X_All.pdf", True),
+        ("X_All.pdf", False),
+        ("C_All.pdf", False),
+    ]
+    assert [item.source for item in table.conflicts()] == [second, taken]
+
+
+def test_plan_reports_duplicate_folder_targets(tmp_path: Path, monkeypatch) -> None:
+    module = _load_pipeline_module()
+    monkeypatch.setattr(module, "DEST_ROOT_DIR", tmp_path / "dest")
+    monkeypatch.setenv("TOIR_ENABLE_TRA_SUB_APP", "0")
+    inbox = tmp_path / "inbox"
+    for folder in ("Р1", "П1"):
+        (inbox / folder).mkdir(parents=True)
+        (inbox / folder / NAME).write_text("pdf", encoding="utf-8")
+
+    plan = module.build_distribution_plan(inbox, module.discover_inbox(inbox))
+
+    by_source = {item.source_path.name: item for item in plan.projects}
+    assert by_source["П1"].executable
+    assert by_source["Р1"].skip_reason == "rename_conflict"
+    issue = by_source["Р1"].issues[0]
+    assert issue.action == TransferAction.RENAME
+    assert "П1" in issue.message
+    assert by_source["П1"].attributes["tz_index"] == "II.18.2"
@@ -0,0 +1,101 @@
+"""Тесты параллельной обработки проектов (--workers / TOIR_WORKERS)."""
+
+from __future__ import annotations
+
+import importlib.util
+import io
+import json
+import threading
+from pathlib import Path
+
+from toir_manager.services.console import BufferedConsole
+
+MODULE_PATH = Path(__file__).resolve().parents[1] / "toir_raspredelenije.py"
+
+
+def _load_pipeline_module():
+    spec = importlib.util.spec_from_file_location("toir_raspredelenije", MODULE_PATH)
+    if spec is None or spec.loader is None:
+        raise RuntimeError("Failed to load toir_raspredelenije")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def test_buffered_console_prints_thread_output_as_block() -> None:
+    target = io.StringIO()
+    console = BufferedConsole(target)
+    barrier = threading.Barrier(2)
+
+    def worker(name: str) -> None:
+        with console.capture():
+            for index in range(3):
+                console.write(f"{name}-{index}\n")
+                if index == 0:
+                    barrier.wait()
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in ("a", "b")]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    lines = target.getvalue().splitlines()
+    assert len(lines) == 6
+    first = lines[0].split("-")[0]
+    assert lines[:3] == [f"{first}-{i}" for i in range(3)]
+
+
+def test_get_worker_count_reads_env(monkeypatch) -> None:
+    module = _load_pipeline_module()
+    monkeypatch.setenv("TOIR_WORKERS", "4")
+    assert module._get_worker_count() == 4
+    assert module._get_worker_count(2) == 2
+    monkeypatch.setenv("TOIR_WORKERS", "abc")
+    assert module._get_worker_count() == module.WORKERS_DEFAULT
+
+
+def test_main_processes_projects_in_parallel(tmp_path, monkeypatch, capsys) -> None:
+    module = _load_pipeline_module()
+
+    notes_dir = tmp_path / "notes"
+    dest_root_dir = tmp_path / "dest"
+    inbox_dir = tmp_path / "inbox"
+    for path in (notes_dir, dest_root_dir, inbox_dir):
+        path.mkdir(parents=True, exist_ok=True)
+
+    monkeypatch.setattr(module, "NOTES_DIR", notes_dir)
+    monkeypatch.setattr(module, "TRA_GST_DIR", tmp_path / "gst")
+    monkeypatch.setattr(module, "TRA_SUB_APP_DIR", tmp_path / "tra_sub")
+    monkeypatch.setattr(module, "DEST_ROOT_DIR", dest_root_dir)
+    monkeypatch.setattr(module, "TEMP_ARCHIVE_DIR", tmp_path / "temp")
+    monkeypatch.setenv("TOIR_DISPATCH_DIR", str(tmp_path / "logs"))
+    monkeypatch.setenv("TOIR_ENABLE_TRA_SUB_APP", "0")
+
+    names = [
+        f"CT-DR-B-LP-UNIT{index}-I.1.1-00-C-20250101-00_All.pdf" for index in range(4)
+    ]
+    for name in names:
+        project_dir = inbox_dir / name.replace(".pdf", "")
+        project_dir.mkdir()
+        (project_dir / name).write_text("pdf", encoding="utf-8")
+
+    module.main(inbox_dir=inbox_dir, workers=3)
+
+    for name in names:
+        assert (notes_dir / name).exists()
+        assert any(dest_root_dir.rglob(name))
+        assert any(dest_root_dir.rglob(name.replace(".pdf", ".zip")))
+
+    output = capsys.readouterr().out
+    blocks = output.split("--- Обрабатываем проект: ")[1:]
+    assert len(blocks) == len(names)
+    for block in blocks:
+        project_name = block.splitlines()[0].rstrip(" -")
+        assert block.count("Выбран файл:") == 1
+        assert project_name in block.split("Выбран файл:")[1].splitlines()[0]
+
+    log_files = list((tmp_path / "logs").glob("*.jsonl"))
+    assert len(log_files) == 1
+    for line in log_files[0].read_text(encoding="utf-8").splitlines():
+        json.loads(line)
@@ -0,0 +1,152 @@
+"""Тесты продолжения прерванного запуска (--resume)."""
+
+from __future__ import annotations
+
+import importlib.util
+from pathlib import Path
+
+from toir_manager.core.logging_models import TransferAction, TransferStatus
+from toir_manager.services.log_writer import DispatchLogger, iter_run_logs
+from toir_manager.services.resume import load_resume_state, resume_key
+
+MODULE_PATH = Path(__file__).resolve().parents[1] / "toir_raspredelenije.py"
+DONE = "CT-DR-B-LP-UNIT1-I.1.1-00-C-20250101-00_All"
+TODO = "CT-DR-B-LP-UNIT2-I.1.1-00-C-20250101-00_All"
+
+
+def _load_pipeline_module():
+    spec = importlib.util.spec_from_file_location("toir_raspredelenije", MODULE_PATH)
+    if spec is None or spec.loader is None:
+        raise RuntimeError("Failed to load toir_raspredelenije")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def _write_interrupted_journal(logs_dir: Path) -> None:
+    logger = DispatchLogger(base_dir=logs_dir, run_id="20250101_120000")
+    metadata = {"project_folder": DONE}
+    for action in (TransferAction.COPY_NOTES, TransferAction.COPY_DESTINATION):
+        logger.log_success(
+            action=action,
+            source_path=Path(f"{DONE}.pdf"),
+            target_path=Path("target.pdf"),
+            metadata=metadata,
+        )
+    logger.log(
+        action=TransferAction.COPY_DESTINATION,
+        status=TransferStatus.SUCCESS,
+        source_path=Path(f"{DONE}.pdf"),
+        target_path=Path("dest"),
+        message="created",
+        metadata={"project_folder": TODO, "destination_event": "created"},
+    )
+    logger.log_error(
+        action=TransferAction.COPY_GST,
+        source_path=Path(f"{DONE}.pdf"),
+        target_path=None,
+        message="network down",
+        metadata=metadata,
+    )
+
+
+def test_load_resume_state_collects_successful_steps(tmp_path) -> None:
+    _write_interrupted_journal(tmp_path)
+
+    state = load_resume_state("20250101_120000", base_dir=tmp_path)
+
+    assert state.entries == 4
+    assert state.completed_for(DONE) == {
+        TransferAction.COPY_NOTES,
+        TransferAction.COPY_DESTINATION,
+    }
+    assert state.completed_for(TODO) == set()
+    assert state.seen(TODO)
+
+
+def test_resume_skips_completed_steps_and_appends(tmp_path, monkeypatch) -> None:
+    module = _load_pipeline_module()
+    logs_dir = tmp_path / "logs"
+    inbox_dir = tmp_path / "inbox"
+    notes_dir = tmp_path / "notes"
+    gst_dir = tmp_path / "gst"
+    dest_dir = tmp_path / "dest"
+    for name in (DONE, TODO):
+        (inbox_dir / name).mkdir(parents=True)
+        (inbox_dir / name / f"{name}.pdf").write_text("pdf", encoding="utf-8")
+    _write_interrupted_journal(logs_dir)
+
+    monkeypatch.setattr(module, "NOTES_DIR", notes_dir)
+    monkeypatch.setattr(module, "TRA_GST_DIR", gst_dir)
+    monkeypatch.setattr(module, "DEST_ROOT_DIR", dest_dir)
+    monkeypatch.setenv("TOIR_DISPATCH_DIR", str(logs_dir))
+    monkeypatch.setenv("TOIR_ENABLE_TRA_SUB_APP", "0")
+    monkeypatch.setenv("TOIR_ARCHIVE_WORKERS", "0")
+
+    module.main(inbox_dir=inbox_dir, resume="20250101_120000")
+
+    assert not (notes_dir / f"{DONE}.pdf").exists()
+    assert (notes_dir / f"{TODO}.pdf").exists()
+    assert any(gst_dir.rglob(f"{DONE}.pdf"))
+    assert any(dest_dir.rglob(f"{DONE}.zip"))
+    assert list(logs_dir.glob("*.jsonl")) == [logs_dir / "20250101_120000.jsonl"]
+
+    entries = list(iter_run_logs("20250101_120000", base_dir=logs_dir))
+    appended = entries[4:]
+    done_actions = [
+        entry.action
+        for entry in appended
+        if entry.metadata.get("project_folder") == DONE
+    ]
+    assert TransferAction.COPY_NOTES not in done_actions
+    assert TransferAction.COPY_DESTINATION not in done_actions
+    assert TransferAction.COPY_ARCHIVE in done_actions
+
+
+def test_resume_tells_apart_same_named_projects(tmp_path, monkeypatch) -> None:
+    module = _load_pipeline_module()
+    logs_dir = tmp_path / "logs"
+    inbox_dir = (tmp_path / "inbox").resolve()
+    for group in ("a", "b"):
+        (inbox_dir / group / DONE).mkdir(parents=True)
+        (inbox_dir / group / DONE / f"{DONE}.pdf").write_text("pdf", encoding="utf-8")
+    done_key = resume_key(inbox_dir, inbox_dir / "a" / DONE)
+    logger = DispatchLogger(base_dir=logs_dir, run_id="20250101_120000")
+    for action in (TransferAction.COPY_NOTES, TransferAction.COPY_ARCHIVE):
+        logger.log_success(
+            action=action,
+            source_path=inbox_dir / "a" / DONE,
+            target_path=Path("target"),
+            metadata={"project_folder": DONE, "project_key": done_key},
+        )
+
+    monkeypatch.setattr(module, "NOTES_DIR", tmp_path / "notes")
+    monkeypatch.setattr(module, "TRA_GST_DIR", tmp_path / "gst")
+    monkeypatch.setattr(module, "DEST_ROOT_DIR", tmp_path / "dest")
+    monkeypatch.setenv("TOIR_DISPATCH_DIR", str(logs_dir))
+    monkeypatch.setenv("TOIR_ENABLE_TRA_SUB_APP", "0")
+    monkeypatch.setenv("TOIR_ARCHIVE_WORKERS", "0")
+    monkeypatch.setenv("TOIR_WORKERS", "1")
+
+    module.main(inbox_dir=inbox_dir, resume="20250101_120000")
+
+    appended = list(iter_run_logs("20250101_120000", base_dir=logs_dir))[2:]
+    actions: dict[str, list[TransferAction]] = {}
+    for entry in appended:
+        key = entry.metadata.get("project_key")
+        if key and not entry.metadata.get("destination_event"):
+            actions.setdefault(key, []).append(entry.action)
+    other_key = resume_key(inbox_dir, inbox_dir / "b" / DONE)
+    assert TransferAction.COPY_NOTES not in actions[done_key]
+    assert TransferAction.COPY_ARCHIVE not in actions[done_key]
+    assert TransferAction.COPY_NOTES in actions[other_key]
+    assert TransferAction.COPY_ARCHIVE in actions[other_key]
+
+
+def test_resume_unknown_run_stops(tmp_path, monkeypatch, capsys) -> None:
+    module = _load_pipeline_module()
+    monkeypatch.setenv("TOIR_DISPATCH_DIR", str(tmp_path / "logs"))
+
+    module.main(inbox_dir=tmp_path, resume="missing")
+
+    assert "Журнал запуска не найден" in capsys.readouterr().out
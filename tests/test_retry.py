@@ -0,0 +1,187 @@
+"""Тесты повтора записи и размыкателя по корням назначения."""
+
+from __future__ import annotations
+
+import errno
+import importlib.util
+import json
+from pathlib import Path
+
+import pytest
+
+from toir_manager.core.distribution_plan import PlannedCopy
+from toir_manager.core.logging_models import TransferAction
+from toir_manager.services.retry import (
+    CircuitBreaker,
+    CircuitBreakers,
+    RetryPolicy,
+    call_with_retry,
+    is_transient,
+)
+
+MODULE_PATH = Path(__file__).resolve().parents[1] / "toir_raspredelenije.py"
+
+
+def _load_pipeline_module():
+    spec = importlib.util.spec_from_file_location("toir_raspredelenije", MODULE_PATH)
+    if spec is None or spec.loader is None:
+        raise RuntimeError("Failed to load toir_raspredelenije")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+class _Clock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_call_with_retry_repeats_only_transient_errors() -> None:
+    failures = [TimeoutError(errno.ETIMEDOUT, "timeout"), OSError(errno.ENOENT, "nf")]
+    delays: list[float] = []
+
+    def flaky() -> str:
+        if failures:
+            raise failures.pop(0)
+        return "ok"
+
+    policy = RetryPolicy(max_attempts=3, base_delay=1.0)
+    assert call_with_retry(flaky, policy, sleep=delays.append) == ("ok", 3)
+    assert len(delays) == 2 and 0.5 <= delays[0] <= 1.0 and 1.0 <= delays[1] <= 2.0
+
+    def denied() -> None:
+        raise PermissionError(errno.EACCES, "denied")
+
+    with pytest.raises(PermissionError) as raised:
+        call_with_retry(denied, policy, sleep=delays.append)
+    assert raised.value.attempts == 1
+    assert not is_transient(raised.value)
+    assert RetryPolicy(base_delay=1, max_delay=4).delay(10, rng=lambda: 0) == 4
+
+
+def test_circuit_breaker_opens_and_probes() -> None:
+    clock = _Clock()
+    breaker = CircuitBreaker(threshold=2, cooldown=30, clock=clock)
+
+    breaker.record_failure()
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == "open" and not breaker.allow()
+
+    clock.now += 30
+    assert breaker.allow()
+    assert not breaker.allow()
+    breaker.record_failure()
+    assert not breaker.allow()
+
+    clock.now += 30
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == "closed" and breaker.allow()
+    assert breaker.trips == 2
+
+
+def test_unexpected_write_error_releases_probe(tmp_path, monkeypatch) -> None:
+    module = _load_pipeline_module()
+    clock = _Clock()
+    notes_dir = tmp_path / "notes"
+    notes_dir.mkdir()
+    breakers = CircuitBreakers(
+        {"NOTES": notes_dir}, threshold=1, cooldown=30, clock=clock
+    )
+    target = notes_dir / "report.pdf"
+    breakers.record(target, TimeoutError(errno.ETIMEDOUT, "timeout"))
+    clock.now += 30
+    report = tmp_path / "report.pdf"
+    report.write_text("pdf", encoding="utf-8")
+    config = module.resolve_run_config(settings={"TOIR_NOTES_DIR": str(notes_dir)})
+    context = module.RunContext(config=config, breakers=breakers)
+
+    def broken(*_args, **_kwargs):
+        raise RuntimeError("сбой вне записи")
+
+    real = module.distribute_file
+    monkeypatch.setattr(module, "distribute_file", broken)
+    item = PlannedCopy(TransferAction.COPY_NOTES, target, {})
+    with pytest.raises(RuntimeError):
+        module._write_targets(context, report, [item])
+
+    monkeypatch.setattr(module, "distribute_file", real)
+    assert module._write_targets(context, report, [item]) == {
+        TransferAction.COPY_NOTES: True
+    }
+    assert breakers.breaker_for(target).state == "closed"
+
+
+def _setup(module, tmp_path, monkeypatch, names, fail_notes):
+    inbox_dir = tmp_path / "inbox"
+    for name in names:
+        (inbox_dir / name).mkdir(parents=True)
+        (inbox_dir / name / f"{name}.pdf").write_text("pdf", encoding="utf-8")
+    notes_dir = (tmp_path / "notes").resolve()
+    monkeypatch.setattr(module, "NOTES_DIR", notes_dir)
+    monkeypatch.setattr(module, "TRA_GST_DIR", tmp_path / "gst")
+    monkeypatch.setattr(module, "DEST_ROOT_DIR", tmp_path / "dest")
+    monkeypatch.setenv("TOIR_DISPATCH_DIR", str(tmp_path / "logs"))
+    monkeypatch.setenv("TOIR_ENABLE_TRA_SUB_APP", "0")
+    monkeypatch.setenv("TOIR_ARCHIVE_WORKERS", "0")
+    monkeypatch.setenv("TOIR_RETRY_DELAY", "0.001")
+    monkeypatch.setenv("TOIR_WORKERS", "1")
+
+    real = module.distribute_file
+
+    def flaky(source, targets, **kwargs):
+        outcomes = real(source, targets, **kwargs)
+        for outcome in outcomes:
+            if outcome.target.parent == notes_dir and fail_notes():
+                outcome.error = TimeoutError(errno.ETIMEDOUT, "Сетевой таймаут")
+        return outcomes
+
+    monkeypatch.setattr(module, "distribute_file", flaky)
+    module.main(inbox_dir=inbox_dir)
+    log_file = next((tmp_path / "logs").glob("*.jsonl"))
+    return [
+        json.loads(line) for line in log_file.read_text(encoding="utf-8").splitlines()
+    ]
+
+
+def test_transient_copy_error_is_retried(tmp_path, monkeypatch) -> None:
+    module = _load_pipeline_module()
+    name = "CT-DR-B-LP-UNIT-I.1.1-00-C-20250101-00_All"
+    failures = iter([True])
+
+    entries = _setup(
+        module, tmp_path, monkeypatch, [name], lambda: next(failures, False)
+    )
+
+    attempts = {
+        entry["action"]: entry["metadata"].get("attempts")
+        for entry in entries
+        if entry["status"] == "success"
+    }
+    assert attempts["copy_notes"] == "2"
+    assert attempts["copy_destination"] == "1"
+    assert attempts["copy_archive"] == "1"
+    archive = next(entry for entry in entries if entry["action"] == "copy_archive")
+    assert Path(archive["source_path"]).name == name
+    assert not [entry for entry in entries if entry["status"] == "error"]
+
+
+def test_breaker_stops_writes_to_failing_root_only(tmp_path, monkeypatch) -> None:
+    module = _load_pipeline_module()
+    names = [f"CT-DR-B-LP-UNIT{index}-I.1.1-00-C-20250101-00_All" for index in (1, 2)]
+    monkeypatch.setenv("TOIR_RETRY_ATTEMPTS", "2")
+    monkeypatch.setenv("TOIR_BREAKER_THRESHOLD", "2")
+
+    entries = _setup(module, tmp_path, monkeypatch, names, lambda: True)
+
+    errors = [entry for entry in entries if entry["status"] == "error"]
+    assert [entry["action"] for entry in errors] == ["copy_notes", "copy_notes"]
+    assert errors[0]["metadata"]["attempts"] == "2"
+    assert "приостановлена" in errors[1]["message"]
+    assert errors[1]["metadata"]["attempts"] == "0"
+    copied = [entry for entry in entries if entry["action"] == "copy_destination"]
+    assert [entry["status"] for entry in copied] == ["success", "success"]
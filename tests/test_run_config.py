@@ -0,0 +1,158 @@
+"""Тесты настроек запуска RunConfig и контекста RunContext."""
+
+from __future__ import annotations
+
+import importlib.util
+import io
+import json
+import os
+import threading
+from pathlib import Path
+
+from toir_manager.core.logging_models import TransferAction
+from toir_manager.services.console import BufferedConsole
+from toir_manager.services.log_writer import DispatchLogger, iter_run_logs
+
+MODULE_PATH = Path(__file__).resolve().parents[1] / "toir_raspredelenije.py"
+NAME = "CT-DR-B-LP-UNIT-I.1.1-00-C-20250101-00_All"
+
+
+def _load_pipeline_module():
+    spec = importlib.util.spec_from_file_location("toir_raspredelenije", MODULE_PATH)
+    if spec is None or spec.loader is None:
+        raise RuntimeError("Failed to load toir_raspredelenije")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def _make_project(root: Path) -> Path:
+    project_dir = root / NAME
+    project_dir.mkdir(parents=True)
+    (project_dir / f"{NAME}.pdf").write_text("pdf", encoding="utf-8")
+    return project_dir
+
+
+def test_env_overrides_ui_paths_and_defaults(tmp_path, monkeypatch) -> None:
+    module = _load_pipeline_module()
+    ui_file = Path(os.environ["TOIR_UI_CONFIG_DIR"]) / "ui_paths.json"
+    ui_file.write_text(
+        json.dumps(
+            {
+                "TOIR_NOTES_DIR": str(tmp_path / "ui_notes"),
+                "TOIR_DEST_ROOT_DIR": str(tmp_path / "ui_dest"),
+                "TOIR_PART_FILTER": "LP",
+            }
+        ),
+        encoding="utf-8",
+    )
+    monkeypatch.setattr(module, "TRA_GST_DIR", tmp_path / "default_gst")
+    monkeypatch.delenv("TOIR_DEST_ROOT_DIR", raising=False)
+    monkeypatch.delenv("TOIR_TRA_GST_DIR", raising=False)
+    monkeypatch.setenv("TOIR_NOTES_DIR", str(tmp_path / "env_notes"))
+    monkeypatch.setenv("TOIR_PART_FILTER", "CS")
+
+    config = module.resolve_run_config(workers=3)
+
+    assert config.notes_dir == (tmp_path / "env_notes").resolve()
+    assert config.dest_root_dir == (tmp_path / "ui_dest").resolve()
+    assert config.tra_gst_dir == tmp_path / "default_gst"
+    assert config.part_filter == "CS"
+    assert config.workers == 3
+
+
+def test_concurrent_runs_keep_their_own_roots_logs_and_output(tmp_path) -> None:
+    module = _load_pipeline_module()
+    barrier = threading.Barrier(2)
+    outputs = {name: io.StringIO() for name in ("first", "second")}
+    errors: list[BaseException] = []
+
+    def run(name: str) -> None:
+        config = module.resolve_run_config(
+            settings={
+                "TOIR_NOTES_DIR": str(tmp_path / name / "notes"),
+                "TOIR_TRA_GST_DIR": str(tmp_path / name / "gst"),
+                "TOIR_DEST_ROOT_DIR": str(tmp_path / name / "dest"),
+                "TOIR_ENABLE_TRA_SUB_APP": "0",
+            }
+        )
+        project_dir = _make_project(tmp_path / name / "inbox")
+        try:
+            with DispatchLogger(base_dir=tmp_path / "logs", run_id=name) as logger:
+                with module._run_context(config, logger) as context:
+                    context.console = BufferedConsole(outputs[name])
+                    barrier.wait(timeout=5)
+                    module.process_project_folder(project_dir, context)
+        except BaseException as error:  # noqa: BLE001
+            errors.append(error)
+
+    threads = [threading.Thread(target=run, args=(name,)) for name in outputs]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert not errors
+    for name, other in (("first", "second"), ("second", "first")):
+        assert (tmp_path / name / "notes" / f"{NAME}.pdf").exists()
+        assert len(list((tmp_path / name / "dest").rglob(f"{NAME}.zip"))) == 1
+        targets = [
+            entry.target_path
+            for entry in iter_run_logs(name, tmp_path / "logs")
+            if entry.target_path is not None
+        ]
+        assert targets
+        assert all((tmp_path / name) in target.parents for target in targets)
+        output = outputs[name].getvalue()
+        assert "Обрабатываем проект" in output
+        assert str(tmp_path / other) not in output
+
+
+def test_global_context_keeps_settings_and_breakers(tmp_path, monkeypatch) -> None:
+    module = _load_pipeline_module()
+    monkeypatch.setenv("TOIR_NOTES_DIR", str(tmp_path / "notes"))
+    first = module._global_context()
+
+    monkeypatch.setenv("TOIR_NOTES_DIR", str(tmp_path / "changed"))
+    monkeypatch.setattr(module, "DEST_ROOT_DIR", tmp_path / "dest")
+    second = module._global_context()
+
+    assert second.breakers is first.breakers
+    assert second.bandwidth is first.bandwidth
+    assert second.console is first.console
+    assert second.config.notes_dir == (tmp_path / "notes").resolve()
+    assert second.config.dest_root_dir == tmp_path / "dest"
+
+
+def test_plan_project_does_not_reread_environment(tmp_path, monkeypatch) -> None:
+    module = _load_pipeline_module()
+    config = module.resolve_run_config(
+        settings={
+            "TOIR_NOTES_DIR": str(tmp_path / "notes"),
+            "TOIR_DEST_ROOT_DIR": str(tmp_path / "dest"),
+            "TOIR_ENABLE_TRA_GST": "0",
+            "TOIR_ENABLE_TRA_SUB_APP": "0",
+        }
+    )
+    monkeypatch.setenv("TOIR_ENABLE_DEST_ROOT", "0")
+    monkeypatch.setenv("TOIR_ENABLE_NOTES", "0")
+
+    plan = module.plan_project(
+        _make_project(tmp_path / "inbox"), context=module.RunContext(config=config)
+    )
+
+    assert plan.executable
+    assert [item.action for item in plan.copies] == [
+        TransferAction.COPY_NOTES,
+        TransferAction.COPY_DESTINATION,
+    ]
+
+
+def test_deprecated_temp_archive_dir_warns_once(tmp_path, capsys) -> None:
+    module = _load_pipeline_module()
+    settings = {"TOIR_TEMP_ARCHIVE_DIR": str(tmp_path / "temp")}
+
+    module.resolve_run_config(settings=settings)
+    module.resolve_run_config(settings=settings)
+
+    assert capsys.readouterr().out.count("TOIR_TEMP_ARCHIVE_DIR устарела") == 1
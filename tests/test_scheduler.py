@@ -0,0 +1,125 @@
+"""Тесты планировщика порядка обработки проектов."""
+
+from __future__ import annotations
+
+import importlib.util
+import json
+import threading
+import time
+from pathlib import Path
+
+from toir_manager.services.scheduler import (
+    ProjectScheduler,
+    ScheduleEntry,
+    parse_priorities,
+)
+
+MODULE_PATH = Path(__file__).resolve().parents[1] / "toir_raspredelenije.py"
+
+
+def _load_pipeline_module():
+    spec = importlib.util.spec_from_file_location("toir_raspredelenije", MODULE_PATH)
+    if spec is None or spec.loader is None:
+        raise RuntimeError("Failed to load toir_raspredelenije")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def _entries() -> list[ScheduleEntry]:
+    return [
+        ScheduleEntry(item=900, name="a", date="20250301", attributes={"part": "LP"}),
+        ScheduleEntry(item=10, name="b", date="20250101", attributes={"part": "LP"}),
+        ScheduleEntry(item=500, name="c", date="20250201", attributes={"part": "CS"}),
+    ]
+
+
+def test_orderings_and_priority() -> None:
+    smallest = ProjectScheduler("smallest", size_of=lambda item: item)
+    assert [e.name for e in smallest.arrange(_entries())] == ["b", "c", "a"]
+
+    oldest = ProjectScheduler("oldest")
+    ordered = oldest.arrange(_entries())
+    assert [e.name for e in ordered] == ["b", "c", "a"]
+    assert [e.rank for e in ordered] == [1, 2, 3]
+
+    rules = parse_priorities("part=cs; object_name=BVS5")
+    assert rules == (("part", "CS"), ("object_name", "BVS5"))
+    prioritized = ProjectScheduler("alpha", priorities=rules)
+    assert [e.name for e in prioritized.arrange(_entries())] == ["c", "a", "b"]
+
+
+def test_ready_queue_is_bounded() -> None:
+    release = threading.Event()
+    started = threading.Semaphore(0)
+    entries = [ScheduleEntry(item=index, name=str(index)) for index in range(6)]
+    scheduler = ProjectScheduler("alpha", queue_size=1)
+
+    def work(_entry: ScheduleEntry) -> None:
+        started.release()
+        release.wait(5)
+
+    runner = threading.Thread(target=scheduler.run, args=(entries, work, 2))
+    runner.start()
+    assert started.acquire(timeout=5) and started.acquire(timeout=5)
+    time.sleep(0.05)
+    # Два проекта в работе, один в очереди, четвёртый ждёт места в ней
+    assert entries[3].ready_at > 0
+    assert entries[4].ready_at == 0.0
+    release.set()
+    runner.join(5)
+
+    assert all(entry.started_at >= entry.ready_at > 0 for entry in entries)
+
+
+def test_pipeline_logs_schedule_order(tmp_path, monkeypatch, capsys) -> None:
+    module = _load_pipeline_module()
+    inbox_dir = tmp_path / "inbox"
+    names = {
+        "UNIT0": "20250301",
+        "UNIT1": "20250101",
+        "UNIT2": "20250201",
+    }
+    for unit, date in names.items():
+        name = f"CT-DR-B-LP-{unit}-I.1.1-00-C-{date}-00_All"
+        (inbox_dir / name).mkdir(parents=True)
+        (inbox_dir / name / f"{name}.pdf").write_text("pdf", encoding="utf-8")
+
+    monkeypatch.setattr(module, "NOTES_DIR", tmp_path / "notes")
+    monkeypatch.setattr(module, "TRA_GST_DIR", tmp_path / "gst")
+    monkeypatch.setattr(module, "DEST_ROOT_DIR", tmp_path / "dest")
+    monkeypatch.setenv("TOIR_DISPATCH_DIR", str(tmp_path / "logs"))
+    monkeypatch.setenv("TOIR_ENABLE_TRA_SUB_APP", "0")
+    monkeypatch.setenv("TOIR_ARCHIVE_WORKERS", "0")
+    monkeypatch.setenv("TOIR_SCHEDULE_ORDER", "oldest")
+    monkeypatch.setenv("TOIR_WORKERS", "1")
+    monkeypatch.setenv("TOIR_SCHEDULE_PRIORITY", "object_name=UNIT2")
+
+    module.main(inbox_dir=inbox_dir)
+
+    output = capsys.readouterr().out
+    order_line = next(
+        line for line in output.splitlines() if line.startswith("Порядок обработки")
+    )
+    assert order_line.startswith("Порядок обработки: oldest; приоритет object_name=UNIT2")
+    assert [part.split("-")[4] for part in order_line.split(": ")[2].split(", ")] == [
+        "UNIT2",
+        "UNIT1",
+        "UNIT0",
+    ]
+
+    log_file = next((tmp_path / "logs").glob("*.jsonl"))
+    started: list[str] = []
+    ranks = {}
+    for line in log_file.read_text(encoding="utf-8").splitlines():
+        metadata = json.loads(line).get("metadata", {})
+        if "schedule_rank" not in metadata:
+            continue
+        assert metadata["schedule_order"] == "oldest"
+        float(metadata["queue_wait"])
+        unit = metadata["project_folder"].split("-")[4]
+        ranks[unit] = metadata["schedule_rank"]
+        if unit not in started:
+            started.append(unit)
+    assert started == ["UNIT2", "UNIT1", "UNIT0"]
+    assert ranks == {"UNIT2": "1", "UNIT1": "2", "UNIT0": "3"}
@@ -0,0 +1,200 @@
+"""Тесты примитивов копирования отчётов."""
+
+from __future__ import annotations
+
+import os
+from pathlib import Path
+
+from toir_manager.services.transfer import (
+    LINK_MODE_COPY,
+    LINK_MODE_HARDLINK,
+    LINK_MODE_REFLINK,
+    SKIP_MODE_HASH,
+    SKIP_MODE_STAT,
+    distribute_file,
+    fanout_copy,
+    is_identical,
+)
+
+
+def test_fanout_copy_writes_every_target(tmp_path: Path) -> None:
+    source = tmp_path / "report_All.pdf"
+    payload = b"0123456789" * 1000
+    source.write_bytes(payload)
+    targets = [tmp_path / name / source.name for name in ("notes", "gst", "dest")]
+    for target in targets:
+        target.parent.mkdir()
+
+    outcomes = fanout_copy(source, targets, chunk_size=333)
+
+    assert [outcome.target for outcome in outcomes] == targets
+    for outcome in outcomes:
+        assert outcome.ok
+        assert outcome.bytes_written == len(payload)
+        assert outcome.target.read_bytes() == payload
+
+
+def test_fanout_copy_isolates_failing_target(tmp_path: Path) -> None:
+    source = tmp_path / "report_All.pdf"
+    source.write_bytes(b"pdf")
+    good = tmp_path / "good" / source.name
+    good.parent.mkdir()
+    broken = tmp_path / "missing_dir" / source.name
+
+    outcomes = fanout_copy(source, [broken, good, source])
+
+    assert isinstance(outcomes[0].error, OSError)
+    assert outcomes[1].ok
+    assert good.read_bytes() == b"pdf"
+    assert outcomes[2].error is not None
+    assert source.read_bytes() == b"pdf"
+
+
+def test_fanout_copy_reads_source_once(tmp_path: Path, monkeypatch) -> None:
+    source = tmp_path / "report_All.pdf"
+    source.write_bytes(b"x" * 10)
+    targets = [tmp_path / f"t{index}.pdf" for index in range(4)]
+    opened: list[str] = []
+    original_open = Path.open
+
+    def tracking_open(self, mode="r", *args, **kwargs):
+        opened.append(f"{self.name}:{mode}")
+        return original_open(self, mode, *args, **kwargs)
+
+    monkeypatch.setattr(Path, "open", tracking_open)
+    fanout_copy(source, targets)
+
+    assert opened.count("report_All.pdf:rb") == 1
+
+
+def test_distribute_file_hardlinks_same_device_targets(tmp_path: Path) -> None:
+    source = tmp_path / "report_All.pdf"
+    source.write_bytes(b"pdf")
+    targets = [tmp_path / name / source.name for name in ("notes", "dest")]
+    for target in targets:
+        target.parent.mkdir()
+    targets[1].write_bytes(b"stale")
+
+    outcomes = distribute_file(source, targets, link_mode=LINK_MODE_HARDLINK)
+
+    for outcome in outcomes:
+        assert outcome.ok
+        assert outcome.method == LINK_MODE_HARDLINK
+        assert outcome.target.samefile(source)
+    assert source.stat().st_nlink == 3
+
+    again = distribute_file(source, targets, link_mode=LINK_MODE_HARDLINK)
+    assert all(outcome.ok for outcome in again)
+    assert source.stat().st_nlink == 3
+
+
+def test_distribute_file_falls_back_to_copy(tmp_path: Path, monkeypatch) -> None:
+    from toir_manager.services import transfer
+
+    source = tmp_path / "report_All.pdf"
+    source.write_bytes(b"pdf")
+    target = tmp_path / "other_volume" / source.name
+    target.parent.mkdir()
+    monkeypatch.setattr(transfer, "_same_device", lambda _s, _t: False)
+
+    outcomes = distribute_file(source, [target], link_mode=LINK_MODE_HARDLINK)
+
+    assert outcomes[0].ok
+    assert outcomes[0].method == LINK_MODE_COPY
+    assert not target.samefile(source)
+
+
+def test_distribute_file_links_from_first_copy_on_target_volume(
+    tmp_path: Path, monkeypatch
+) -> None:
+    from toir_manager.services import transfer
+
+    source = tmp_path / "report_All.pdf"
+    source.write_bytes(b"pdf")
+    targets = [tmp_path / name / source.name for name in ("sub_app", "dest")]
+    for target in targets:
+        target.parent.mkdir()
+    monkeypatch.setattr(transfer, "_same_device", lambda _s, _t: False)
+
+    outcomes = distribute_file(source, targets, link_mode=LINK_MODE_HARDLINK)
+
+    assert [outcome.method for outcome in outcomes] == [
+        LINK_MODE_COPY,
+        LINK_MODE_HARDLINK,
+    ]
+    assert [outcome.bytes_written for outcome in outcomes] == [3, 0]
+    assert targets[1].samefile(targets[0])
+    assert not targets[0].samefile(source)
+
+
+def test_distribute_file_outcomes_follow_target_order(
+    tmp_path: Path, monkeypatch
+) -> None:
+    from toir_manager.services import transfer
+
+    source = tmp_path / "report_All.pdf"
+    source.write_bytes(b"pdf")
+    targets = [tmp_path / name / source.name for name in ("notes", "gst", "dest")]
+    for target in targets:
+        target.parent.mkdir()
+    distribute_file(source, [targets[1]], skip_identical=SKIP_MODE_STAT)
+    monkeypatch.setattr(transfer, "_same_device", lambda _s, _t: False)
+
+    outcomes = distribute_file(
+        source, targets, link_mode=LINK_MODE_HARDLINK, skip_identical=SKIP_MODE_STAT
+    )
+
+    assert [outcome.target for outcome in outcomes] == targets
+    assert [outcome.skipped for outcome in outcomes] == [False, True, False]
+    assert targets[2].samefile(targets[0])
+
+
+def test_distribute_file_reflink_unsupported_copies(tmp_path: Path, monkeypatch) -> None:
+    from toir_manager.services import transfer
+
+    def _no_reflink(_source: Path, _target: Path) -> None:
+        raise OSError(95, "not supported")
+
+    monkeypatch.setattr(transfer, "_reflink", _no_reflink)
+    source = tmp_path / "report_All.pdf"
+    source.write_bytes(b"pdf")
+    target = tmp_path / "dest" / source.name
+    target.parent.mkdir()
+
+    outcomes = distribute_file(source, [target], link_mode=LINK_MODE_REFLINK)
+
+    assert outcomes[0].method == LINK_MODE_COPY
+    assert target.read_bytes() == b"pdf"
+    assert not list(target.parent.glob(".*.link"))
+
+
+def test_distribute_file_skips_identical_targets(tmp_path: Path) -> None:
+    source = tmp_path / "report_All.pdf"
+    source.write_bytes(b"pdf-v1")
+    target = tmp_path / "dest" / source.name
+    target.parent.mkdir()
+
+    first = distribute_file(source, [target], skip_identical=SKIP_MODE_STAT)
+    assert not first[0].skipped
+    assert target.stat().st_mtime_ns == source.stat().st_mtime_ns
+
+    second = distribute_file(source, [target], skip_identical=SKIP_MODE_STAT)
+    assert second[0].skipped
+
+    source.write_bytes(b"pdf-v2, revised")
+    third = distribute_file(source, [target], skip_identical=SKIP_MODE_STAT)
+    assert not third[0].skipped
+    assert target.read_bytes() == b"pdf-v2, revised"
+
+
+def test_is_identical_hash_mode_ignores_mtime(tmp_path: Path) -> None:
+    source = tmp_path / "a.pdf"
+    target = tmp_path / "b.pdf"
+    source.write_bytes(b"same")
+    target.write_bytes(b"same")
+    os.utime(target, (0, 0))
+
+    assert not is_identical(source, target, SKIP_MODE_STAT)
+    assert is_identical(source, target, SKIP_MODE_HASH)
+    target.write_bytes(b"diff")
+    assert not is_identical(source, target, SKIP_MODE_HASH)
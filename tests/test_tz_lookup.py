@@ -0,0 +1,113 @@
+"""Тесты индекса справочника TZ_glob.xlsx."""
+
+from __future__ import annotations
+
+import os
+from pathlib import Path
+
+import pytest
+
+openpyxl = pytest.importorskip("openpyxl")
+
+from toir_manager.services.tz_lookup import TzLookup, TzLookupError  # noqa: E402
+
+
+def _write_workbook(path: Path, rows: list[tuple[object, object]]) -> None:
+    workbook = openpyxl.Workbook()
+    sheet = workbook.active
+    sheet.title = "gen_cl"
+    sheet.append(["#", "index", "", "", "", "", "suffix"])
+    for key, suffix in rows:
+        sheet.append([None, key, None, None, None, None, suffix])
+    workbook.save(path)
+
+
+def test_lookup_normalizes_keys_and_reports_issues(tmp_path: Path) -> None:
+    path = tmp_path / "TZ_glob.xlsx"
+    _write_workbook(
+        path,
+        [
+            (" II.18.2 ", "UPS"),
+            ("I.7.5", None),
+            ("ii.18.2", "OTHER"),
+            (None, "orphan"),
+        ],
+    )
+    lookup = TzLookup(path, "gen_cl", "B", "G")
+
+    assert lookup.lookup("II.18.2") == "UPS"
+    assert lookup.lookup("I.7.5") is None
+    assert lookup.lookup("missing") is None
+    assert lookup.report.missing_suffix == ["i.7.5"]
+    assert lookup.report.duplicates == ["ii.18.2"]
+    assert lookup.loads == 1
+
+
+def test_lookup_reloads_only_when_file_changes(tmp_path: Path) -> None:
+    path = tmp_path / "TZ_glob.xlsx"
+    _write_workbook(path, [("II.1.1", "A")])
+    lookup = TzLookup(path, "gen_cl", "B", "G")
+
+    assert lookup.lookup("II.1.1") == "A"
+    assert lookup.lookup("II.1.1") == "A"
+    assert lookup.loads == 1
+
+    _write_workbook(path, [("II.1.1", "B"), ("II.1.2", "C")])
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+    assert lookup.lookup("II.1.1") == "B"
+    assert lookup.lookup("II.1.2") == "C"
+    assert lookup.loads == 2
+
+
+def test_lookup_raises_for_missing_sheet(tmp_path: Path) -> None:
+    path = tmp_path / "TZ_glob.xlsx"
+    workbook = openpyxl.Workbook()
+    workbook.active.title = "other"
+    workbook.save(path)
+
+    with pytest.raises(TzLookupError):
+        TzLookup(path, "gen_cl", "B", "G").lookup("II.1.1")
+
+
+def test_cache_serves_warm_runs_without_parsing(tmp_path: Path, monkeypatch) -> None:
+    path = tmp_path / "TZ_glob.xlsx"
+    cache_path = tmp_path / "logs" / "cache" / "tz_glob.json"
+    _write_workbook(path, [("II.18.2", "UPS"), ("II.18.2", "DUP")])
+
+    cold = TzLookup(path, "gen_cl", "B", "G", cache_path=cache_path)
+    assert cold.lookup("II.18.2") == "UPS"
+    assert cold.loads == 1
+    assert cache_path.exists()
+
+    def _fail_parse(self):
+        raise AssertionError("openpyxl не должен использоваться при тёплом запуске")
+
+    monkeypatch.setattr(TzLookup, "_parse", _fail_parse)
+    warm = TzLookup(path, "gen_cl", "B", "G", cache_path=cache_path)
+    assert warm.lookup("II.18.2") == "UPS"
+    assert warm.report.duplicates == ["ii.18.2"]
+    assert warm.last_source == "cache"
+
+    # Изменился только mtime: кеш подтверждается по SHA-256.
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 5_000_000_000))
+    touched = TzLookup(path, "gen_cl", "B", "G", cache_path=cache_path)
+    assert touched.lookup("II.18.2") == "UPS"
+    assert touched.cache_hits == 1
+
+
+def test_cache_rebuilds_when_template_changes(tmp_path: Path) -> None:
+    path = tmp_path / "TZ_glob.xlsx"
+    cache_path = tmp_path / "tz_glob.json"
+    _write_workbook(path, [("II.1.1", "A")])
+    TzLookup(path, "gen_cl", "B", "G", cache_path=cache_path).lookup("II.1.1")
+
+    _write_workbook(path, [("II.1.1", "CHANGED"), ("II.1.2", "extra row")])
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 5_000_000_000))
+
+    lookup = TzLookup(path, "gen_cl", "B", "G", cache_path=cache_path)
+    assert lookup.lookup("II.1.1") == "CHANGED"
+    assert lookup.loads == 1
@@ -0,0 +1,103 @@
+"""Тесты режима наблюдения за входным каталогом."""
+
+from __future__ import annotations
+
+import importlib.util
+from datetime import date
+from pathlib import Path
+
+from toir_manager.cli.watch import watch
+from toir_manager.services.log_writer import iter_run_logs
+from toir_manager.services.watcher import InboxWatcher, folder_signature
+
+MODULE_PATH = Path(__file__).resolve().parents[1] / "toir_raspredelenije.py"
+NAME = "CT-DR-B-LP-UNIT-I.1.1-00-C-20250101-00_All"
+
+
+def _load_pipeline_module():
+    spec = importlib.util.spec_from_file_location("toir_raspredelenije", MODULE_PATH)
+    if spec is None or spec.loader is None:
+        raise RuntimeError("Failed to load toir_raspredelenije")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+class _Clock:
+    def __init__(self, now: float) -> None:
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_folder_signature_tracks_tree(tmp_path: Path) -> None:
+    (tmp_path / "sub").mkdir()
+    (tmp_path / "a.pdf").write_text("abc", encoding="utf-8")
+    (tmp_path / "sub" / "b.dwg").write_text("de", encoding="utf-8")
+
+    signature = folder_signature(tmp_path)
+
+    assert signature is not None
+    assert signature[:2] == (2, 5)
+    assert folder_signature(tmp_path / "missing") is None
+
+
+def test_watcher_waits_for_settle_and_skips_done(tmp_path: Path) -> None:
+    project = tmp_path / "project"
+    project.mkdir()
+    (project / "a.pdf").write_text("a", encoding="utf-8")
+    clock = _Clock(folder_signature(project)[2] / 1_000_000_000)
+    watcher = InboxWatcher(
+        tmp_path, settle_seconds=30, discover=lambda _root: [project], clock=clock
+    )
+
+    assert watcher.poll() == []
+    clock.now += 20
+    (project / "b.pdf").write_text("bb", encoding="utf-8")
+    assert watcher.poll() == []
+    clock.now += 20
+    assert watcher.poll() == []
+    clock.now += 15
+    assert watcher.poll() == [project]
+
+    watcher.mark_done(project)
+    clock.now += 100
+    assert watcher.poll() == []
+
+    (project / "c.pdf").write_text("ccc", encoding="utf-8")
+    assert watcher.poll() == []
+    clock.now += 30
+    assert watcher.poll() == [project]
+
+
+def test_watch_once_dispatches_settled_project(tmp_path: Path, monkeypatch) -> None:
+    module = _load_pipeline_module()
+    inbox_dir = tmp_path / "inbox"
+    logs_dir = tmp_path / "logs"
+    dest_dir = tmp_path / "dest"
+    (inbox_dir / NAME).mkdir(parents=True)
+    (inbox_dir / NAME / f"{NAME}.pdf").write_text("pdf", encoding="utf-8")
+
+    monkeypatch.setattr(module, "NOTES_DIR", tmp_path / "notes")
+    monkeypatch.setattr(module, "TRA_GST_DIR", tmp_path / "gst")
+    monkeypatch.setattr(module, "DEST_ROOT_DIR", dest_dir)
+    monkeypatch.setenv("TOIR_DISPATCH_DIR", str(logs_dir))
+    monkeypatch.setenv("TOIR_ENABLE_TRA_SUB_APP", "0")
+    monkeypatch.setenv("TOIR_ARCHIVE_WORKERS", "0")
+
+    result = watch(
+        inbox_dir,
+        interval=0,
+        settle=0,
+        once=True,
+        pipeline=module,
+        today=lambda: date(2025, 1, 2),
+    )
+
+    assert result == 0
+    assert (tmp_path / "notes" / f"{NAME}.pdf").exists()
+    assert any(dest_dir.rglob(f"{NAME}.zip"))
+    assert module.LOGGER is None
+    entries = list(iter_run_logs("20250102_watch", base_dir=logs_dir))
+    assert entries
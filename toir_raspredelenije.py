@@ -1,29 +1,118 @@
+import argparse
+import contextlib
+import dataclasses
 import re
-import shutil
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, wait
 from pathlib import Path
 import sys
 from datetime import datetime
 import json
 import os
+from typing import Callable, Iterator, Mapping, Sequence, TypeVar
 
 SRC_DIR = Path(__file__).resolve().parent / "src"
 if SRC_DIR.exists() and str(SRC_DIR) not in sys.path:
     sys.path.insert(0, str(SRC_DIR))
 
+from toir_manager.core.distribution_plan import (  # noqa: E402
+    DistributionPlan,
+    PlanIssue,
+    PlannedArchive,
+    PlannedCopy,
+    PlannedRename,
+    ProjectPlan,
+)
 from toir_manager.core.logging_models import (  # noqa: E402
     TransferAction,
     TransferStatus,
 )
+from toir_manager.core.run_config import (  # noqa: E402
+    DEFAULT_ARCHIVE_WORKERS,
+    InboxSource,
+    RunConfig,
+    RunContext,
+)
+from toir_manager.services.archiver import (  # noqa: E402
+    DEFAULT_STORED_EXTENSIONS,
+    ArchiveResult,
+    ArchiveStage,
+    CompressionPolicy,
+    partial_path_for,
+    write_zip_archive_with_retry,
+)
+from toir_manager.services.bandwidth import (  # noqa: E402
+    MEGABYTE,
+    BandwidthLimiter,
+    RootThroughput,
+    parse_limits,
+)
+from toir_manager.services.console import BufferedConsole  # noqa: E402
+from toir_manager.services.directory_registry import DirectoryRegistry  # noqa: E402
+from toir_manager.services.discovery import (  # noqa: E402
+    DiscoveredProject,
+    DiscoveryStats,
+    discover_projects,
+)
+from toir_manager.services.folder_index import FolderIndex  # noqa: E402
+from toir_manager.services.gst_index import (  # noqa: E402
+    GstWeekAllocator,
+    GstWeekIndex,
+    gst_folder_name,
+)
+from toir_manager.services.io_queues import (  # noqa: E402
+    DestinationQueues,
+    parse_concurrency,
+)
+from toir_manager.services.leases import (  # noqa: E402
+    DEFAULT_DONE_TTL,
+    DEFAULT_LEASE_TTL,
+    LEASE_DIR_NAME,
+    Lease,
+    LeaseManager,
+    lease_key,
+)
 from toir_manager.services.log_writer import DispatchLogger  # noqa: E402
+from toir_manager.services.naming import (  # noqa: E402
+    FileName,
+    FolderNames,
+    NameTable,
+    transliterate as _transliterate_text,
+)
+from toir_manager.services.resume import (  # noqa: E402
+    ResumeState,
+    load_resume_state,
+    resume_key,
+)
+from toir_manager.services.retry import (  # noqa: E402
+    CircuitBreakers,
+    CircuitOpenError,
+    RetryPolicy,
+    is_transient,
+)
+from toir_manager.services.scheduler import (  # noqa: E402
+    DEFAULT_SCHEDULE_ORDER,
+    SCHEDULE_ORDERS,
+    ProjectScheduler,
+    ScheduleEntry,
+    parse_priorities,
+    wait_summary,
+)
+from toir_manager.services.settings_store import load_ui_paths  # noqa: E402
+from toir_manager.services.transfer import (  # noqa: E402
+    LINK_MODE_COPY,
+    LINK_MODES,
+    SKIP_MODE_HASH,
+    SKIP_MODE_STAT,
+    CopyOutcome,
+    distribute_file,
+)
+from toir_manager.services.tz_lookup import TzLookup, TzLookupError  # noqa: E402
+from toir_manager.services.watcher import folder_signature  # noqa: E402
 
-# Для работы с Excel требуется установка библиотеки openpyxl: pip install openpyxl
-try:
-    from openpyxl import load_workbook
-except ImportError:
-    print(
-        "[КРИТИЧЕСКАЯ ОШИБКА] Библиотека openpyxl не найдена. Пожалуйста, установите ее: pip install openpyxl"
-    )
-    sys.exit(1)
+# Библиотека openpyxl (pip install openpyxl) импортируется лениво: только когда
+# справочник TZ_glob.xlsx изменился и его нужно разобрать заново.
 
 # Настройка UTF-8 вывода в Windows-консоли
 try:
@@ -61,26 +150,40 @@ DEST_ROOT_DIR = Path(
     r"D:\\Code_and_Scripts_local\\_TEST_for\\toir_raspredelenije_test2_cel"
 )
 
-# 6. Временная папка для создания архивов (может совпадать с DEST_ROOT_DIR)
+# 6. Временная папка для архивов (устарела: архивы пишутся прямо в Native)
+
+
+def _app_root() -> Path:
+    """Возвращает каталог приложения (рядом с exe или со скриптом)."""
+
+    if getattr(sys, "frozen", False):
+        return Path(sys.executable).resolve().parent
+    return Path(__file__).resolve().parent
 
 
 def _default_temp_archive_dir() -> Path:
     """Возвращает каталог для временных архивов рядом с приложением."""
 
-    if getattr(sys, "frozen", False):
-        base_root = Path(sys.executable).resolve().parent
-    else:
-        base_root = Path(__file__).resolve().parent
-    return base_root / "logs" / "temp"
+    return _app_root() / "logs" / "temp"
+
+
+def _default_cache_dir() -> Path:
+    """Возвращает каталог служебных кешей рядом с журналами."""
+
+    return _app_root() / "logs" / "cache"
 
 
 TEMP_ARCHIVE_DIR = _default_temp_archive_dir()
+CACHE_DIR = _default_cache_dir()
 
 
-def _override_path(default: Path, env_name: str) -> Path:
+def _override_path(
+    default: Path, env_name: str, settings: Mapping[str, str] | None = None
+) -> Path:
     """Возвращает путь, переопределённый переменной окружения."""
 
-    override = os.environ.get(env_name)
+    env = os.environ if settings is None else settings
+    override = (env.get(env_name) or "").strip()
     if not override:
         return default
     candidate = Path(override).expanduser()
@@ -97,224 +200,309 @@ BOOL_FALSE_VALUES = {"0", "false", "no", "off"}
 PART_FILTER_DEFAULT = "CS/LP"
 VALID_PART_FILTERS = {"LP", "CS", "CS/LP"}
 
+WORKERS_DEFAULT = 1
+ARCHIVE_WORKERS_DEFAULT = DEFAULT_ARCHIVE_WORKERS
+
 PERIOD_TRANSLATION = {
     "С": "C",
 }
 
-_TRANSLITERATION_BASE: dict[str, str] = {
-    "А": "A",
-    "Б": "B",
-    "В": "V",
-    "Г": "G",
-    "Ё": "Jo",
-    "Е": "E",
-    "Ж": "Zh",
-    "З": "Z",
-    "И": "I",
-    "Й": "Yo",
-    "К": "K",
-    "Л": "L",
-    "М": "M",
-    "Н": "H",
-    "О": "O",
-    "П": "P",
-    "Р": "P",
-    "С": "C",
-    "Т": "T",
-    "У": "U",
-    "Ф": "F",
-    "Х": "X",
-    "Ц": "C",
-    "Ч": "Ch",
-    "Ш": "Sh",
-    "Щ": "Sch",
-    "Ы": "Y",
-    "Э": "E",
-    "Ю": "Yu",
-    "Я": "Ya",
-}
 
-TRANSLIT_MAP: dict[str, str] = {}
-for _kir, _lat in _TRANSLITERATION_BASE.items():
-    TRANSLIT_MAP[_kir] = _lat
-    _lower = _kir.lower()
-    if _lower != _kir:
-        TRANSLIT_MAP[_lower] = _lat.lower()
+def _env_flag(
+    name: str, default: bool, settings: Mapping[str, str] | None = None
+) -> bool:
+    """Считывает булеву переменную окружения с резервным значением."""
 
-ALLOWED_ASCII_CHARS = set(
-    "abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789-_."
-)
+    value = (os.environ if settings is None else settings).get(name)
+    if value is None:
+        return default
+    normalized = value.strip().lower()
+    if normalized in BOOL_TRUE_VALUES:
+        return True
+    if normalized in BOOL_FALSE_VALUES:
+        return False
+    return default
 
 
-def _transliterate_text(value: str) -> str:
-    """Преобразует строку в латиницу, заменяя неподдерживаемые символы подчёркиванием."""
+def _get_part_filter(settings: Mapping[str, str] | None = None) -> str:
+    """Возвращает фильтр по полю part (CS/LP)."""
 
-    result: list[str] = []
-    for char in value:
-        if char in TRANSLIT_MAP:
-            result.append(TRANSLIT_MAP[char])
-        elif char in ALLOWED_ASCII_CHARS:
-            result.append(char)
-        else:
-            result.append("_")
-    return "".join(result)
+    raw = (os.environ if settings is None else settings).get("TOIR_PART_FILTER")
+    if not raw:
+        return PART_FILTER_DEFAULT
+    normalized = raw.strip().upper()
+    if normalized not in VALID_PART_FILTERS:
+        print(
+            f"[WARN] Неподдерживаемое значение TOIR_PART_FILTER={raw}; используется CS/LP по умолчанию."
+        )
+        return PART_FILTER_DEFAULT
+    return normalized
 
 
-def _ensure_transliterated_project(project_path: Path) -> Path | None:
-    """Переименовывает папку проекта и файлы `_All` в латиницу при необходимости."""
+def _get_link_mode(settings: Mapping[str, str] | None = None) -> str:
+    """Возвращает способ раскладки отчёта по целям (TOIR_LINK_MODE)."""
 
-    current_path = project_path
-    original_dir = project_path
-    target_dir_name = _transliterate_text(project_path.name) or "_"
-    target_dir = project_path.parent / target_dir_name
+    raw = (os.environ if settings is None else settings).get("TOIR_LINK_MODE")
+    if not raw:
+        return LINK_MODE_COPY
+    normalized = raw.strip().lower()
+    if normalized not in LINK_MODES:
+        print(
+            f"[WARN] Неподдерживаемое значение TOIR_LINK_MODE={raw}; используется copy."
+        )
+        return LINK_MODE_COPY
+    return normalized
 
-    if target_dir != project_path:
-        if target_dir.exists():
-            message = f"Невозможно переименовать папку {project_path} в {target_dir}: цель уже существует."
-            print(f"  - [Ошибка] {message}")
-            _log_error(
-                TransferAction.RENAME,
-                project_path,
-                target_dir,
-                message,
-                {"renamed_from": project_path.name, "renamed_to": target_dir.name},
-            )
-            return None
+
+def _parse_extensions(raw: str) -> frozenset[str]:
+    """Разобрать список расширений вида `pdf, .zip;dwg`."""
+
+    items = re.split(r"[,;\s]+", raw.strip().lower())
+    return frozenset(
+        item if item.startswith(".") else f".{item}" for item in items if item
+    )
+
+
+def _get_compression_policy(
+    settings: Mapping[str, str] | None = None,
+) -> CompressionPolicy:
+    """Собирает политику сжатия Native-архивов из переменных окружения.
+
+    TOIR_ARCHIVE_LEVEL — уровень deflate по умолчанию (0-9, 0 — без сжатия);
+    TOIR_ARCHIVE_STORE_EXT — расширения, которые кладутся без сжатия;
+    TOIR_ARCHIVE_EXT_LEVELS — уровни по расширениям (`txt=9,dxf=9`);
+    TOIR_ARCHIVE_SAMPLE — размер пробы в байтах (0 отключает пробное сжатие).
+    """
+
+    env = os.environ if settings is None else settings
+    defaults = CompressionPolicy()
+    level = defaults.default_level
+    raw_level = env.get("TOIR_ARCHIVE_LEVEL")
+    if raw_level:
         try:
-            project_path.rename(target_dir)
-            current_path = target_dir
+            level = max(0, min(9, int(raw_level.strip())))
+        except ValueError:
             print(
-                f"  - [INFO] Папка переименована: {original_dir.name} -> {target_dir.name}"
-            )
-            _log_success(
-                TransferAction.RENAME,
-                original_dir,
-                target_dir,
-                {"renamed_from": original_dir.name, "renamed_to": target_dir.name},
-            )
-        except OSError as exc:
-            message = f"Не удалось переименовать папку {project_path}: {exc}"
-            print(f"  - [Ошибка] {message}")
-            _log_error(
-                TransferAction.RENAME,
-                project_path,
-                target_dir,
-                message,
-                {"renamed_from": original_dir.name, "renamed_to": target_dir_name},
+                f"[WARN] Неподдерживаемое значение TOIR_ARCHIVE_LEVEL={raw_level}; "
+                f"используется {defaults.default_level}."
             )
-            return None
 
-    files_to_process = list(current_path.glob("*_All*.[pP][dD][fF]"))
-    for file_path in files_to_process:
-        suffix = file_path.suffix
-        base_name = file_path.name[: -len(suffix)]
-        transliterated_base = _transliterate_text(base_name) or "_"
-        target_file = file_path.with_name(transliterated_base + suffix.lower())
-        if target_file == file_path:
+    stored = DEFAULT_STORED_EXTENSIONS
+    raw_stored = env.get("TOIR_ARCHIVE_STORE_EXT")
+    if raw_stored is not None:
+        stored = _parse_extensions(raw_stored)
+
+    levels: dict[str, int] = {}
+    for item in re.split(r"[,;\s]+", env.get("TOIR_ARCHIVE_EXT_LEVELS", "")):
+        if not item:
             continue
-        if target_file.exists():
-            message = f"Невозможно переименовать файл {file_path.name} в {target_file.name}: цель уже существует."
-            print(f"  - [Ошибка] {message}")
-            _log_error(
-                TransferAction.RENAME,
-                file_path,
-                target_file,
-                message,
-                {
-                    "file_name": file_path.name,
-                    "project_folder": current_path.name,
-                    "rename_target": target_file.name,
-                },
-            )
+        ext, _, value = item.partition("=")
+        try:
+            ext_level = max(0, min(9, int(value)))
+        except ValueError:
+            print(f"[WARN] Пропущено правило TOIR_ARCHIVE_EXT_LEVELS: {item}")
             continue
+        for suffix in _parse_extensions(ext):
+            levels[suffix] = ext_level
+
+    sample_size = defaults.sample_size
+    raw_sample = env.get("TOIR_ARCHIVE_SAMPLE")
+    if raw_sample:
         try:
-            file_path.rename(target_file)
+            sample_size = max(0, int(raw_sample.strip()))
+        except ValueError:
             print(
-                f"  - [INFO] Файл переименован: {file_path.name} -> {target_file.name}"
-            )
-            _log_success(
-                TransferAction.RENAME,
-                file_path,
-                target_file,
-                {"renamed_from": file_path.name, "renamed_to": target_file.name},
-            )
-        except OSError as exc:
-            message = f"Не удалось переименовать файл {file_path.name}: {exc}"
-            print(f"  - [Ошибка] {message}")
-            _log_error(
-                TransferAction.RENAME,
-                file_path,
-                target_file,
-                message,
-                {
-                    "file_name": file_path.name,
-                    "project_folder": current_path.name,
-                    "rename_target": target_file.name,
-                },
+                f"[WARN] Неподдерживаемое значение TOIR_ARCHIVE_SAMPLE={raw_sample}; "
+                f"используется {defaults.sample_size}."
             )
-    return current_path
 
+    return CompressionPolicy(
+        default_level=level,
+        stored_extensions=stored,
+        extension_levels=levels,
+        sample_size=sample_size,
+    )
 
-def _env_flag(name: str, default: bool) -> bool:
-    """Считывает булеву переменную окружения с резервным значением."""
 
-    value = os.environ.get(name)
-    if value is None:
-        return default
-    normalized = value.strip().lower()
-    if normalized in BOOL_TRUE_VALUES:
-        return True
+def _get_skip_mode(settings: Mapping[str, str] | None = None) -> str | None:
+    """Возвращает режим пропуска актуальных целей (TOIR_SKIP_IDENTICAL).
+
+    `0`/`off` — всегда копировать (по умолчанию), `1`/`on`/`stat` — сравнивать
+    размер и mtime, `hash` — размер и хеш содержимого.
+    """
+
+    raw = (os.environ if settings is None else settings).get("TOIR_SKIP_IDENTICAL")
+    if not raw:
+        return None
+    normalized = raw.strip().lower()
     if normalized in BOOL_FALSE_VALUES:
-        return False
-    return default
+        return None
+    if normalized in BOOL_TRUE_VALUES or normalized == SKIP_MODE_STAT:
+        return SKIP_MODE_STAT
+    if normalized == SKIP_MODE_HASH:
+        return SKIP_MODE_HASH
+    print(
+        f"[WARN] Неподдерживаемое значение TOIR_SKIP_IDENTICAL={raw}; пропуск отключён."
+    )
+    return None
 
 
-def _get_part_filter() -> str:
-    """Возвращает фильтр по полю part (CS/LP)."""
+def _get_worker_count(
+    requested: int | None = None, settings: Mapping[str, str] | None = None
+) -> int:
+    """Возвращает число потоков обработки проектов (`--workers`/TOIR_WORKERS)."""
 
-    raw = os.environ.get("TOIR_PART_FILTER")
+    if requested is not None:
+        return max(1, requested)
+    raw = (os.environ if settings is None else settings).get("TOIR_WORKERS")
     if not raw:
-        return PART_FILTER_DEFAULT
-    normalized = raw.strip().upper()
-    if normalized not in VALID_PART_FILTERS:
+        return WORKERS_DEFAULT
+    try:
+        value = int(raw.strip())
+    except ValueError:
         print(
-            f"[WARN] Неподдерживаемое значение TOIR_PART_FILTER={raw}; используется CS/LP по умолчанию."
+            f"[WARN] Неподдерживаемое значение TOIR_WORKERS={raw}; используется {WORKERS_DEFAULT}."
         )
-        return PART_FILTER_DEFAULT
+        return WORKERS_DEFAULT
+    return max(1, value)
+
+
+def _get_archive_worker_count(settings: Mapping[str, str] | None = None) -> int:
+    """Число процессов архивации (TOIR_ARCHIVE_WORKERS, 0 — в потоке проекта)."""
+
+    raw = (os.environ if settings is None else settings).get("TOIR_ARCHIVE_WORKERS")
+    if not raw:
+        return ARCHIVE_WORKERS_DEFAULT
+    try:
+        value = int(raw.strip())
+    except ValueError:
+        print(
+            f"[WARN] Неподдерживаемое значение TOIR_ARCHIVE_WORKERS={raw}; "
+            f"используется {ARCHIVE_WORKERS_DEFAULT}."
+        )
+        return ARCHIVE_WORKERS_DEFAULT
+    return max(0, value)
+
+
+def _get_positive_number(
+    name: str, default: float, settings: Mapping[str, str] | None = None
+) -> float:
+    """Положительное число из настроек (секунды, размер пачки, число попыток)."""
+
+    raw = (os.environ if settings is None else settings).get(name)
+    if not raw or not raw.strip():
+        return default
+    try:
+        value = float(raw.strip())
+    except ValueError:
+        value = 0.0
+    if value <= 0:
+        print(
+            f"[WARN] Неподдерживаемое значение {name}={raw}; используется {default:g}."
+        )
+        return default
+    return value
+
+
+def _get_schedule_order(settings: Mapping[str, str] | None = None) -> str:
+    """Возвращает порядок обработки проектов (TOIR_SCHEDULE_ORDER)."""
+
+    raw = (os.environ if settings is None else settings).get("TOIR_SCHEDULE_ORDER")
+    if not raw:
+        return DEFAULT_SCHEDULE_ORDER
+    normalized = raw.strip().lower()
+    if normalized not in SCHEDULE_ORDERS:
+        print(
+            f"[WARN] Неподдерживаемое значение TOIR_SCHEDULE_ORDER={raw}; "
+            f"используется {DEFAULT_SCHEDULE_ORDER}."
+        )
+        return DEFAULT_SCHEDULE_ORDER
     return normalized
 
 
+def _get_schedule_queue(settings: Mapping[str, str] | None = None) -> int:
+    """Возвращает размер очереди готовых проектов (TOIR_SCHEDULE_QUEUE, 0 — авто)."""
+
+    raw = (os.environ if settings is None else settings).get("TOIR_SCHEDULE_QUEUE")
+    if not raw:
+        return 0
+    try:
+        value = int(raw.strip())
+    except ValueError:
+        print(
+            f"[WARN] Неподдерживаемое значение TOIR_SCHEDULE_QUEUE={raw}; "
+            "используется удвоенное число потоков."
+        )
+        return 0
+    return max(0, value)
+
+
+def _get_bandwidth_file(settings: Mapping[str, str] | None = None) -> Path | None:
+    """Файл управления лимитами скорости (TOIR_BANDWIDTH_FILE), None — не задан."""
+
+    raw = (os.environ if settings is None else settings).get("TOIR_BANDWIDTH_FILE")
+    if not raw or not raw.strip():
+        return None
+    return Path(raw.strip()).expanduser()
+
+
+# Устаревшие настройки и причина, по которой они больше не действуют.
+DEPRECATED_SETTINGS = {
+    "TOIR_TEMP_ARCHIVE_DIR": "архивы пишутся сразу в каталог Native",
+}
+_DEPRECATION_WARNED: set[str] = set()
+
+
+def _warn_deprecated_settings(settings: Mapping[str, str] | None = None) -> None:
+    """Один раз на процесс предупредить о заданных устаревших настройках."""
+
+    env = os.environ if settings is None else settings
+    for name, reason in DEPRECATED_SETTINGS.items():
+        if name in _DEPRECATION_WARNED or not (env.get(name) or "").strip():
+            continue
+        _DEPRECATION_WARNED.add(name)
+        print(f"[WARN] Настройка {name} устарела и не используется: {reason}.")
+
+
+def _get_io_queues(
+    settings: Mapping[str, str] | None = None,
+) -> tuple[tuple[str, int], ...] | None:
+    """Очереди записи по корням назначения (TOIR_IO_QUEUES); None — выключены.
+
+    `1` включает очереди с лимитом по умолчанию, `NOTES=2,TRA_GST=1,*=4`
+    задаёт число одновременных записей по корням.
+    """
+
+    raw = (os.environ if settings is None else settings).get("TOIR_IO_QUEUES")
+    if not raw or not raw.strip():
+        return None
+    normalized = raw.strip().lower()
+    if normalized in BOOL_FALSE_VALUES:
+        return None
+    if normalized in BOOL_TRUE_VALUES:
+        return ()
+    return tuple(parse_concurrency(raw).items())
+
+
 INBOX_DIR = _override_path(INBOX_DIR, "TOIR_INBOX_DIR")
 NOTES_DIR = _override_path(NOTES_DIR, "TOIR_NOTES_DIR")
 TRA_GST_DIR = _override_path(TRA_GST_DIR, "TOIR_TRA_GST_DIR")
 TRA_SUB_APP_DIR = _override_path(TRA_SUB_APP_DIR, "TOIR_TRA_SUB_APP_DIR")
 DEST_ROOT_DIR = _override_path(DEST_ROOT_DIR, "TOIR_DEST_ROOT_DIR")
+# Архивы пишутся сразу в каталог Native (`*.zip.partial` -> `*.zip`);
+# TEMP_ARCHIVE_DIR сохранён для совместимости настроек и больше не используется,
+# о заданной TOIR_TEMP_ARCHIVE_DIR предупреждает `_warn_deprecated_settings`.
 TEMP_ARCHIVE_DIR = _override_path(TEMP_ARCHIVE_DIR, "TOIR_TEMP_ARCHIVE_DIR")
-TEMP_ARCHIVE_DIR.mkdir(parents=True, exist_ok=True)
+CACHE_DIR = _override_path(CACHE_DIR, "TOIR_CACHE_DIR")
 
 # 7. Путь к файлу-справочнику
 TZ_FILE_PATH = Path("Template/TZ_glob.xlsx")
+# Скомпилированный индекс справочника (перестраивается при изменении файла)
+TZ_CACHE_FILE_NAME = "tz_glob.json"
 
 
 # === НАСТРОЙКИ ЛОГИКИ ===
 
-# Регулярное выражение для разбора имени файла на основе предоставленной схемы
-RE_FILENAME = re.compile(
-    r"""^CT-
-    (?P<type>CL|DR)-
-    (?P<scope>[A-Z0-9]+)-
-    (?P<part>CS|LP)-
-    (?P<object_name>[A-Z0-9]+)-
-    (?P<tz_index>[\w\.]+)-
-    (?P<reserved>\d{2})-
-    (?P<period>\w+)-
-    (?P<date>\d{8})-
-    (?P<revision>\d{2})
-    _All.*?\.pdf$""",  # Ищем _All, затем любые символы, и только .pdf
-    re.IGNORECASE | re.VERBOSE,
-)
-
-
 # Словарь для перевода номера месяца в название
 MONTH_MAP = {
     "01": "January",
@@ -410,7 +598,23 @@ LP_FOLDER_OVERRIDES: dict[str, str] = {
 }
 
 
+_T = TypeVar("_T")
+_R = TypeVar("_R")
+
+# Журнал и кэши для вызовов без явного RunContext (совместимость: UI, тесты,
+# `process_project_folder(path)`); запуски `main` в них не пишут.
 LOGGER: DispatchLogger | None = None
+ARCHIVE_STAGE: ArchiveStage | None = None
+DIRECTORIES: DirectoryRegistry | None = None
+GST_INDEX: GstWeekIndex | None = None
+FOLDERS: FolderIndex | None = None
+
+
+def _echo(context: RunContext | None, *values: object, end: str = "\n") -> None:
+    """Напечатать через консоль запуска (в буфер потока проекта, если он собирается)."""
+
+    console = context.console if context is not None else None
+    print(*values, end=end, file=console if console is not None else sys.stdout)
 
 
 def _merge_metadata(
@@ -426,6 +630,7 @@ def _merge_metadata(
 
 
 def _log_success(
+    context: RunContext,
     action: TransferAction,
     source: Path,
     target: Path | None,
@@ -433,10 +638,11 @@ def _log_success(
 ) -> None:
     """Безопасно записать успешную операцию в журнал."""
 
-    if LOGGER is None:
+    logger = context.logger
+    if logger is None:
         return
     try:
-        LOGGER.log_success(
+        logger.log_success(
             action=action, source_path=source, target_path=target, metadata=metadata
         )
     except Exception:
@@ -444,6 +650,7 @@ def _log_success(
 
 
 def _log_error(
+    context: RunContext,
     action: TransferAction,
     source: Path,
     target: Path | None,
@@ -452,10 +659,11 @@ def _log_error(
 ) -> None:
     """Безопасно записать ошибку операции."""
 
-    if LOGGER is None:
+    logger = context.logger
+    if logger is None:
         return
     try:
-        LOGGER.log_error(
+        logger.log_error(
             action=action,
             source_path=source,
             target_path=target,
@@ -466,7 +674,32 @@ def _log_error(
         pass
 
 
+def _log_skipped(
+    context: RunContext,
+    action: TransferAction,
+    source: Path,
+    target: Path | None,
+    metadata: dict[str, str] | None = None,
+) -> None:
+    """Безопасно записать цель, пропущенную как уже актуальная."""
+
+    logger = context.logger
+    if logger is None:
+        return
+    try:
+        logger.log_skipped(
+            action=action,
+            source_path=source,
+            target_path=target,
+            message="identical",
+            metadata=metadata,
+        )
+    except Exception:
+        pass
+
+
 def _log_destination_event(
+    context: RunContext,
     event: str,
     source: Path,
     target: Path,
@@ -474,10 +707,11 @@ def _log_destination_event(
 ) -> None:
     """Логирует событие для каталога назначения."""
 
-    if LOGGER is None:
+    logger = context.logger
+    if logger is None:
         return
     try:
-        LOGGER.log(
+        logger.log(
             action=TransferAction.COPY_DESTINATION,
             status=TransferStatus.SUCCESS,
             source_path=source,
@@ -489,68 +723,437 @@ def _log_destination_event(
         pass
 
 
-# Колонка с суффиксами (краткая аббревиатура)
+def _record_issue(
+    context: RunContext,
+    issues: list[PlanIssue] | None,
+    action: TransferAction,
+    source: Path,
+    target: Path | None,
+    message: str,
+    metadata: dict[str, str] | None = None,
+) -> None:
+    """Отложить ошибку до исполнения плана или сразу записать её в журнал."""
+
+    if issues is None:
+        _log_error(context, action, source, target, message, metadata)
+    else:
+        issues.append(PlanIssue(action, source, target, message, metadata))
 
 
-def find_suffix_in_tz_file(lookup_key: str) -> str | None:
-    """
-    Ищет индекс в файле TZ_glob.xlsx и возвращает суффикс.
+def _ensure_directory(context: RunContext, path: Path) -> None:
+    """Создать каталог; в рамках запуска повторные запросы отвечаются реестром."""
+
+    if context.directories is not None:
+        context.directories.ensure(path)
+    else:
+        path.mkdir(parents=True, exist_ok=True)
+
+
+def _directory_exists(context: RunContext, path: Path) -> bool:
+    """Проверить наличие каталога с учётом реестра запуска."""
+
+    if context.directories is not None:
+        return context.directories.exists(path)
+    return path.is_dir()
+
+
+def _prepare_directories(
+    context: RunContext, directories: list[Path]
+) -> dict[Path, BaseException]:
+    """Создать каталоги назначения одним проходом; вернуть ошибки по каталогам."""
+
+    errors: dict[Path, BaseException] = {}
+    for directory in directories:
+        if directory in errors:
+            continue
+        try:
+            _ensure_directory(context, directory)
+        except OSError as exc:
+            errors[directory] = exc
+    return errors
+
+
+def _distribute_report(
+    context: RunContext,
+    report_file: Path,
+    targets: list[PlannedCopy],
+    dir_errors: dict[Path, BaseException] | None = None,
+) -> dict[TransferAction, bool]:
+    """Скопировать отчёт во все цели за одно чтение и зафиксировать каждую в журнале.
+
+    Если `dir_errors` не передан, каталоги целей создаются здесь же; иначе
+    считается, что их уже подготовил исполнитель плана. Цель в неделе
+    04_TRA_GST пишется отдельно, под блокировкой выбора недели. С очередями
+    записи (`TOIR_IO_QUEUES`) цели группируются по корням назначения, группы
+    ставятся во все очереди сразу, и функция возвращается, когда ответили
+    все очереди; отчёт тогда читается один раз на корень.
     """
-    if not TZ_FILE_PATH.exists():
-        print(f"  - [ОШИБКА] Файл-справочник не найден: {TZ_FILE_PATH}")
-        return None
 
+    results: dict[TransferAction, bool] = {}
+    writable: list[PlannedCopy] = []
+    gst_targets: list[PlannedCopy] = []
+    for item in targets:
+        if item.action == TransferAction.COPY_GST:
+            gst_targets.append(item)
+            continue
+        error = _target_dir_error(context, item, dir_errors)
+        if error is not None:
+            _report_copy_error(context, report_file, item, error)
+            results[item.action] = False
+            continue
+        writable.append(item)
+    results.update(_write_copies(context, report_file, writable))
+
+    for planned in gst_targets:
+        with _reserve_gst_week(context, planned) as (item, moved):
+            error = _target_dir_error(context, item, None if moved else dir_errors)
+            if error is not None:
+                _report_copy_error(context, report_file, item, error)
+                results[item.action] = False
+                continue
+            results.update(_write_copies(context, report_file, [item]))
+    return results
+
+
+def _target_dir_error(
+    context: RunContext,
+    item: PlannedCopy,
+    dir_errors: dict[Path, BaseException] | None,
+) -> BaseException | None:
+    """Ошибка каталога цели: из подготовки исполнителем или при создании здесь."""
+
+    if dir_errors is not None:
+        return dir_errors.get(item.target.parent)
     try:
-        wb = load_workbook(TZ_FILE_PATH, data_only=True)
-        if TZ_SHEET_NAME not in wb.sheetnames:
-            print(
-                f"  - [ОШИБКА] Лист '{TZ_SHEET_NAME}' не найден в файле {TZ_FILE_PATH}"
+        _ensure_directory(context, item.target.parent)
+    except Exception as e:  # noqa: BLE001
+        return e
+    return None
+
+
+def _write_copies(
+    context: RunContext, report_file: Path, writable: list[PlannedCopy]
+) -> dict[TransferAction, bool]:
+    """Записать отчёт в цели напрямую или через очереди корней назначения."""
+
+    if not writable:
+        return {}
+    if context.io_queues is None:
+        return _write_targets(context, report_file, writable)
+
+    groups: dict[str, list[PlannedCopy]] = {}
+    for item in writable:
+        groups.setdefault(context.io_queues.root_for(item.target), []).append(item)
+    futures = [
+        _submit_to_queue(
+            context, items[0].target, _write_targets, context, report_file, items
+        )
+        for items in groups.values()
+    ]
+    wait(futures)
+    results: dict[TransferAction, bool] = {}
+    for future in futures:
+        written, output = future.result()
+        _echo(context, output, end="")
+        results.update(written)
+    return results
+
+
+def _write_targets(
+    context: RunContext, report_file: Path, writable: list[PlannedCopy]
+) -> dict[TransferAction, bool]:
+    """Записать отчёт в цели с повтором временных сбоев и учётом размыкателей."""
+
+    results: dict[TransferAction, bool] = {}
+    policy = context.config.retry_policy or RetryPolicy(max_attempts=1)
+    breakers = context.breakers
+    pending = writable
+    attempt = 0
+    while pending:
+        attempt += 1
+        allowed: list[PlannedCopy] = []
+        for item in pending:
+            try:
+                if breakers is not None:
+                    breakers.check(item.target)
+            except CircuitOpenError as e:
+                _report_copy_error(
+                    context, report_file, _with_attempts(item, attempt - 1), e
+                )
+                results[item.action] = False
+                continue
+            allowed.append(item)
+
+        outcomes: list[CopyOutcome] | None = None
+        try:
+            outcomes = distribute_file(
+                report_file,
+                [item.target for item in allowed],
+                link_mode=context.config.link_mode,
+                skip_identical=context.config.skip_mode,
+                throttle=context.bandwidth.throttle if context.bandwidth else None,
             )
-            return None
+        finally:
+            # Разрешение каждой цели (и пробную запись) возвращаем при любом исходе
+            if breakers is not None:
+                for index, item in enumerate(allowed):
+                    if outcomes is None:
+                        breakers.release(item.target)
+                    else:
+                        breakers.record(item.target, outcomes[index].error)
+        pending = []
+        for item, outcome in zip(allowed, outcomes):
+            if (
+                outcome.error is not None
+                and attempt < policy.max_attempts
+                and is_transient(outcome.error)
+            ):
+                pending.append(item)
+                continue
+            results[item.action] = _log_copy_outcome(
+                context, report_file, _with_attempts(item, attempt), outcome
+            )
+        if pending:
+            delay = policy.delay(attempt)
+            _echo(
+                context,
+                f"  - [Повтор] Временный сбой записи ({len(pending)} целей), "
+                f"попытка {attempt + 1} из {policy.max_attempts} через {delay:.1f} с.",
+            )
+            time.sleep(delay)
+            for item in pending:
+                # Каталог мог ещё не появиться на сервере (ENOENT)
+                with contextlib.suppress(OSError):
+                    item.target.parent.mkdir(parents=True, exist_ok=True)
+    return results
 
-        ws = wb[TZ_SHEET_NAME]
 
-        lookup_col_idx = ord(TZ_LOOKUP_COL.upper()) - ord("A") + 1
-        suffix_col_idx = ord(TZ_SUFFIX_COL.upper()) - ord("A") + 1
+def _submit_to_queue(
+    context: RunContext, path: Path, func: Callable[..., _R], *args: object
+) -> Future[tuple[_R, str]]:
+    """Поставить запись в очередь корня `path`; вывод задачи возвращается вместе с итогом.
 
-        for row in ws.iter_rows(
-            min_row=2, values_only=True
-        ):  # Начинаем со второй строки, пропуская заголовок
-            cell_value = (
-                str(row[lookup_col_idx - 1]).strip().lower()
-                if row[lookup_col_idx - 1]
-                else ""
-            )
-            if cell_value == lookup_key.strip().lower():
-                suffix = row[suffix_col_idx - 1]
-                return str(suffix).strip() if suffix else None
+    Поток проекта печатает вывод задач сам, поэтому лог проекта остаётся
+    одним блоком, даже когда записи идут в потоках очередей.
+    """
 
-        return None
-    except Exception as e:
-        print(f"  - [ОШИБКА] Ошибка при чтении файла {TZ_FILE_PATH}: {e}")
-        return None
+    assert context.io_queues is not None
+    console = context.console
 
+    def run() -> tuple[_R, str]:
+        if console is None:
+            return func(*args), ""
+        with console.capture(emit=False) as buffer:
+            result = func(*args)
+        return result, buffer.getvalue()
 
-def process_special_grouping_for_sub_app(
-    report_file: Path, data: dict, metadata: dict[str, str] | None = None
-) -> None:
-    """Организовать дополнительную выгрузку файла в каталог 05_TRA_SUB_app."""
+    return context.io_queues.submit(path, run)
 
-    print(f"  - Обрабатываем дополнительную группировку для {TRA_SUB_APP_DIR.name}...")
-    try:
-        grouping_key = f"{data['tz_index']}-{data['reserved']}-{data['period']}"
-        period_raw = data["period"].upper()
-        period = PERIOD_TRANSLATION.get(period_raw, period_raw)
 
-        folder_name = ""
-        extra_metadata = _merge_metadata(
-            metadata,
-            {
-                "grouping_key": grouping_key,
-            },
+def _with_attempts(item: PlannedCopy, attempts: int) -> PlannedCopy:
+    """Цель копирования с числом попыток записи в метаданных журнала."""
+
+    return dataclasses.replace(
+        item, metadata=_merge_metadata(item.metadata, {"attempts": str(attempts)})
+    )
+
+
+def _log_copy_outcome(
+    context: RunContext, report_file: Path, item: PlannedCopy, outcome: CopyOutcome
+) -> bool:
+    """Вывести и записать в журнал итог записи в одну цель; True — без ошибки."""
+
+    if outcome.skipped:
+        _log_skipped(context, item.action, report_file, item.target, item.metadata)
+        _echo(context, f"  - [SKIP] Цель уже актуальна: {item.target}")
+        return True
+    if outcome.ok:
+        _log_success(
+            context,
+            item.action,
+            report_file,
+            item.target,
+            _merge_metadata(item.metadata, {"transfer_method": outcome.method}),
         )
+        _echo(context, item.success_message)
+        return True
+    assert outcome.error is not None
+    _report_copy_error(context, report_file, item, outcome.error)
+    return False
 
-        if period == "C":  # Обрабатываем латинский и кириллический варианты
+
+def _get_gst_allocator(context: RunContext, tra_gst_dir: Path) -> GstWeekAllocator:
+    """Выбор недель запуска или одноразовый вне запуска."""
+
+    allocator = context.gst_allocator
+    if allocator is not None and allocator.root == tra_gst_dir:
+        return allocator
+    return GstWeekAllocator(_get_gst_index(context, tra_gst_dir))
+
+
+@contextlib.contextmanager
+def _reserve_gst_week(
+    context: RunContext, item: PlannedCopy
+) -> Iterator[tuple[PlannedCopy, bool]]:
+    """Подтвердить неделю GST из плана и держать блокировку выбора на время записи.
+
+    Если неделю за время между планированием и копированием заняли архивом,
+    цель переносится на следующую свободную неделю (True во втором элементе).
+    Если блокировку взять не удалось, отчёт пишется в неделю из плана.
+    """
+
+    try:
+        year = item.metadata["gst_folder"].split("_", 1)[0]
+        planned_week = int(item.metadata["week"])
+    except (KeyError, ValueError):
+        yield item, False
+        return
+    allocator = _get_gst_allocator(context, item.target.parent.parent)
+    with contextlib.ExitStack() as stack:
+        try:
+            week = stack.enter_context(allocator.reserve(year, planned_week))
+        except TimeoutError as exc:
+            _echo(
+                context,
+                f"    - [Внимание] {exc}; оставляем неделю {planned_week} из плана.",
+            )
+            week = planned_week
+        if week == planned_week:
+            yield item, False
+            return
+        target_dir = allocator.root / gst_folder_name(year, week)
+        _echo(
+            context,
+            f"    - Неделя {planned_week} занята архивом после планирования, "
+            f"отчёт переносится в {target_dir.name}",
+        )
+        yield (
+            dataclasses.replace(
+                item,
+                target=target_dir / item.target.name,
+                metadata=_merge_metadata(
+                    item.metadata,
+                    {
+                        "gst_folder": target_dir.name,
+                        "week": str(week),
+                        "planned_week": str(planned_week),
+                    },
+                ),
+                success_message=f"    - Файл успешно помещён в {target_dir}",
+            ),
+            True,
+        )
+
+
+def _report_copy_error(
+    context: RunContext, report_file: Path, item: PlannedCopy, error: BaseException
+) -> None:
+    """Вывести и записать в журнал ошибку копирования в одну цель."""
+
+    message = f"{item.error_message}: {error}"
+    _echo(context, f"  - [Ошибка] {message}")
+    _log_error(context, item.action, report_file, item.target, message, item.metadata)
+
+
+# Колонка с суффиксами (краткая аббревиатура)
+
+
+_TZ_LOOKUP: TzLookup | None = None
+_TZ_LOOKUP_LOCK = threading.Lock()
+
+
+def _get_tz_lookup(cache_dir: Path | None = None) -> TzLookup:
+    """Вернуть общий для процесса индекс справочника TZ_FILE_PATH."""
+
+    global _TZ_LOOKUP
+    cache_path = (cache_dir or CACHE_DIR) / TZ_CACHE_FILE_NAME
+    with _TZ_LOOKUP_LOCK:
+        if (
+            _TZ_LOOKUP is None
+            or _TZ_LOOKUP.path != TZ_FILE_PATH
+            or _TZ_LOOKUP.cache_path != cache_path
+        ):
+            _TZ_LOOKUP = TzLookup(
+                TZ_FILE_PATH,
+                TZ_SHEET_NAME,
+                TZ_LOOKUP_COL,
+                TZ_SUFFIX_COL,
+                cache_path=cache_path,
+            )
+        return _TZ_LOOKUP
+
+
+def find_suffix_in_tz_file(
+    lookup_key: str, context: RunContext | None = None
+) -> str | None:
+    """
+    Ищет индекс в файле TZ_glob.xlsx и возвращает суффикс.
+    Лист разбирается один раз и перечитывается только при изменении файла.
+    """
+    if not TZ_FILE_PATH.exists():
+        _echo(context, f"  - [ОШИБКА] Файл-справочник не найден: {TZ_FILE_PATH}")
+        return None
+
+    lookup = _get_tz_lookup(context.config.cache_dir if context else None)
+    try:
+        if lookup.reload_if_changed():
+            report = lookup.report
+            source = "кеш" if lookup.last_source == "cache" else "xlsx"
+            _echo(
+                context,
+                f"  - [ИНФО] Справочник {TZ_FILE_PATH} загружен ({source}): "
+                f"строк {report.rows}, индексов {len(lookup.index())}.",
+            )
+            if report.missing_suffix:
+                _echo(
+                    context,
+                    "  - [Предупреждение] Индексы без суффикса: "
+                    + ", ".join(report.missing_suffix),
+                )
+            if report.duplicates:
+                _echo(
+                    context,
+                    "  - [Предупреждение] Повторяющиеся индексы (используется первая строка): "
+                    + ", ".join(sorted(set(report.duplicates))),
+                )
+        return lookup.lookup(lookup_key)
+    except TzLookupError as e:
+        _echo(context, f"  - [ОШИБКА] {e}")
+        return None
+    except Exception as e:
+        _echo(context, f"  - [ОШИБКА] Ошибка при чтении файла {TZ_FILE_PATH}: {e}")
+        return None
+
+
+def _resolve_tra_sub_target(
+    context: RunContext,
+    report_file: Path,
+    data: dict,
+    metadata: dict[str, str] | None = None,
+    issues: list[PlanIssue] | None = None,
+) -> PlannedCopy | None:
+    """Определить целевой файл в каталоге 05_TRA_SUB_app."""
+
+    tra_sub_app_dir = context.config.tra_sub_app_dir
+    _echo(
+        context,
+        f"  - Обрабатываем дополнительную группировку для {tra_sub_app_dir.name}...",
+    )
+    grouping_key = ""
+    folder_name = ""
+    try:
+        grouping_key = f"{data['tz_index']}-{data['reserved']}-{data['period']}"
+        period_raw = data["period"].upper()
+        period = PERIOD_TRANSLATION.get(period_raw, period_raw)
+
+        extra_metadata = _merge_metadata(
+            metadata,
+            {
+                "grouping_key": grouping_key,
+            },
+        )
+
+        if period == "C":  # Обрабатываем латинский и кириллический варианты
             folder_name = grouping_key
             extra_metadata = _merge_metadata(
                 extra_metadata,
@@ -558,15 +1161,17 @@ def process_special_grouping_for_sub_app(
                     "tra_sub_folder": folder_name,
                 },
             )
-            print(f"    - Режим 'еженедельный'. Итоговая папка: {folder_name}")
+            _echo(context, f"    - Режим 'еженедельный'. Итоговая папка: {folder_name}")
         else:
             tz_index = data["tz_index"]
-            print(f"    - Ищем суффикс для узла: {tz_index}")
-            suffix = find_suffix_in_tz_file(tz_index)
+            _echo(context, f"    - Ищем суффикс для узла: {tz_index}")
+            suffix = find_suffix_in_tz_file(tz_index, context)
 
             if not suffix:
                 message = f"Не найден суффикс в TZ_glob.xlsx для '{tz_index}'"
-                _log_error(
+                _record_issue(
+                    context,
+                    issues,
                     TransferAction.COPY_TRA_SUB,
                     report_file,
                     None,
@@ -579,9 +1184,9 @@ def process_special_grouping_for_sub_app(
                         },
                     ),
                 )
-                return
+                return None
 
-            print(f"    - Используем суффикс: '{suffix}'")
+            _echo(context, f"    - Используем суффикс: '{suffix}'")
             folder_name = f"{grouping_key}_{suffix}"
             extra_metadata = _merge_metadata(
                 extra_metadata,
@@ -591,7 +1196,7 @@ def process_special_grouping_for_sub_app(
                 },
             )
 
-        base_dest_dir = TRA_SUB_APP_DIR
+        base_dest_dir = tra_sub_app_dir
         date_str = data.get("date")
         year_dir: str | None = None
         month_folder_name: str | None = None
@@ -620,19 +1225,20 @@ def process_special_grouping_for_sub_app(
             )
 
         dest_dir = base_dest_dir / folder_name
-        dest_dir.mkdir(parents=True, exist_ok=True)
-        print(f"    - Копируем отчёт в каталог: {dest_dir}")
-        shutil.copy(report_file, dest_dir)
-        _log_success(
-            TransferAction.COPY_TRA_SUB,
-            report_file,
-            dest_dir / report_file.name,
-            extra_metadata,
+        _echo(context, f"    - Копируем отчёт в каталог: {dest_dir}")
+        return PlannedCopy(
+            action=TransferAction.COPY_TRA_SUB,
+            target=dest_dir / report_file.name,
+            metadata=extra_metadata,
+            success_message=f"    - Отчёт помещён в {dest_dir}",
+            error_message="Ошибка копирования в каталог TRA_SUB_app",
         )
 
     except Exception as e:  # noqa: BLE001
         message = f"Ошибка копирования в каталог TRA_SUB_app: {e}"
-        _log_error(
+        _record_issue(
+            context,
+            issues,
             TransferAction.COPY_TRA_SUB,
             report_file,
             None,
@@ -645,9 +1251,24 @@ def process_special_grouping_for_sub_app(
                 },
             ),
         )
+        return None
+
+
+def process_special_grouping_for_sub_app(
+    report_file: Path,
+    data: dict,
+    metadata: dict[str, str] | None = None,
+    context: RunContext | None = None,
+) -> None:
+    """Организовать дополнительную выгрузку файла в каталог 05_TRA_SUB_app."""
+
+    context = context or _global_context()
+    target = _resolve_tra_sub_target(context, report_file, data, metadata)
+    if target is not None:
+        _distribute_report(context, report_file, [target])
 
 
-def normalize_object_name(object_name: str) -> str:
+def normalize_object_name(object_name: str, context: RunContext | None = None) -> str:
     """
     Нормализует имя объекта, удаляя ведущий ноль для однозначных номеров.
     Пример: BVS05 -> BVS5. BVS10 -> BVS10.
@@ -657,22 +1278,34 @@ def normalize_object_name(object_name: str) -> str:
     if match:
         # Собираем новое имя из первой группы (BVS) и второй (цифра)
         normalized_name = match.group(1) + match.group(2)
-        print(
-            f"  - [ИНФО] Имя объекта нормализовано: {object_name} -> {normalized_name}"
+        _echo(
+            context,
+            f"  - [ИНФО] Имя объекта нормализовано: {object_name} -> {normalized_name}",
         )
         return normalized_name
     return object_name
 
 
-def copy_to_gst_folder(
+def _get_gst_index(context: RunContext, tra_gst_dir: Path) -> GstWeekIndex:
+    """Индекс недель запуска или одноразовый индекс вне запуска."""
+
+    index = context.gst_index
+    if index is not None and index.root == tra_gst_dir:
+        return index
+    return GstWeekIndex(tra_gst_dir)
+
+
+def _resolve_gst_target(
+    context: RunContext,
     report_file: Path,
     date_str: str,
     tra_gst_dir: Path,
     metadata: dict[str, str] | None = None,
-) -> None:
-    """Разложить отчёт в каталог 04_TRA_GST по рабочим неделям."""
+    issues: list[PlanIssue] | None = None,
+) -> PlannedCopy | None:
+    """Подобрать свободную рабочую неделю в каталоге 04_TRA_GST."""
 
-    print(f"  - Проверяем папку {tra_gst_dir.name} для распределения...")
+    _echo(context, f"  - Проверяем папку {tra_gst_dir.name} для распределения...")
 
     try:
         date_obj = datetime.strptime(date_str, "%Y%m%d")
@@ -680,154 +1313,285 @@ def copy_to_gst_folder(
         year = date_str[:4]
     except ValueError:
         message = f"Некорректная дата в имени файла: '{date_str}'."
-        print(f"  - [Ошибка] {message}")
-        _log_error(TransferAction.COPY_GST, report_file, None, message, metadata)
-        return
+        _echo(context, f"  - [Ошибка] {message}")
+        _record_issue(
+            context, issues, TransferAction.COPY_GST, report_file, None, message, metadata
+        )
+        return None
 
-    while True:
-        folder_name = f"{year}_T{week_number}_GST"
-        target_dir = tra_gst_dir / folder_name
-
-        print(f"    - Целевая папка: {target_dir.name}")
-
-        is_locked = False
-        if target_dir.exists():
-            for ext in ["*.zip", "*.7z", "*.rar"]:
-                if any(
-                    "CT-GST-TRA-PRM-" in archive.name
-                    for archive in target_dir.glob(ext)
-                ):
-                    print(
-                        "    - Обнаружены архивы в каталоге, подбираем следующую неделю..."
-                    )
-                    is_locked = True
-                    break
+    index = _get_gst_index(context, tra_gst_dir)
+    free_week = index.first_free_week(year, week_number)
+    if free_week != week_number:
+        _echo(
+            context,
+            f"    - Недели {week_number}-{free_week - 1} заняты архивами, "
+            "подбираем следующую неделю...",
+        )
+    week_number = free_week
+    target_dir = tra_gst_dir / gst_folder_name(year, week_number)
+    _echo(context, f"    - Целевая папка: {target_dir.name}")
+    _echo(context, "    - Папка свободна, отчёт будет скопирован в неё.")
+    return PlannedCopy(
+        action=TransferAction.COPY_GST,
+        target=target_dir / report_file.name,
+        metadata=_merge_metadata(
+            metadata,
+            {
+                "gst_folder": target_dir.name,
+                "week": str(week_number),
+            },
+        ),
+        success_message=f"    - Файл успешно помещён в {target_dir}",
+        error_message="Ошибка копирования в каталог GST",
+    )
 
-        if is_locked:
-            week_number += 1
-            continue
 
-        print("    - Папка свободна, копируем отчёт...")
-        try:
-            target_dir.mkdir(parents=True, exist_ok=True)
-            shutil.copy(report_file, target_dir)
-            extra_metadata = _merge_metadata(
-                metadata,
-                {
-                    "gst_folder": target_dir.name,
-                    "week": str(week_number),
-                },
-            )
-            _log_success(
-                TransferAction.COPY_GST,
-                report_file,
-                target_dir / report_file.name,
-                extra_metadata,
-            )
-            print(f"    - Файл успешно помещён в {target_dir}")
-            break
-        except Exception as e:  # noqa: BLE001
-            message = f"Ошибка копирования в каталог GST: {e}"
-            print(f"  - [Ошибка] {message}")
-            _log_error(
-                TransferAction.COPY_GST,
-                report_file,
-                target_dir / report_file.name,
-                message,
-                _merge_metadata(
-                    metadata,
-                    {
-                        "gst_folder": target_dir.name,
-                        "week": str(week_number),
-                    },
-                ),
-            )
-            break
+def copy_to_gst_folder(
+    report_file: Path,
+    date_str: str,
+    tra_gst_dir: Path,
+    metadata: dict[str, str] | None = None,
+    context: RunContext | None = None,
+) -> None:
+    """Разложить отчёт в каталог 04_TRA_GST по рабочим неделям."""
+
+    context = context or _global_context()
+    target = _resolve_gst_target(context, report_file, date_str, tra_gst_dir, metadata)
+    if target is not None:
+        _distribute_report(context, report_file, [target])
+
+
+def _get_discovery_max_depth(settings: Mapping[str, str] | None = None) -> int | None:
+    """Максимальная глубина поиска проектов (TOIR_DISCOVERY_MAX_DEPTH, пусто — без ограничения)."""
+
+    raw = (os.environ if settings is None else settings).get("TOIR_DISCOVERY_MAX_DEPTH")
+    if not raw or not raw.strip():
+        return None
+    try:
+        value = int(raw.strip())
+    except ValueError:
+        print(
+            f"[WARN] Неподдерживаемое значение TOIR_DISCOVERY_MAX_DEPTH={raw}; глубина не ограничена."
+        )
+        return None
+    return value if value > 0 else None
+
+
+def _get_discovery_excludes(settings: Mapping[str, str] | None = None) -> list[str]:
+    """Шаблоны каталогов, которые не просматриваются (TOIR_DISCOVERY_EXCLUDE)."""
+
+    raw = (os.environ if settings is None else settings).get("TOIR_DISCOVERY_EXCLUDE", "")
+    return [item.strip() for item in re.split(r"[;,]", raw) if item.strip()]
+
 
+def discover_inbox(
+    inbox_dir: Path, context: RunContext | None = None
+) -> list[DiscoveredProject]:
+    """Найти проекты INBOX вместе с их файлами `_All` за один обход."""
 
-def find_project_folders(inbox_dir: Path) -> list[Path]:
+    config = context.config if context is not None else resolve_run_config()
+    stats = DiscoveryStats()
+    projects = discover_projects(
+        inbox_dir,
+        max_depth=config.discovery_max_depth,
+        exclude=config.discovery_exclude,
+        stats=stats,
+    )
+    if stats.excluded or stats.depth_limited:
+        _echo(
+            context,
+            f"Поиск проектов: просмотрено каталогов {stats.directories}, "
+            f"исключено {stats.excluded}, за пределами глубины {stats.depth_limited}.",
+        )
+    return projects
+
+
+def find_project_folders(
+    inbox_dir: Path, context: RunContext | None = None
+) -> list[Path]:
     """Рекурсивно находит каталоги, содержащие файлы `_All`."""
 
-    project_dirs: set[Path] = set()
-    for pdf_path in inbox_dir.rglob("*_All*.[pP][dD][fF]"):
-        if pdf_path.is_file():
-            project_dirs.add(pdf_path.parent)
-    return sorted(project_dirs, key=lambda item: item.as_posix().lower())
+    return [item.path for item in discover_inbox(inbox_dir, context)]
 
 
-def process_project_folder(project_path: Path) -> None:
-    """Обработать проектную папку из INBOX."""
-    normalized_path = _ensure_transliterated_project(project_path)
-    if normalized_path is None:
-        print(f"\n--- Пропускаем проект: {project_path.name} ---")
-        return
+def _project_metadata(context: RunContext, project_path: Path) -> dict[str, str]:
+    """Поля журнала, по которым `--resume` узнаёт проект."""
 
-    project_path = normalized_path
-    print(f"\n--- Обрабатываем проект: {project_path.name} ---")
+    return {
+        "project_folder": project_path.name,
+        "project_key": resume_key(context.config.inbox_dir, project_path),
+    }
 
-    all_matching_files: list[Path] = []
-    invalid_files: list[Path] = []
-    for file_path in project_path.glob("*_All*.[pP][dD][fF]"):
-        if RE_FILENAME.match(file_path.name):
-            all_matching_files.append(file_path)
-        else:
-            invalid_files.append(file_path)
 
-    if not all_matching_files:
-        print("  - [Предупреждение] Подходящих файлов не найдено. Пропускаем.")
-        for invalid in invalid_files:
+def _plan_project_renames(
+    context: RunContext, plan: ProjectPlan, names: FolderNames
+) -> list[FileName] | None:
+    """Перенести переименования папки и файлов `_All` из таблицы имён в план.
+
+    Латинские имена и конфликты уже посчитаны `NameTable`; диск не трогается.
+    Возвращает файлы `_All` с именами после переименования или None, если
+    папку переименовать нельзя.
+    """
+
+    source_dir = plan.source_path
+    target_dir = names.target
+
+    if names.renamed:
+        if names.conflict is not None:
+            if names.conflict == "duplicate":
+                message = (
+                    f"Невозможно переименовать папку {source_dir} в {target_dir}: "
+                    f"в это имя уже переименовывается {names.conflict_with}."
+                )
+            else:
+                message = f"Невозможно переименовать папку {source_dir} в {target_dir}: цель уже существует."
+            _echo(context, f"  - [Ошибка] {message}")
+            plan.issues.append(
+                PlanIssue(
+                    TransferAction.RENAME,
+                    source_dir,
+                    target_dir,
+                    message,
+                    {"renamed_from": source_dir.name, "renamed_to": target_dir.name},
+                )
+            )
+            plan.skip_reason = "rename_conflict"
+            return None
+        plan.renames.append(
+            PlannedRename(
+                source=source_dir,
+                target=target_dir,
+                kind="folder",
+                metadata={
+                    "renamed_from": source_dir.name,
+                    "renamed_to": target_dir.name,
+                },
+            )
+        )
+    plan.project_path = target_dir
+
+    for entry in names.files:
+        if not entry.renamed:
+            continue
+        file_name = entry.source.name
+        if entry.conflict:
+            message = f"Невозможно переименовать файл {file_name} в {entry.target_name}: цель уже существует."
+            _echo(context, f"  - [Ошибка] {message}")
+            plan.issues.append(
+                PlanIssue(
+                    TransferAction.RENAME,
+                    entry.source,
+                    source_dir / entry.target_name,
+                    message,
+                    {
+                        "file_name": file_name,
+                        **_project_metadata(context, target_dir),
+                        "rename_target": entry.target_name,
+                    },
+                )
+            )
+            continue
+        plan.renames.append(
+            PlannedRename(
+                source=target_dir / file_name,
+                target=target_dir / entry.target_name,
+                kind="file",
+                metadata={"renamed_from": file_name, "renamed_to": entry.target_name},
+            )
+        )
+    return names.files
+
+
+def plan_project(
+    project_path: Path,
+    candidates: list[Path] | None = None,
+    names: NameTable | None = None,
+    context: RunContext | None = None,
+) -> ProjectPlan:
+    """Разрешить проект в план: переименования, цели копирования и архив.
+
+    Диск только читается: каталоги не создаются, файлы не переименовываются,
+    ошибки копятся в `ProjectPlan.issues` и попадают в журнал при исполнении.
+    `candidates` — файлы `_All`, найденные при обходе INBOX; `names` — общая
+    таблица имён запуска (без неё строится таблица из одной папки). Настройки
+    берутся из `context.config` и заново из окружения не читаются.
+    """
+
+    context = context or _global_context()
+    config = context.config
+
+    folder_names = names.folder(project_path) if names is not None else None
+    if folder_names is None:
+        folder_names = NameTable.build([(project_path, candidates)]).folder(project_path)
+        assert folder_names is not None
+    plan = ProjectPlan(source_path=project_path, project_path=project_path)
+    files = _plan_project_renames(context, plan, folder_names)
+    if files is None:
+        _echo(context, f"\n--- Пропускаем проект: {project_path.name} ---")
+        return plan
+
+    project_path = plan.project_path
+    _echo(context, f"\n--- Обрабатываем проект: {project_path.name} ---")
+
+    matching = [entry for entry in files if entry.parsed is not None]
+
+    if not matching:
+        _echo(context, "  - [Предупреждение] Подходящих файлов не найдено. Пропускаем.")
+        for entry in files:
+            invalid = project_path / (
+                entry.source.name if entry.conflict else entry.target_name
+            )
             message = (
                 f"Имя файла {invalid.name} не соответствует шаблону. "
                 "Проверьте латинские символы (A-Z, 0-9) и структуру имени."
             )
-            _log_error(
-                TransferAction.COPY_DESTINATION,
-                invalid,
-                None,
-                message,
-                {"file_name": invalid.name, "project_folder": project_path.name},
+            plan.issues.append(
+                PlanIssue(
+                    TransferAction.COPY_DESTINATION,
+                    invalid,
+                    None,
+                    message,
+                    {
+                        "file_name": invalid.name,
+                        **_project_metadata(context, project_path),
+                    },
+                )
             )
-        return
-    if len(all_matching_files) > 1:
-        print(
-            f"  - [Внимание] Найдено несколько файлов ({len(all_matching_files)}). Берём первый."
+        plan.skip_reason = "no_matching_files"
+        return plan
+    if len(matching) > 1:
+        _echo(
+            context,
+            f"  - [Внимание] Найдено несколько файлов ({len(matching)}). Берём первый.",
         )
 
-    report_file = all_matching_files[0]
-    print(f"  - Выбран файл: {report_file.name}")
-
-    match = RE_FILENAME.match(report_file.name)
-    if not match:
-        message = (
-            f"Имя файла {report_file.name} не соответствует шаблону. "
-            "Проверьте, что используете латиницу (A-Z, 0-9) без кириллицы."
-        )
-        print(f"  - [Ошибка] {message}")
-        _log_error(
-            TransferAction.COPY_DESTINATION,
-            report_file,
-            None,
-            message,
-            {"file_name": report_file.name, "project_folder": project_path.name},
-        )
-        return
+    selected = matching[0]
+    report_file = project_path / (
+        selected.source.name if selected.conflict else selected.target_name
+    )
+    plan.report_file = report_file
+    _echo(context, f"  - Выбран файл: {report_file.name}")
 
-    data = match.groupdict()
+    assert selected.parsed is not None
+    data = selected.parsed.as_dict()
+    plan.attributes = dict(data)
     attributes_dump = json.dumps(data, indent=4, ensure_ascii=False)
-    print("  - Извлечённые атрибуты:")
-    print(attributes_dump)
+    _echo(context, "  - Извлечённые атрибуты:")
+    _echo(context, attributes_dump)
 
     date_str = data["date"]
     year = date_str[:4]
     month_num = date_str[4:6]
     month_name = MONTH_MAP.get(month_num, "UnknownMonth")
     part = data["part"].upper()
-    part_filter = _get_part_filter()
+    part_filter = config.part_filter
     if part_filter != "CS/LP" and part != part_filter:
-        print(
-            f"  - [INFO] Пропуск из-за фильтра part: {part} не входит в {part_filter}."
+        _echo(
+            context,
+            f"  - [INFO] Пропуск из-за фильтра part: {part} не входит в {part_filter}.",
         )
-        return
+        plan.skip_reason = "part_filter"
+        return plan
 
     month_folder_name = f"{month_num}.{month_name}"
     period_raw = data["period"].upper()
@@ -836,7 +1600,7 @@ def process_project_folder(project_path: Path) -> None:
     base_metadata = {
         k: v
         for k, v in {
-            "project_folder": project_path.name,
+            **_project_metadata(context, project_path),
             "type": data.get("type"),
             "scope": data.get("scope"),
             "part": part,
@@ -847,20 +1611,22 @@ def process_project_folder(project_path: Path) -> None:
         if v
     }
 
-    notes_enabled = _env_flag("TOIR_ENABLE_NOTES", True)
-    tra_gst_enabled = _env_flag("TOIR_ENABLE_TRA_GST", True)
-    tra_sub_app_enabled = _env_flag("TOIR_ENABLE_TRA_SUB_APP", True)
-    dest_root_enabled = _env_flag("TOIR_ENABLE_DEST_ROOT", True)
+    notes_enabled = config.enable_notes
+    tra_gst_enabled = config.enable_tra_gst
+    tra_sub_app_enabled = config.enable_tra_sub_app
+    dest_root_enabled = config.enable_dest_root
+    dest_root = config.dest_root_dir
+    notes_dir = config.notes_dir
 
     pdf_dest_dir: Path | None = None
     archive_dest_dir: Path | None = None
 
     if dest_root_enabled:
         if period == "C":
-            print("  - [Инфо] Рабочий режим: еженедельный (C).")
+            _echo(context, "  - [Инфо] Рабочий режим: еженедельный (C).")
             target_folder_name = "Корректирующее обслуживание"
             pdf_dest_dir = (
-                DEST_ROOT_DIR
+                dest_root
                 / year
                 / month_folder_name
                 / part
@@ -868,7 +1634,7 @@ def process_project_folder(project_path: Path) -> None:
                 / target_folder_name
             )
             archive_dest_dir = (
-                DEST_ROOT_DIR
+                dest_root
                 / year
                 / month_folder_name
                 / part
@@ -876,18 +1642,20 @@ def process_project_folder(project_path: Path) -> None:
                 / target_folder_name
             )
         else:
-            print("  - [Инфо] Рабочий режим: стандартный.")
+            _echo(context, "  - [Инфо] Рабочий режим: стандартный.")
             if part == "LP":
-                print("  - [Инфо] Раздел LP.")
+                _echo(context, "  - [Инфо] Раздел LP.")
                 object_name_raw = data["object_name"].upper()
-                object_name = normalize_object_name(object_name_raw)
+                object_name = normalize_object_name(object_name_raw, context)
                 folder_name = LP_FOLDER_OVERRIDES.get(object_name, object_name)
                 if folder_name != object_name:
-                    print(
-                        f"  - [Инфо] Используем сопоставление LP: {object_name} → {folder_name}"
+                    _echo(
+                        context,
+                        f"  - [Инфо] Используем сопоставление LP: {object_name} → "
+                        f"{folder_name}",
                     )
                 pdf_dest_dir = (
-                    DEST_ROOT_DIR
+                    dest_root
                     / year
                     / month_folder_name
                     / part
@@ -895,7 +1663,7 @@ def process_project_folder(project_path: Path) -> None:
                     / folder_name
                 )
                 archive_dest_dir = (
-                    DEST_ROOT_DIR
+                    dest_root
                     / year
                     / month_folder_name
                     / part
@@ -910,30 +1678,34 @@ def process_project_folder(project_path: Path) -> None:
                     },
                 )
             elif part == "CS":
-                print("  - [Инфо] Раздел CS.")
+                _echo(context, "  - [Инфо] Раздел CS.")
                 tz_index = data["tz_index"]
                 base_metadata = _merge_metadata(base_metadata, {"tz_index": tz_index})
 
                 folder_prefix = CS_FOLDER_OVERRIDES.get(tz_index, tz_index)
                 if folder_prefix != tz_index:
-                    print(
-                        f"  - [Инфо] Используем префикс из справочника: {folder_prefix}"
+                    _echo(
+                        context,
+                        "  - [Инфо] Используем префикс из справочника: "
+                        f"{folder_prefix}",
                     )
 
-                pdf_parent = DEST_ROOT_DIR / year / month_folder_name / part / "pdf"
+                pdf_parent = dest_root / year / month_folder_name / part / "pdf"
                 native_parent = (
-                    DEST_ROOT_DIR / year / month_folder_name / part / "Native"
+                    dest_root / year / month_folder_name / part / "Native"
                 )
-                pdf_parent.mkdir(parents=True, exist_ok=True)
-                native_parent.mkdir(parents=True, exist_ok=True)
 
-                found_folders = sorted(pdf_parent.glob(f"{folder_prefix}*"))
+                found_folders = _find_prefixed_folders(
+                    context, pdf_parent, folder_prefix
+                )
                 destination_event = "found"
                 if found_folders:
                     target_folder_name = found_folders[0].name
                     if len(found_folders) > 1:
-                        print(
-                            f"  - [Внимание] Несколько совпадений, берём {target_folder_name}"
+                        _echo(
+                            context,
+                            "  - [Внимание] Несколько совпадений, берём "
+                            f"{target_folder_name}",
                         )
                     pdf_dest_dir = found_folders[0]
                 else:
@@ -941,12 +1713,10 @@ def process_project_folder(project_path: Path) -> None:
                         folder_prefix, folder_prefix
                     )
                     pdf_dest_dir = pdf_parent / target_folder_name
-                    pdf_dest_dir.mkdir(parents=True, exist_ok=True)
                     destination_event = "created"
-                    print(f"  - [Инфо] Создаём каталог: {pdf_dest_dir}")
+                    _echo(context, f"  - [Инфо] Каталог будет создан: {pdf_dest_dir}")
 
                 archive_dest_dir = native_parent / target_folder_name
-                archive_dest_dir.mkdir(parents=True, exist_ok=True)
 
                 base_metadata = _merge_metadata(
                     base_metadata,
@@ -956,182 +1726,1480 @@ def process_project_folder(project_path: Path) -> None:
                         "destination_path": str(pdf_dest_dir),
                     },
                 )
-                _log_destination_event(
-                    destination_event,
-                    report_file,
-                    pdf_dest_dir,
-                    base_metadata,
-                )
+                plan.destination_event = (destination_event, pdf_dest_dir)
     else:
-        print("  - [INFO] Skipping DEST_ROOT distribution due to settings.")
-        return
+        _echo(context, "  - [INFO] Skipping DEST_ROOT distribution due to settings.")
+        plan.skip_reason = "dest_root_disabled"
+        return plan
 
-    if dest_root_enabled and (pdf_dest_dir is None or archive_dest_dir is None):
+    plan.metadata = base_metadata
+    if pdf_dest_dir is None or archive_dest_dir is None:
         message = "Не удалось определить директорию назначения."
-        print(f"  - [Ошибка] {message}")
-        _log_error(
-            TransferAction.COPY_DESTINATION, report_file, None, message, base_metadata
-        )
-        return
-
-    assert pdf_dest_dir is not None
-    assert archive_dest_dir is not None
-
-    if notes_enabled:
-        try:
-            notes_target = NOTES_DIR / report_file.name
-            shutil.copy(report_file, NOTES_DIR)
-            _log_success(
-                TransferAction.COPY_NOTES,
-                report_file,
-                notes_target,
-                _merge_metadata(base_metadata, {"notes_dir": str(NOTES_DIR)}),
-            )
-            print(f"  - File copied to {NOTES_DIR}")
-        except Exception as e:  # noqa: BLE001
-            message = f"Failed to copy to {NOTES_DIR}: {e}"
-            print(f"  - [ERROR] {message}")
-            _log_error(
-                TransferAction.COPY_NOTES,
+        _echo(context, f"  - [Ошибка] {message}")
+        plan.issues.append(
+            PlanIssue(
+                TransferAction.COPY_DESTINATION,
                 report_file,
-                notes_target,
+                None,
                 message,
                 base_metadata,
             )
-            return
+        )
+        plan.skip_reason = "no_destination"
+        return plan
+
+    if notes_enabled:
+        plan.copies.append(
+            PlannedCopy(
+                action=TransferAction.COPY_NOTES,
+                target=notes_dir / report_file.name,
+                metadata=_merge_metadata(base_metadata, {"notes_dir": str(notes_dir)}),
+                success_message=f"  - File copied to {notes_dir}",
+                error_message=f"Failed to copy to {notes_dir}",
+            )
+        )
     else:
-        print("  - [INFO] NOTES distribution disabled by settings.")
+        _echo(context, "  - [INFO] NOTES distribution disabled by settings.")
 
     if tra_gst_enabled:
-        copy_to_gst_folder(report_file, date_str, TRA_GST_DIR, metadata=base_metadata)
+        gst_target = _resolve_gst_target(
+            context,
+            report_file,
+            date_str,
+            config.tra_gst_dir,
+            metadata=base_metadata,
+            issues=plan.issues,
+        )
+        if gst_target is not None:
+            plan.copies.append(gst_target)
     else:
-        print("  - [INFO] TRA_GST distribution disabled by settings.")
+        _echo(context, "  - [INFO] TRA_GST distribution disabled by settings.")
     if tra_sub_app_enabled:
-        process_special_grouping_for_sub_app(report_file, data, metadata=base_metadata)
+        sub_target = _resolve_tra_sub_target(
+            context, report_file, data, metadata=base_metadata, issues=plan.issues
+        )
+        if sub_target is not None:
+            plan.copies.append(sub_target)
     else:
-        print("  - [INFO] 05_TRA_SUB_app distribution disabled by settings.")
+        _echo(context, "  - [INFO] 05_TRA_SUB_app distribution disabled by settings.")
 
-    try:
-        pdf_dest_dir.mkdir(parents=True, exist_ok=True)
-        shutil.copy(report_file, pdf_dest_dir)
-        pdf_target = pdf_dest_dir / report_file.name
-        _log_success(
-            TransferAction.COPY_DESTINATION,
-            report_file,
-            pdf_target,
-            _merge_metadata(base_metadata, {"destination_path": str(pdf_dest_dir)}),
-        )
-        print(f"  - Файл скопирован в {pdf_dest_dir}")
-    except Exception as e:  # noqa: BLE001
-        message = f"Ошибка копирования в каталог назначения: {e}"
-        print(f"  - [Ошибка] {message}")
-        _log_error(
-            TransferAction.COPY_DESTINATION,
-            report_file,
-            pdf_dest_dir / report_file.name,
-            message,
-            base_metadata,
+    plan.copies.append(
+        PlannedCopy(
+            action=TransferAction.COPY_DESTINATION,
+            target=pdf_dest_dir / report_file.name,
+            metadata=_merge_metadata(
+                base_metadata, {"destination_path": str(pdf_dest_dir)}
+            ),
+            success_message=f"  - Файл скопирован в {pdf_dest_dir}",
+            error_message="Ошибка копирования в каталог назначения",
         )
-        return
-
-    archive_target_path = (
-        DEST_ROOT_DIR
-        / year
-        / month_folder_name
-        / part
-        / "Native"
-        / f"{project_path.name}.zip"
     )
-    try:
-        archive_dest_dir.mkdir(parents=True, exist_ok=True)
-        archive_basename = TEMP_ARCHIVE_DIR / project_path.name
-        print(f"  - Создаём архив для каталога: {project_path.name}...")
-        archive_path_str = shutil.make_archive(
-            str(archive_basename), "zip", str(project_path)
-        )
-        archive_path = Path(archive_path_str)
-        _log_success(
-            TransferAction.CREATE_ARCHIVE,
-            project_path,
-            archive_path,
-            _merge_metadata(base_metadata, {"archive_tmp": str(archive_path)}),
-        )
-        print(f"  - Копируем архив в: {archive_dest_dir}")
-        shutil.copy(archive_path, archive_dest_dir)
-        _log_success(
-            TransferAction.COPY_ARCHIVE,
-            archive_path,
-            archive_dest_dir / archive_path.name,
-            _merge_metadata(base_metadata, {"archive_dest": str(archive_dest_dir)}),
-        )
-        archive_path.unlink()
-    except Exception as e:  # noqa: BLE001
-        message = f"Ошибка обработки архива: {e}"
-        print(f"  - [Ошибка] {message}")
-        _log_error(
-            TransferAction.COPY_ARCHIVE,
-            project_path,
-            archive_target_path,
-            message,
-            base_metadata,
-        )
+    plan.archive = PlannedArchive(
+        source_dir=project_path,
+        target=archive_dest_dir / f"{project_path.name}.zip",
+    )
+    directories = {item.target.parent for item in plan.copies}
+    directories.add(archive_dest_dir)
+    plan.directories = sorted(directories, key=lambda item: item.as_posix())
+    return plan
 
 
-def main(inbox_dir: Path | None = None) -> None:
-    """Точка входа обработки PDF."""
-    global LOGGER
+def _find_prefixed_folders(
+    context: RunContext, parent: Path, prefix: str
+) -> list[Path]:
+    """Папки каталога с заданным префиксом (из индекса запуска, если он есть)."""
 
-    target_inbox = Path(inbox_dir).resolve() if inbox_dir else INBOX_DIR
+    if context.folders is not None:
+        return context.folders.find_prefix(parent, prefix)
+    if not _directory_exists(context, parent):
+        return []
+    return sorted(parent.glob(f"{prefix}*"))
 
-    print("Запуск распределения PDF...")
-    with DispatchLogger() as logger:
-        LOGGER = logger
-        print(f"Текущий лог доступен в: {logger.file_path}")
-        try:
-            for dir_path in [NOTES_DIR, TRA_GST_DIR]:
-                if not dir_path.exists():
-                    print(f"Создаём вспомогательную директорию: {dir_path}")
-                    dir_path.mkdir(parents=True, exist_ok=True)
-
-            if not target_inbox.exists():
-                print(f"[Ошибка] Входной каталог отсутствует: {target_inbox}")
-                return
-            stray_pdfs = [
-                item
-                for item in target_inbox.iterdir()
-                if item.is_file() and item.suffix.lower() == ".pdf"
-            ]
-            if stray_pdfs:
-                print(
-                    "[Предупреждение] В корне входного каталога обнаружены PDF-файлы. "
-                    "Каждый отчёт должен лежать в отдельной папке. Обработка остановлена."
-                )
-                for pdf_path in stray_pdfs:
-                    _log_error(
-                        TransferAction.COPY_DESTINATION,
-                        pdf_path,
-                        None,
-                        "Файл расположен в корне INBOX. Требуется отдельная папка для каждого отчёта.",
-                    )
-                return
 
-            project_folders = find_project_folders(target_inbox)
-            if not project_folders:
-                print(f"В {target_inbox} не найдено файлов `_All` для обработки.")
-                return
+def _folder_indexed(context: RunContext, folder: Path) -> bool:
+    """Есть ли папка в индексе каталогов назначения запуска."""
 
-            print(f"Найдено {len(project_folders)} папок с `_All` в {target_inbox}.")
-            for folder in project_folders:
-                process_project_folder(folder)
+    if context.folders is None:
+        return False
+    return folder in context.folders.find_prefix(folder.parent, folder.name)
 
-            print("\nОбработка завершена.")
-        finally:
-            LOGGER = None
 
+def _apply_project_renames(context: RunContext, plan: ProjectPlan) -> bool:
+    """Выполнить запланированные переименования; False — проект дальше не обрабатывается."""
 
-if __name__ == "__main__":
-    override = os.environ.get("TOIR_INBOX_DIR")
-    override_path = Path(override).resolve() if override else None
-    main(inbox_dir=override_path)
-if __name__ == "__main__":
-    main()
+    for item in plan.renames:
+        try:
+            item.source.rename(item.target)
+        except OSError as exc:
+            if item.kind == "folder":
+                message = f"Не удалось переименовать папку {item.source}: {exc}"
+                metadata = dict(item.metadata)
+            else:
+                message = f"Не удалось переименовать файл {item.source.name}: {exc}"
+                metadata = {
+                    "file_name": item.source.name,
+                    **_project_metadata(context, plan.project_path),
+                    "rename_target": item.target.name,
+                }
+            _echo(context, f"  - [Ошибка] {message}")
+            _log_error(
+                context, TransferAction.RENAME, item.source, item.target, message, metadata
+            )
+            plan.failed = True
+            if item.kind == "folder" or item.target == plan.report_file:
+                plan.skip_reason = "rename_failed"
+                _echo(context, f"\n--- Пропускаем проект: {plan.source_path.name} ---")
+                return False
+            continue
+        label = "Папка переименована" if item.kind == "folder" else "Файл переименован"
+        _echo(context, f"  - [INFO] {label}: {item.source.name} -> {item.target.name}")
+        _log_success(
+            context, TransferAction.RENAME, item.source, item.target, item.metadata
+        )
+    return True
+
+
+def _log_plan_issues(context: RunContext, plan: ProjectPlan) -> None:
+    """Записать в журнал ошибки, найденные при планировании проекта."""
+
+    for issue in plan.issues:
+        _log_error(
+            context,
+            issue.action, issue.source, issue.target, issue.message, issue.metadata
+        )
+
+
+def _execute_project_transfers(
+    context: RunContext,
+    plan: ProjectPlan,
+    dir_errors: dict[Path, BaseException] | None = None,
+) -> None:
+    """Разложить отчёт проекта по целям плана и поставить архив."""
+
+    report_file = plan.report_file
+    assert report_file is not None
+    project_path = plan.project_path
+    base_metadata = plan.metadata
+    _echo(context, f"\n--- Раскладываем проект: {project_path.name} ---")
+
+    created: Path | None = None
+    if plan.destination_event is not None:
+        event, destination = plan.destination_event
+        if event == "created":
+            if _folder_indexed(context, destination):
+                # Каталог уже создан раньше в этом запуске другим проектом.
+                event = "found"
+            else:
+                created = destination
+        _log_destination_event(context, event, report_file, destination, base_metadata)
+
+    results: dict[TransferAction, bool] = {action: True for action in plan.resumed}
+    if plan.resumed:
+        _echo(
+            context,
+            "  - [RESUME] Уже выполнено: "
+            + ", ".join(action.value for action in plan.resumed),
+        )
+    if plan.copies:
+        results.update(
+            _distribute_report(context, report_file, plan.copies, dir_errors)
+        )
+    if not all(results.values()):
+        plan.failed = True
+    if created is not None and _directory_exists(context, created):
+        if context.folders is not None:
+            context.folders.add(created.parent, created.name)
+    if not results.get(TransferAction.COPY_NOTES, True):
+        return
+    if not results.get(TransferAction.COPY_DESTINATION, False):
+        return
+    if plan.archive is None:
+        return
+
+    archive_target_path = plan.archive.target
+    archive_error = (dir_errors or {}).get(archive_target_path.parent)
+    if dir_errors is None:
+        try:
+            _ensure_directory(context, archive_target_path.parent)
+        except Exception as e:  # noqa: BLE001
+            archive_error = e
+    if archive_error is not None:
+        plan.failed = True
+        message = f"Ошибка обработки архива: {archive_error}"
+        _echo(context, f"  - [Ошибка] {message}")
+        _log_error(
+            context,
+            TransferAction.COPY_ARCHIVE,
+            project_path,
+            archive_target_path,
+            message,
+            base_metadata,
+        )
+        return
+
+    breakers = context.breakers
+    settled = False
+
+    def on_archive_done(
+        result: ArchiveResult | None, error: BaseException | None
+    ) -> None:
+        nonlocal settled
+        if breakers is not None and not settled:
+            breakers.record(archive_target_path, error)
+        settled = True
+        if error is not None or result is None:
+            plan.failed = True
+        _finish_archive(
+            context, project_path, result, error, archive_target_path, base_metadata
+        )
+
+    if breakers is not None:
+        try:
+            breakers.check(archive_target_path)
+        except CircuitOpenError as e:
+            plan.failed = True
+            _finish_archive(
+                context, project_path, None, e, archive_target_path, base_metadata
+            )
+            return
+
+    skip_identical = context.config.skip_mode is not None
+    limiter = context.bandwidth
+    retry_policy = context.config.retry_policy or RetryPolicy(max_attempts=1)
+
+    def on_stage_done(
+        result: ArchiveResult | None, error: BaseException | None
+    ) -> None:
+        try:
+            if limiter is not None and result is not None and not result.skipped:
+                limiter.record(archive_target_path, result.compressed_bytes)
+        finally:
+            on_archive_done(result, error)
+
+    def write_archive() -> None:
+        _echo(context, f"  - Создаём архив для каталога: {project_path.name}...")
+        try:
+            result = write_zip_archive_with_retry(
+                retry_policy,
+                str(project_path),
+                str(archive_target_path),
+                context.config.compression_policy,
+                skip_identical=skip_identical,
+                throttle=(
+                    limiter.for_target(archive_target_path) if limiter else None
+                ),
+            )
+        except Exception as e:  # noqa: BLE001
+            on_archive_done(None, e)
+            return
+        on_archive_done(result, None)
+
+    try:
+        if context.archive_stage is not None:
+            _echo(
+                context,
+                f"  - Архив каталога {project_path.name} поставлен в очередь сжатия.",
+            )
+            context.archive_stage.submit(
+                project_path,
+                archive_target_path,
+                on_stage_done,
+                skip_identical=skip_identical,
+                throttle=(
+                    limiter.process_throttle(
+                        archive_target_path, context.config.archive_workers
+                    )
+                    if limiter is not None
+                    else None
+                ),
+            )
+        elif context.io_queues is None:
+            write_archive()
+        else:
+            _none, output = _submit_to_queue(
+                context, archive_target_path, write_archive
+            ).result()
+            _echo(context, output, end="")
+    except BaseException:
+        # Архив не записан и исход не учтён — вернуть разрешение на запись
+        if breakers is not None and not settled:
+            breakers.release(archive_target_path)
+        raise
+
+
+def execute_project_plan(plan: ProjectPlan, context: RunContext | None = None) -> None:
+    """Исполнить план одного проекта целиком."""
+
+    context = context or _global_context()
+    renamed = _apply_project_renames(context, plan)
+    _log_plan_issues(context, plan)
+    if renamed and plan.executable:
+        _execute_project_transfers(context, plan)
+
+
+def process_project_folder(
+    project_path: Path, context: RunContext | None = None
+) -> None:
+    """Обработать проектную папку из INBOX."""
+
+    context = context or _global_context()
+    execute_project_plan(plan_project(project_path, context=context), context)
+
+
+def _finish_archive(
+    context: RunContext,
+    project_path: Path,
+    result: ArchiveResult | None,
+    error: BaseException | None,
+    archive_target_path: Path,
+    base_metadata: dict[str, str],
+) -> None:
+    """Записать в журнал архив, сохранённый сразу в каталог Native."""
+
+    if error is not None or result is None:
+        message = f"Ошибка обработки архива {project_path.name}: {error}"
+        _echo(context, f"  - [Ошибка] {message}")
+        _log_error(
+            context,
+            TransferAction.COPY_ARCHIVE,
+            project_path,
+            archive_target_path,
+            message,
+            _merge_metadata(
+                base_metadata, {"attempts": str(getattr(error, "attempts", 0))}
+            ),
+        )
+        return
+
+    base_metadata = _merge_metadata(base_metadata, {"attempts": str(result.attempts)})
+
+    archive_path = result.path
+    if result.skipped:
+        for action in (TransferAction.CREATE_ARCHIVE, TransferAction.COPY_ARCHIVE):
+            _log_skipped(context, action, project_path, archive_path, base_metadata)
+        _echo(context, f"  - [SKIP] Архив уже актуален: {archive_path}")
+        return
+
+    partial_path = partial_path_for(archive_path)
+    _log_success(
+        context,
+        TransferAction.CREATE_ARCHIVE,
+        project_path,
+        partial_path,
+        _merge_metadata(
+            base_metadata,
+            {
+                "archive_partial": str(partial_path),
+                "archive_ratio": f"{result.ratio:.3f}",
+                "archive_seconds": f"{result.seconds:.3f}",
+                "archive_bytes_in": str(result.original_bytes),
+                "archive_bytes_out": str(result.compressed_bytes),
+                "archive_stored_files": str(result.stored_files),
+                "archive_deflated_files": str(result.deflated_files),
+            },
+        ),
+    )
+    _log_success(
+        context,
+        TransferAction.COPY_ARCHIVE,
+        project_path,
+        archive_path,
+        _merge_metadata(
+            base_metadata,
+            {"archive_dest": str(archive_path.parent), "archive_mode": "rename"},
+        ),
+    )
+    _echo(
+        context,
+        f"  - Архив сохранён: {archive_path} "
+        f"(сжатие {result.ratio:.0%}, {result.seconds:.1f} с)",
+    )
+
+
+def _run_buffered(
+    console: BufferedConsole, func: Callable[[_T], _R], item: _T
+) -> _R:
+    """Выполнить шаг проекта в рабочем потоке, выводя его лог одним блоком."""
+
+    with console.capture():
+        return func(item)
+
+
+def _run_per_project(
+    items: list[_T],
+    func: Callable[[_T], _R],
+    workers: int,
+    console: BufferedConsole | None = None,
+) -> list[_R]:
+    """Применить шаг к проектам последовательно или на ограниченном пуле потоков.
+
+    Результаты возвращаются в порядке `items`. Вывод каждого шага собирается
+    консолью запуска `console` и печатается одним блоком.
+    """
+
+    if workers <= 1 or len(items) <= 1:
+        return [func(item) for item in items]
+
+    def run(item: _T) -> _R:
+        if console is None:
+            return func(item)
+        return _run_buffered(console, func, item)
+
+    with ThreadPoolExecutor(
+        max_workers=workers, thread_name_prefix="toir-project"
+    ) as executor:
+        return list(executor.map(run, items))
+
+
+def _plan_project_guarded(
+    context: RunContext, project: DiscoveredProject, names: NameTable | None = None
+) -> ProjectPlan:
+    """Спланировать проект, не прерывая запуск из-за непредвиденной ошибки."""
+
+    try:
+        return plan_project(project.path, project.candidates, names, context)
+    except Exception as e:  # noqa: BLE001
+        _echo(
+            context,
+            f"  - [Ошибка] Непредвиденная ошибка планирования {project.path}: {e}",
+        )
+        return ProjectPlan(
+            source_path=project.path,
+            project_path=project.path,
+            skip_reason="planning_error",
+        )
+
+
+def build_distribution_plan(
+    inbox_dir: Path,
+    projects: Sequence[DiscoveredProject | Path],
+    workers: int = 1,
+    context: RunContext | None = None,
+) -> DistributionPlan:
+    """Разрешить все проекты входного каталога в общий план без записи на диск.
+
+    Имена всех проектов сначала проверяются одной таблицей `NameTable`, чтобы
+    конфликты переименования между папками находились заранее. Для проектов,
+    переданных путём, а не результатом `discover_inbox`, файлы `_All` ищутся
+    заново.
+    """
+
+    context = context or _global_context()
+    started = time.perf_counter()
+    discovered = [
+        item
+        if isinstance(item, DiscoveredProject)
+        else DiscoveredProject(path=Path(item))
+        for item in projects
+    ]
+    names = NameTable.build((item.path, item.candidates) for item in discovered)
+    plans = _run_per_project(
+        discovered,
+        lambda item: _plan_project_guarded(context, item, names),
+        workers,
+        context.console,
+    )
+    return DistributionPlan(
+        inbox=inbox_dir,
+        projects=plans,
+        planning_seconds=time.perf_counter() - started,
+        part_filter=context.config.part_filter,
+    )
+
+
+def apply_resume_state(plan: DistributionPlan, state: ResumeState) -> None:
+    """Убрать из плана шаги, выполненные в прерванном запуске `state.run_id`.
+
+    Проекты сопоставляются с журналом по пути от входного каталога
+    (`resume_key`), а не только по имени папки. Ошибки планирования
+    проектов, уже попавших в журнал, повторно не пишутся; проекты, у которых
+    не осталось шагов, помечаются `resumed_complete`.
+    """
+
+    plan.resumed_run_id = state.run_id
+    for project in plan.projects:
+        key = resume_key(plan.inbox, project.project_path)
+        if not state.seen(key):
+            # Журнал без `project_key` — проект узнаётся по имени папки.
+            key = project.project_path.name
+            if not state.seen(key):
+                continue
+        project.issues.clear()
+        done = state.completed_for(key)
+        if not done or not project.executable:
+            continue
+        project.resumed = [item.action for item in project.copies if item.action in done]
+        project.copies = [item for item in project.copies if item.action not in done]
+        if TransferAction.COPY_ARCHIVE in done:
+            project.resumed.append(TransferAction.COPY_ARCHIVE)
+            project.archive = None
+        project.destination_event = None
+        if not project.copies and project.archive is None:
+            project.skip_reason = "resumed_complete"
+            continue
+        directories = {item.target.parent for item in project.copies}
+        if project.archive is not None:
+            directories.add(project.archive.target.parent)
+        project.directories = sorted(directories, key=lambda item: item.as_posix())
+
+
+def _month_skeleton(context: RunContext, plan: ProjectPlan) -> list[Path]:
+    """Каталоги `<год>/<месяц>/<part>/pdf|Native` проекта в DEST_ROOT."""
+
+    date_str = plan.attributes.get("date")
+    part = (plan.attributes.get("part") or "").upper()
+    if not date_str or not part or plan.archive is None:
+        return []
+    month_num = date_str[4:6]
+    month_folder_name = f"{month_num}.{MONTH_MAP.get(month_num, 'UnknownMonth')}"
+    part_root = context.config.dest_root_dir / date_str[:4] / month_folder_name / part
+    return [part_root / "pdf", part_root / "Native"]
+
+
+def _print_directory_stats(context: RunContext, registry: DirectoryRegistry) -> None:
+    """Вывести, сколько обращений к каталогам назначения сэкономил реестр."""
+
+    stats = registry.stats
+    _echo(
+        context,
+        f"Каталоги: запросов {stats.requests}, из памяти {stats.avoided}, "
+        f"вызовов mkdir {stats.mkdir_calls}, проверок stat {stats.stat_calls}.",
+    )
+
+
+def _print_gst_stats(context: RunContext) -> None:
+    """Вывести, сколько решений о неделе GST принято под блокировкой."""
+
+    allocator = context.gst_allocator
+    if allocator is None or not allocator.decisions:
+        return
+    _echo(
+        context,
+        f"Недели GST: подтверждений {allocator.decisions}, "
+        f"перенесено {allocator.moved}, ожидание блокировки "
+        f"{allocator.lock_wait:.2f} с.",
+    )
+
+
+def _print_queue_stats(context: RunContext, queues: DestinationQueues) -> None:
+    """Вывести загрузку очередей записи по корням назначения."""
+
+    parts = [
+        f"{item.root} задач {item.tasks} (до {item.peak} из {item.limit} "
+        f"одновременно, ожидание {item.waited:.2f} с)"
+        for item in queues.stats()
+    ]
+    if parts:
+        _echo(context, f"Очереди записи: {'; '.join(parts)}.")
+
+
+def _print_breaker_stats(context: RunContext) -> None:
+    """Вывести корни назначения, запись в которые приостанавливалась."""
+
+    tripped = context.breakers.tripped() if context.breakers is not None else {}
+    if tripped:
+        roots = ", ".join(f"{root} ({count})" for root, count in tripped.items())
+        _echo(context, f"Запись приостанавливалась после серии сбоев: {roots}.")
+
+
+def _destination_order_key(plan: ProjectPlan) -> str:
+    """Ключ сортировки проектов по каталогу назначения DEST_ROOT."""
+
+    target = plan.copy_for(TransferAction.COPY_DESTINATION)
+    return target.target.parent.as_posix() if target is not None else ""
+
+
+def _project_size(plan: ProjectPlan) -> int:
+    """Суммарный размер файлов папки проекта (для порядка `smallest`)."""
+
+    signature = folder_signature(plan.project_path)
+    return signature[1] if signature is not None else 0
+
+
+def _schedule_projects(
+    context: RunContext, projects: list[ProjectPlan]
+) -> tuple[ProjectScheduler, list[ScheduleEntry]]:
+    """Упорядочить проекты к исполнению по настройкам планировщика."""
+
+    config = context.config
+    scheduler = ProjectScheduler(
+        order=config.schedule_order,
+        priorities=config.schedule_priority,
+        queue_size=config.schedule_queue,
+        size_of=_project_size,
+    )
+    entries = scheduler.arrange(
+        [
+            ScheduleEntry(
+                item=project,
+                name=project.project_path.name,
+                group=_destination_order_key(project),
+                date=project.attributes.get("date", ""),
+                attributes=project.attributes,
+            )
+            for project in projects
+        ]
+    )
+    return scheduler, entries
+
+
+def _print_schedule(
+    context: RunContext,
+    scheduler: ProjectScheduler,
+    entries: list[ScheduleEntry],
+    limit: int = 5,
+) -> None:
+    """Вывести выбранный порядок обработки (первые `limit` проектов)."""
+
+    if len(entries) <= 1:
+        return
+    head = ", ".join(entry.name for entry in entries[:limit])
+    more = f" и ещё {len(entries) - limit}" if len(entries) > limit else ""
+    rules = ";".join(f"{name}={value}" for name, value in scheduler.priorities)
+    priority = f"; приоритет {rules}" if rules else ""
+    _echo(context, f"Порядок обработки: {scheduler.order}{priority}: {head}{more}.")
+
+
+def _print_schedule_waits(context: RunContext, entries: list[ScheduleEntry]) -> None:
+    """Вывести ожидание старта проектов в очереди."""
+
+    if len(entries) <= 1:
+        return
+    average, longest = wait_summary(entries)
+    _echo(
+        context,
+        f"Очередь проектов: среднее ожидание старта {average:.2f} с, "
+        f"наибольшее {longest:.2f} с.",
+    )
+
+
+def execute_distribution_plan(
+    plan: DistributionPlan, workers: int = 1, context: RunContext | None = None
+) -> None:
+    """Исполнить план: переименования, создание каталогов, затем копирование.
+
+    Каталоги всех проектов создаются одним проходом от корня вглубь, затем
+    проекты раскладываются в порядке планировщика (`TOIR_SCHEDULE_ORDER`,
+    по умолчанию — сгруппированными по каталогу назначения, чтобы запись в
+    одну папку шла подряд).
+    """
+
+    context = context or _global_context()
+    runnable: list[ProjectPlan] = []
+    for project in plan.projects:
+        renamed = _apply_project_renames(context, project)
+        _log_plan_issues(context, project)
+        if renamed and project.executable:
+            runnable.append(project)
+
+    requested: list[Path] = []
+    for project in runnable:
+        requested.extend(_month_skeleton(context, project))
+    for project in runnable:
+        requested.extend(project.directories)
+    dir_errors = _prepare_directories(context, requested)
+    for directory, error in dir_errors.items():
+        _echo(context, f"  - [Ошибка] Не удалось создать каталог {directory}: {error}")
+
+    scheduler, entries = _schedule_projects(context, runnable)
+    _print_schedule(context, scheduler, entries)
+    if workers > 1 and len(entries) > 1:
+        _echo(context, f"Параллельная обработка: {workers} потоков.")
+
+    def execute(entry: ScheduleEntry) -> None:
+        project = entry.item
+        project.metadata = {
+            **project.metadata,
+            "schedule_order": scheduler.order,
+            "schedule_rank": str(entry.rank),
+            "queue_wait": f"{entry.queue_wait:.3f}",
+            "start_delay": f"{entry.start_delay:.3f}",
+        }
+        try:
+            _execute_project_transfers(context, project, dir_errors)
+        except Exception as e:  # noqa: BLE001
+            project.failed = True
+            _echo(
+                context,
+                "  - [Ошибка] Непредвиденная ошибка обработки "
+                f"{project.project_path}: {e}",
+            )
+
+    console = context.console
+    if console is None or (
+        (workers <= 1 or len(entries) <= 1) and context.io_queues is None
+    ):
+        scheduler.run(entries, execute, workers)
+    else:
+        scheduler.run(
+            entries, lambda entry: _run_buffered(console, execute, entry), workers
+        )
+    _print_schedule_waits(context, entries)
+
+
+def _find_stray_pdfs(inbox_dir: Path) -> list[Path]:
+    """PDF-файлы, лежащие прямо в корне входного каталога."""
+
+    return [
+        item
+        for item in inbox_dir.iterdir()
+        if item.is_file() and item.suffix.lower() == ".pdf"
+    ]
+
+
+def _print_plan_summary(context: RunContext, plan: DistributionPlan) -> None:
+    """Вывести сводку плана."""
+
+    summary = plan.summary()
+    _echo(
+        context,
+        f"План: проектов {summary['projects']} (к исполнению {summary['executable']}), "
+        f"копий {summary['copies']}, архивов {summary['archives']}, "
+        f"каталогов {summary['directories']}, переименований {summary['renames']}, "
+        f"ошибок {summary['issues']}; построен за {plan.planning_seconds:.2f} с.",
+    )
+
+
+def _plan_inbox(
+    context: RunContext, resume_state: ResumeState | None = None
+) -> DistributionPlan | None:
+    """Найти проекты входного каталога контекста и построить их план.
+
+    None — каталог отсутствует или в его корне лежат PDF-файлы.
+    """
+
+    inbox_dir = context.config.inbox_dir
+    if not inbox_dir.exists():
+        _echo(context, f"[Ошибка] Входной каталог отсутствует: {inbox_dir}")
+        return None
+    if _find_stray_pdfs(inbox_dir):
+        _echo(
+            context,
+            "[Предупреждение] В корне входного каталога обнаружены PDF-файлы. "
+            "Каждый отчёт должен лежать в отдельной папке. Обработка остановлена.",
+        )
+        return None
+    project_folders = discover_inbox(inbox_dir, context)
+    _echo(context, f"Найдено {len(project_folders)} папок с `_All` в {inbox_dir}.")
+    plan = build_distribution_plan(
+        inbox_dir, project_folders, context.config.workers, context
+    )
+    if resume_state is not None:
+        apply_resume_state(plan, resume_state)
+    _print_plan_summary(context, plan)
+    return plan
+
+
+def run_plan_only(
+    output: str,
+    resume_state: ResumeState | None = None,
+    context: RunContext | None = None,
+) -> list[DistributionPlan]:
+    """Построить планы входных каталогов и сохранить их в JSON, ничего не меняя.
+
+    При `output == "-"` JSON печатается в stdout, а ход планирования — в stderr.
+    Для одного каталога пишется объект плана, для нескольких — массив планов.
+    """
+
+    context = context or _global_context()
+    to_stdout = output == "-"
+    plans: list[DistributionPlan] = []
+    if to_stdout:
+        # stdout занят JSON плана — ход планирования печатается в stderr
+        context = dataclasses.replace(context, console=BufferedConsole(sys.stderr))
+    for source in context.config.inboxes:
+        plan = _plan_inbox(_inbox_context(context, source), resume_state)
+        if plan is not None:
+            plans.append(plan)
+    if not plans:
+        return plans
+
+    if len(context.config.inboxes) == 1:
+        payload = plans[0].to_json()
+    else:
+        payload = json.dumps(
+            [plan.to_dict() for plan in plans], ensure_ascii=False, indent=2
+        )
+    if to_stdout:
+        sys.stdout.write(payload + "\n")
+    else:
+        output_path = Path(output)
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        output_path.write_text(payload, encoding="utf-8")
+        _echo(context, f"План сохранён: {output_path}")
+    return plans
+
+
+def parse_inbox_source(value: str | Path | InboxSource) -> InboxSource:
+    """Разобрать входной каталог вида `PATH` или `PATH=PART` (`PART` — LP, CS, CS/LP)."""
+
+    if isinstance(value, InboxSource):
+        return value
+    if isinstance(value, Path):
+        return InboxSource(value.expanduser().resolve())
+    raw = value.strip()
+    path_text, separator, part = raw.rpartition("=")
+    part = part.strip().upper()
+    if separator and path_text.strip() and part in VALID_PART_FILTERS:
+        return InboxSource(Path(path_text.strip()).expanduser().resolve(), part)
+    return InboxSource(Path(raw).expanduser().resolve())
+
+
+def _get_inbox_sources(
+    inbox_dir: str | Path | Sequence[str | Path | InboxSource] | None,
+    settings: Mapping[str, str],
+) -> tuple[InboxSource, ...]:
+    """Входные каталоги запуска: аргумент, TOIR_INBOX_DIRS, TOIR_INBOX_DIR или INBOX_DIR.
+
+    В TOIR_INBOX_DIRS каталоги перечисляются через `;`, каждый — `PATH[=PART]`.
+    """
+
+    if isinstance(inbox_dir, (str, Path, InboxSource)):
+        values: Sequence[str | Path | InboxSource] = [inbox_dir]
+    elif inbox_dir:
+        values = inbox_dir
+    else:
+        raw = (settings.get("TOIR_INBOX_DIRS") or "").strip()
+        values = [item for item in raw.split(";") if item.strip()]
+    sources: list[InboxSource] = []
+    for value in values:
+        source = parse_inbox_source(value)
+        if source not in sources:
+            sources.append(source)
+    if not sources:
+        sources.append(
+            InboxSource(_override_path(INBOX_DIR, "TOIR_INBOX_DIR", settings))
+        )
+    return tuple(sources)
+
+
+def resolve_run_config(
+    inbox_dir: str | Path | Sequence[str | Path | InboxSource] | None = None,
+    workers: int | None = None,
+    settings: Mapping[str, str] | None = None,
+) -> RunConfig:
+    """Собрать настройки запуска один раз.
+
+    Значение берётся из переменной окружения, затем из сохранённых путей UI
+    (`ui_paths.json`, ключи — имена переменных), затем из констант модуля.
+    `settings` заменяет оба источника целиком. `inbox_dir` — один каталог
+    или список `PATH[=PART]`; `RunConfig.inbox_dir` — первый из них.
+    """
+
+    if settings is None:
+        merged = load_ui_paths()
+        merged.update(os.environ)
+        settings = merged
+    _warn_deprecated_settings(settings)
+    inboxes = _get_inbox_sources(inbox_dir, settings)
+    return RunConfig(
+        inbox_dir=inboxes[0].path,
+        notes_dir=_override_path(NOTES_DIR, "TOIR_NOTES_DIR", settings),
+        tra_gst_dir=_override_path(TRA_GST_DIR, "TOIR_TRA_GST_DIR", settings),
+        tra_sub_app_dir=_override_path(
+            TRA_SUB_APP_DIR, "TOIR_TRA_SUB_APP_DIR", settings
+        ),
+        dest_root_dir=_override_path(DEST_ROOT_DIR, "TOIR_DEST_ROOT_DIR", settings),
+        cache_dir=_override_path(CACHE_DIR, "TOIR_CACHE_DIR", settings),
+        compression_policy=_get_compression_policy(settings),
+        enable_notes=_env_flag("TOIR_ENABLE_NOTES", True, settings),
+        enable_tra_gst=_env_flag("TOIR_ENABLE_TRA_GST", True, settings),
+        enable_tra_sub_app=_env_flag("TOIR_ENABLE_TRA_SUB_APP", True, settings),
+        enable_dest_root=_env_flag("TOIR_ENABLE_DEST_ROOT", True, settings),
+        part_filter=_get_part_filter(settings),
+        link_mode=_get_link_mode(settings),
+        skip_mode=_get_skip_mode(settings),
+        workers=_get_worker_count(workers, settings),
+        archive_workers=_get_archive_worker_count(settings),
+        discovery_max_depth=_get_discovery_max_depth(settings),
+        discovery_exclude=tuple(_get_discovery_excludes(settings)),
+        inboxes=inboxes,
+        leases=_env_flag("TOIR_LEASES", False, settings),
+        lease_ttl=_get_positive_number("TOIR_LEASE_TTL", DEFAULT_LEASE_TTL, settings),
+        lease_done_ttl=_get_positive_number(
+            "TOIR_LEASE_DONE_TTL", DEFAULT_DONE_TTL, settings
+        ),
+        lease_batch=int(_get_positive_number("TOIR_LEASE_BATCH", 0, settings)),
+        schedule_order=_get_schedule_order(settings),
+        schedule_priority=parse_priorities(
+            (os.environ if settings is None else settings).get(
+                "TOIR_SCHEDULE_PRIORITY", ""
+            )
+        ),
+        schedule_queue=_get_schedule_queue(settings),
+        bandwidth=tuple(
+            parse_limits(
+                (os.environ if settings is None else settings).get("TOIR_BANDWIDTH", "")
+            ).items()
+        ),
+        bandwidth_file=_get_bandwidth_file(settings),
+        retry_policy=RetryPolicy(
+            max_attempts=int(_get_positive_number("TOIR_RETRY_ATTEMPTS", 3, settings)),
+            base_delay=_get_positive_number("TOIR_RETRY_DELAY", 0.5, settings),
+            max_delay=_get_positive_number("TOIR_RETRY_MAX_DELAY", 10.0, settings),
+        ),
+        breaker_threshold=int(
+            _get_positive_number("TOIR_BREAKER_THRESHOLD", 5, settings)
+        ),
+        breaker_cooldown=_get_positive_number("TOIR_BREAKER_COOLDOWN", 60.0, settings),
+        io_queues=_get_io_queues(settings),
+    )
+
+
+_GLOBAL_RUN: tuple[
+    dict[str, str], BandwidthLimiter, CircuitBreakers, BufferedConsole
+] | None = None
+_GLOBAL_CONFIG: tuple[tuple[object, ...], RunConfig] | None = None
+_GLOBAL_RUN_LOCK = threading.Lock()
+
+
+def _module_paths() -> tuple[object, ...]:
+    """Пути-константы модуля, которые вызывающий код может переназначить."""
+
+    return (
+        INBOX_DIR,
+        NOTES_DIR,
+        TRA_GST_DIR,
+        TRA_SUB_APP_DIR,
+        DEST_ROOT_DIR,
+        CACHE_DIR,
+    )
+
+
+def _global_context() -> RunContext:
+    """Контекст для вызова без явного RunContext.
+
+    Окружение и `ui_paths.json` читаются при первом вызове, ограничитель
+    записи, размыкатели и консоль создаются тогда же и дальше общие для всех
+    таких вызовов процесса — состояние размыкателей сохраняется. `RunConfig`
+    пересобирается из того же снимка настроек, только если переназначены
+    пути-константы модуля. Журнал и кэши берутся из глобальных переменных
+    модуля — как до появления `RunContext`.
+    """
+
+    global _GLOBAL_RUN, _GLOBAL_CONFIG
+    with _GLOBAL_RUN_LOCK:
+        if _GLOBAL_RUN is None:
+            settings = load_ui_paths()
+            settings.update(os.environ)
+            config = resolve_run_config(settings=settings)
+            _GLOBAL_CONFIG = (_module_paths(), config)
+            _GLOBAL_RUN = (
+                settings,
+                _make_bandwidth_limiter(config),
+                _make_circuit_breakers(config),
+                BufferedConsole(),
+            )
+        settings, bandwidth, breakers, console = _GLOBAL_RUN
+        paths = _module_paths()
+        if _GLOBAL_CONFIG is None or _GLOBAL_CONFIG[0] != paths:
+            _GLOBAL_CONFIG = (paths, resolve_run_config(settings=settings))
+        config = _GLOBAL_CONFIG[1]
+    return RunContext(
+        config=config,
+        logger=LOGGER,
+        directories=DIRECTORIES,
+        gst_index=GST_INDEX,
+        folders=FOLDERS,
+        archive_stage=ARCHIVE_STAGE,
+        bandwidth=bandwidth,
+        breakers=breakers,
+        console=console,
+    )
+
+
+def _destination_roots(config: RunConfig) -> dict[str, Path]:
+    """Корни назначения запуска по именам NOTES, TRA_GST, TRA_SUB_APP, DEST_ROOT."""
+
+    return {
+        "NOTES": config.notes_dir,
+        "TRA_GST": config.tra_gst_dir,
+        "TRA_SUB_APP": config.tra_sub_app_dir,
+        "DEST_ROOT": config.dest_root_dir,
+    }
+
+
+def _make_bandwidth_limiter(config: RunConfig) -> BandwidthLimiter:
+    """Ограничитель записи по корням назначения из настроек запуска."""
+
+    return BandwidthLimiter(
+        roots=_destination_roots(config),
+        limits=dict(config.bandwidth),
+        control_file=config.bandwidth_file,
+    )
+
+
+def _make_circuit_breakers(config: RunConfig) -> CircuitBreakers:
+    """Размыкатели корней назначения из настроек запуска."""
+
+    return CircuitBreakers(
+        _destination_roots(config),
+        threshold=config.breaker_threshold,
+        cooldown=config.breaker_cooldown,
+    )
+
+
+@contextlib.contextmanager
+def _run_context(
+    config: RunConfig, logger: DispatchLogger | None = None
+) -> Iterator[RunContext]:
+    """Контекст одного запуска со своими кешами каталогов назначения."""
+
+    gst_index = GstWeekIndex(config.tra_gst_dir)
+    context = RunContext(
+        config=config,
+        logger=logger,
+        directories=DirectoryRegistry(),
+        gst_index=gst_index,
+        gst_allocator=GstWeekAllocator(gst_index),
+        folders=FolderIndex(),
+        bandwidth=_make_bandwidth_limiter(config),
+        breakers=_make_circuit_breakers(config),
+        console=BufferedConsole(),
+    )
+    try:
+        yield context
+    finally:
+        context.directories = None
+        context.gst_index = None
+        context.gst_allocator = None
+        context.folders = None
+
+
+def _inbox_context(context: RunContext, source: InboxSource) -> RunContext:
+    """Контекст одного входного каталога: свои настройки, общие журнал и кеши."""
+
+    return dataclasses.replace(context, config=context.config.for_inbox(source))
+
+
+def _ensure_service_directories(context: RunContext) -> None:
+    """Создать каталоги NOTES и 04_TRA_GST, если их ещё нет."""
+
+    for dir_path in [context.config.notes_dir, context.config.tra_gst_dir]:
+        if not _directory_exists(context, dir_path):
+            _echo(context, f"Создаём вспомогательную директорию: {dir_path}")
+            _ensure_directory(context, dir_path)
+
+
+def _execute_with_archive_stage(context: RunContext, plan: DistributionPlan) -> None:
+    """Исполнить план, при необходимости с фоновой стадией архивации и очередями записи."""
+
+    config = context.config
+    if config.archive_workers > 0:
+        context.archive_stage = ArchiveStage(
+            max_workers=config.archive_workers,
+            policy=config.compression_policy,
+            retry=config.retry_policy,
+        )
+    if config.io_queues is not None:
+        context.io_queues = DestinationQueues(
+            _destination_roots(config), dict(config.io_queues)
+        )
+    try:
+        execute_distribution_plan(plan, config.workers, context)
+    finally:
+        if context.io_queues is not None:
+            context.io_queues.close()
+            _print_queue_stats(context, context.io_queues)
+            context.io_queues = None
+        if context.archive_stage is not None:
+            _echo(context, "\nОжидаем завершения архивации...")
+            context.archive_stage.close()
+            context.archive_stage = None
+            if context.bandwidth is not None:
+                context.bandwidth.release_share(config.dest_root_dir)
+
+
+def dispatch_folders(
+    inbox_dir: Path,
+    folders: Sequence[Path],
+    workers: int | None = None,
+    logger: DispatchLogger | None = None,
+    config: RunConfig | None = None,
+) -> DistributionPlan:
+    """Разложить только указанные папки проектов (режим наблюдения `watch`).
+
+    `config` — настройки, собранные вызывающим один раз на всё наблюдение;
+    кэши каталогов живут в пределах одного вызова, поэтому изменения на
+    дисках между опросами не теряются.
+    """
+
+    if config is None:
+        config = resolve_run_config(inbox_dir, workers)
+    elif workers is not None:
+        config = dataclasses.replace(config, workers=_get_worker_count(workers))
+    config = dataclasses.replace(config, inbox_dir=Path(inbox_dir))
+    projects = [DiscoveredProject(path=Path(folder)) for folder in folders]
+    with _run_context(config, logger) as context:
+        _ensure_service_directories(context)
+        started = time.perf_counter()
+        plan = _dispatch_projects(context, projects)
+        assert context.directories is not None
+        _print_directory_stats(context, context.directories)
+        _print_gst_stats(context)
+        _print_breaker_stats(context)
+        _print_bandwidth_stats(context, time.perf_counter() - started)
+    return plan
+
+
+def _dispatch_inbox(
+    context: RunContext, resume_state: ResumeState | None = None
+) -> DistributionPlan | None:
+    """Разложить проекты одного входного каталога запуска.
+
+    None — каталог отсутствует или в его корне лежат PDF-файлы.
+    """
+
+    inbox_dir = context.config.inbox_dir
+    if not inbox_dir.exists():
+        _echo(context, f"[Ошибка] Входной каталог отсутствует: {inbox_dir}")
+        return None
+    stray_pdfs = _find_stray_pdfs(inbox_dir)
+    if stray_pdfs:
+        _echo(
+            context,
+            "[Предупреждение] В корне входного каталога обнаружены PDF-файлы. "
+            "Каждый отчёт должен лежать в отдельной папке. Обработка остановлена.",
+        )
+        for pdf_path in stray_pdfs:
+            _log_error(
+                context,
+                TransferAction.COPY_DESTINATION,
+                pdf_path,
+                None,
+                "Файл расположен в корне INBOX. Требуется отдельная папка для каждого отчёта.",
+            )
+        return None
+
+    project_folders = discover_inbox(inbox_dir, context)
+    if not project_folders:
+        _echo(context, f"В {inbox_dir} не найдено файлов `_All` для обработки.")
+        return DistributionPlan(
+            inbox=inbox_dir, part_filter=context.config.part_filter
+        )
+
+    _echo(context, f"Найдено {len(project_folders)} папок с `_All` в {inbox_dir}.")
+    return _dispatch_projects(context, project_folders, resume_state)
+
+
+def _plan_and_execute(
+    context: RunContext,
+    projects: Sequence[DiscoveredProject],
+    resume_state: ResumeState | None = None,
+) -> DistributionPlan:
+    """Спланировать и исполнить набор проектов входного каталога контекста."""
+
+    plan = build_distribution_plan(
+        context.config.inbox_dir, projects, context.config.workers, context
+    )
+    if resume_state is not None:
+        apply_resume_state(plan, resume_state)
+    _echo(context)
+    _print_plan_summary(context, plan)
+    _execute_with_archive_stage(context, plan)
+    return plan
+
+
+def _dispatch_projects(
+    context: RunContext,
+    projects: Sequence[DiscoveredProject],
+    resume_state: ResumeState | None = None,
+) -> DistributionPlan:
+    """Разложить проекты; при `TOIR_LEASES` — только взятые в аренду этим узлом."""
+
+    config = context.config
+    if not config.leases:
+        return _plan_and_execute(context, projects, resume_state)
+
+    with LeaseManager(
+        config.inbox_dir / LEASE_DIR_NAME,
+        ttl=config.lease_ttl,
+        done_ttl=config.lease_done_ttl,
+    ) as leases:
+        return _dispatch_leased(context, leases, projects, resume_state)
+
+
+def _dispatch_leased(
+    context: RunContext,
+    leases: LeaseManager,
+    projects: Sequence[DiscoveredProject],
+    resume_state: ResumeState | None = None,
+) -> DistributionPlan:
+    """Разбирать проекты пачками: взять в аренду, разложить, отметить обработанными.
+
+    Аренда берётся на пачку из `lease_batch` проектов (по умолчанию удвоенное
+    число потоков, не меньше 4), а не на весь список сразу, поэтому проекты
+    общего INBOX распределяются между узлами по мере их освобождения.
+    Отметка `.done` ставится только проектам, разложенным без ошибок; проекты
+    с ошибками и пропущенные фильтром части просто освобождаются.
+    """
+
+    config = context.config
+    inbox_dir = config.inbox_dir
+    batch_size = config.lease_batch or max(config.workers * 2, 4)
+    merged = DistributionPlan(inbox=inbox_dir, part_filter=config.part_filter)
+    pending = list(projects)
+    busy = 0
+    while pending:
+        claimed: dict[Path, Lease] = {}
+        batch: list[DiscoveredProject] = []
+        while pending and len(batch) < batch_size:
+            project = pending.pop(0)
+            lease = leases.acquire(
+                lease_key(inbox_dir, project.path), project.path.name
+            )
+            if lease is None:
+                busy += 1
+                continue
+            claimed[project.path] = lease
+            batch.append(project)
+        if not batch:
+            break
+        plan = _plan_and_execute(context, batch, resume_state)
+        for project in plan.projects:
+            lease = claimed.get(project.source_path)
+            if lease is None:
+                continue
+            aliases: tuple[str, ...] = ()
+            if project.project_path != project.source_path:
+                aliases = (lease_key(inbox_dir, project.project_path),)
+            if project.completed:
+                leases.release(lease, done=True, aliases=aliases)
+            else:
+                # Ошибка или проект чужой части — его возьмёт следующий запуск
+                leases.release(lease)
+        merged.projects.extend(plan.projects)
+        merged.planning_seconds += plan.planning_seconds
+    _echo(
+        context,
+        f"Аренда: обработано проектов {len(merged.projects)}, "
+        f"занято другими узлами или уже обработано {busy}.",
+    )
+    return merged
+
+
+def _throughput(
+    context: RunContext,
+    before: Mapping[str, RootThroughput] | None,
+    seconds: float,
+) -> dict[str, dict[str, float]]:
+    """Записано по корням назначения с `before` и средняя скорость, МБ/с."""
+
+    if context.bandwidth is None:
+        return {}
+    result: dict[str, dict[str, float]] = {}
+    for root, item in context.bandwidth.snapshot().items():
+        previous = before.get(root) if before else None
+        written = item.bytes_written - (previous.bytes_written if previous else 0)
+        if written <= 0:
+            continue
+        waited = item.waited - (previous.waited if previous else 0.0)
+        result[root] = {
+            "bytes": written,
+            "mb_per_s": round(written / MEGABYTE / seconds, 3) if seconds > 0 else 0.0,
+            "limit": item.limit,
+            "throttled": round(waited, 3),
+        }
+    return result
+
+
+def _format_throughput(throughput: Mapping[str, Mapping[str, float]]) -> str:
+    """Строка скоростей записи по корням для консоли."""
+
+    parts = []
+    for root, item in throughput.items():
+        limit = f" (лимит {item['limit']:g})" if item.get("limit") else ""
+        parts.append(f"{root} {item['mb_per_s']:.2f} МБ/с{limit}")
+    return ", ".join(parts)
+
+
+def _print_bandwidth_stats(
+    context: RunContext,
+    seconds: float,
+    before: Mapping[str, RootThroughput] | None = None,
+) -> None:
+    """Вывести среднюю скорость записи по корням назначения за запуск."""
+
+    throughput = _throughput(context, before, seconds)
+    if throughput:
+        _echo(
+            context,
+            f"Запись по корням назначения: {_format_throughput(throughput)}.",
+        )
+
+
+def _log_inbox_summary(
+    context: RunContext,
+    plan: DistributionPlan | None,
+    before: dict[TransferStatus, int],
+    seconds: float,
+    written: Mapping[str, RootThroughput] | None = None,
+) -> None:
+    """Записать в журнал сводку по входному каталогу (`inbox_summary`).
+
+    Счётчики операций — разница записей журнала до и после обработки
+    каталога, скорость записи — по счётчикам ограничителя с `written`;
+    сама сводка в итоги запуска не входит.
+    """
+
+    logger = context.logger
+    if logger is None:
+        return
+    after = logger.status_counts()
+    summary = plan.summary() if plan is not None else {}
+    config = context.config
+    metadata = {
+        "inbox": str(config.inbox_dir),
+        "part_filter": config.part_filter,
+        "projects": summary.get("projects", 0),
+        "executable": summary.get("executable", 0),
+        "issues": summary.get("issues", 0),
+        "seconds": round(seconds, 3),
+    }
+    for status, key in (
+        (TransferStatus.SUCCESS, "success"),
+        (TransferStatus.ERROR, "errors"),
+        (TransferStatus.SKIPPED, "skipped"),
+    ):
+        metadata[key] = after.get(status, 0) - before.get(status, 0)
+    throughput = _throughput(context, written, seconds)
+    if throughput:
+        metadata["throughput"] = throughput
+    _echo(
+        context,
+        f"Итог по {config.inbox_dir}: успехов {metadata['success']}, "
+        f"ошибок {metadata['errors']}, пропущено {metadata['skipped']}.",
+    )
+    if throughput:
+        _echo(context, f"  Запись: {_format_throughput(throughput)}.")
+    logger.log(
+        action=TransferAction.INBOX_SUMMARY,
+        status=TransferStatus.ERROR if plan is None else TransferStatus.SUCCESS,
+        source_path=config.inbox_dir,
+        target_path=None,
+        message="Сводка по входному каталогу",
+        metadata=metadata,
+    )
+
+
+def main(
+    inbox_dir: str | Path | Sequence[str | Path | InboxSource] | None = None,
+    workers: int | None = None,
+    plan_only: str | None = None,
+    resume: str | None = None,
+) -> None:
+    """Точка входа обработки PDF.
+
+    При заданном `plan_only` строится только план распределения (JSON в файл
+    или в stdout для `-`), журнал не создаётся и на дисках ничего не меняется.
+    `resume` — идентификатор прерванного запуска: шаги, успешные по его
+    журналу, пропускаются, а новые записи дописываются в тот же журнал.
+    Настройки собираются в `RunConfig` один раз на запуск.
+
+    `inbox_dir` может перечислять несколько входных каталогов (`PATH[=PART]`):
+    они обрабатываются по очереди в одном запуске с общими кешами каталогов
+    назначения, недель GST и справочника TZ, а по каждому в журнал пишется
+    сводка `inbox_summary`.
+    """
+
+    config = resolve_run_config(inbox_dir, workers)
+
+    resume_state: ResumeState | None = None
+    if resume:
+        try:
+            resume_state = load_resume_state(resume)
+        except FileNotFoundError as e:
+            print(f"[Ошибка] {e}")
+            return
+
+    if plan_only is not None:
+        with _run_context(config) as context:
+            run_plan_only(str(plan_only), resume_state, context)
+        return
+
+    print("Запуск распределения PDF...")
+    with DispatchLogger(run_id=resume) as logger, _run_context(
+        config, logger
+    ) as context:
+        _echo(context, f"Текущий лог доступен в: {logger.file_path}")
+        if resume_state is not None:
+            _echo(
+                context,
+                f"Продолжаем запуск {resume_state.run_id}: записей в журнале "
+                f"{resume_state.entries}, проектов с выполненными шагами "
+                f"{len(resume_state.completed)}.",
+            )
+        _ensure_service_directories(context)
+        run_started = time.perf_counter()
+
+        for source in config.inboxes:
+            inbox_context = _inbox_context(context, source)
+            if len(config.inboxes) > 1:
+                _echo(
+                    context,
+                    f"\n=== Входной каталог: {source.path} "
+                    f"(part {inbox_context.config.part_filter}) ===",
+                )
+            started = time.perf_counter()
+            before = logger.status_counts()
+            written = context.bandwidth.snapshot() if context.bandwidth else None
+            plan = _dispatch_inbox(inbox_context, resume_state)
+            _log_inbox_summary(
+                inbox_context, plan, before, time.perf_counter() - started, written
+            )
+
+        assert context.directories is not None
+        _print_directory_stats(context, context.directories)
+        _print_gst_stats(context)
+        _print_breaker_stats(context)
+        if len(config.inboxes) > 1:
+            _print_bandwidth_stats(context, time.perf_counter() - run_started)
+        _echo(context, "\nОбработка завершена.")
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Создаёт парсер аргументов командной строки конвейера."""
+
+    parser = argparse.ArgumentParser(description="Распределение PDF-отчётов ТОиР")
+    parser.add_argument(
+        "--inbox",
+        action="append",
+        default=None,
+        metavar="PATH[=PART]",
+        help=(
+            "Входной каталог; можно указать несколько раз, PART (LP, CS, CS/LP) "
+            "задаёт фильтр части для каталога (по умолчанию TOIR_INBOX_DIRS, "
+            "TOIR_INBOX_DIR или INBOX_DIR)"
+        ),
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Число параллельно обрабатываемых проектов (TOIR_WORKERS, по умолчанию 1)",
+    )
+    parser.add_argument(
+        "--plan-only",
+        nargs="?",
+        const="-",
+        default=None,
+        metavar="PATH",
+        help="Только построить план распределения в JSON (в файл PATH или в stdout)",
+    )
+    parser.add_argument(
+        "--resume",
+        default=None,
+        metavar="RUN_ID",
+        help="Продолжить прерванный запуск по журналу logs/dispatch/RUN_ID.jsonl",
+    )
+    return parser
+
+
+if __name__ == "__main__":
+    args = build_parser().parse_args()
+    main(
+        inbox_dir=args.inbox,
+        workers=args.workers,
+        plan_only=args.plan_only,
+        resume=args.resume,
+    )